@@ -0,0 +1 @@
+# Benchmarks app
\ No newline at end of file
@@ -0,0 +1,5 @@
+from django.apps import AppConfig
+
+class BenchmarksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.benchmarks'
\ No newline at end of file
@@ -0,0 +1,228 @@
+import gc
+import json
+import logging
+import platform
+import random
+import re
+import time
+import tracemalloc
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from graphql import GraphQLError, NonNullTypeNode, OperationDefinitionNode, parse
+from apps.interactions.models import Like, Comment, Share
+from apps.posts.models import Post
+from apps.users.models import Follow, User
+from social_backend.views import SocialGraphQLView
+from .generate_synthetic_data import PREFIX
+
+OPERATION = re.compile(r'export const (\w+) = gql`(.*?)`', re.DOTALL)
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+DEFAULT_OPERATIONS_DIR = settings.BASE_DIR.parent / 'frontend' / 'graphql'
+LATENCY_SLACK_MS = 1.0
+
+class Command(BaseCommand):
+    help = (
+        "Replay the frontend's GraphQL operations in-process and report latency percentiles, "
+        "SQL queries and peak memory per operation against a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations-dir', type=Path, default=DEFAULT_OPERATIONS_DIR,
+                            help="Directory of .ts files with gql`...` operations")
+        parser.add_argument('--username', help="Viewer; defaults to the synthetic user following the most crafters")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--operation', action='append', help="Only run these operation names")
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+        parser.add_argument('--queries-only', action='store_true',
+                            help="With --save-baseline, leave out latency and memory, e.g. for a committed baseline")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed relative increase in median latency and peak memory")
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            # Every traced operation logs a summary line
+            logging.getLogger('social_backend').setLevel(logging.WARNING)
+        self.rng = random.Random(options['seed'])
+        self.viewer = self.get_viewer(options['username'])
+        self.post_ids = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True)[:200])
+        if not self.post_ids:
+            raise CommandError("No posts to benchmark against; run generate_synthetic_data first")
+        self.view = SocialGraphQLView.as_view(graphiql=False)
+        self.factory = RequestFactory()
+
+        operations = self.load_operations(options['operations_dir'], options['operation'])
+        results = {}
+        for name, operation_name, query, variable_names in operations:
+            results[name] = self.measure(operation_name, query, variable_names,
+                                         options['iterations'], options['warmup'])
+
+        self.report(results)
+        run = {'dataset': self.dataset(), 'machine': self.machine(), 'viewer': self.viewer.username, 'operations': results}
+        if options['save_baseline']:
+            if options['queries_only']:
+                del run['machine']
+                run['operations'] = {name: {'queries': result['queries']} for name, result in results.items()}
+            options['baseline'].parent.mkdir(parents=True, exist_ok=True)
+            options['baseline'].write_text(json.dumps(run, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+        if not options['baseline'].exists():
+            self.stdout.write(f"No baseline at {options['baseline']}; pass --save-baseline to create one")
+            return
+        regressions = self.compare(run, json.loads(options['baseline'].read_text()), options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def get_viewer(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username}")
+        viewer = (User.objects.filter(username__startswith=PREFIX, is_active=True)
+                  .order_by('-following_count', 'pk').first())
+        if viewer is None:
+            raise CommandError("No synthetic users; run generate_synthetic_data or pass --username")
+        return viewer
+
+    def load_operations(self, directory, only):
+        operations = []
+        for path in sorted(Path(directory).glob('*.ts')):
+            for name, source in OPERATION.findall(path.read_text()):
+                if only and name not in only:
+                    continue
+                try:
+                    document = parse(source)
+                except GraphQLError as error:
+                    raise CommandError(f"{path.name}:{name} does not parse: {error.message}")
+                definition = next(node for node in document.definitions if isinstance(node, OperationDefinitionNode))
+                variable_names = [
+                    (node.variable.name.value, isinstance(node.type, NonNullTypeNode))
+                    for node in definition.variable_definitions
+                ]
+                operations.append((name, definition.name.value if definition.name else None, source, variable_names))
+        if not operations:
+            raise CommandError(f"No gql operations found in {directory}")
+        return operations
+
+    def variables(self, variable_names):
+        # Only the variables the frontend uses; a new required one needs a value here
+        values = {}
+        for name, required in variable_names:
+            if name == 'postId':
+                values[name] = str(self.rng.choice(self.post_ids))
+            elif name == 'userId':
+                values[name] = str(self.viewer.pk)
+            elif name == 'first':
+                values[name] = 20
+            elif name == 'content':
+                values[name] = 'Benchmark comment'
+            elif required:
+                raise CommandError(f"No benchmark value for required variable ${name}")
+        return values
+
+    def run_operation(self, operation_name, query, variable_names):
+        body = {'query': query, 'operationName': operation_name, 'variables': self.variables(variable_names)}
+        request = self.factory.post('/graphql/', json.dumps(body), content_type='application/json')
+        request.user = self.viewer
+        # Mutations are rolled back so every iteration sees the same data
+        with transaction.atomic():
+            response = self.view(request)
+            transaction.set_rollback(True)
+        payload = json.loads(response.content)
+        return response.status_code == 200 and not payload.get('errors')
+
+    def measure(self, operation_name, query, variable_names, iterations, warmup):
+        for _ in range(warmup):
+            self.run_operation(operation_name, query, variable_names)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.run_operation(operation_name, query, variable_names)
+        # Savepoint statements come from the harness, not the operation
+        query_count = sum(1 for query in queries.captured_queries if 'SAVEPOINT' not in query['sql'])
+
+        tracemalloc.start()
+        self.run_operation(operation_name, query, variable_names)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies, errors = [], 0
+        # Like timeit: collector pauses would land on whichever iteration triggers them
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                ok = self.run_operation(operation_name, query, variable_names)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+        finally:
+            gc.enable()
+        latencies.sort()
+        return {
+            'p50_ms': round(self.percentile(latencies, 50), 2),
+            'p95_ms': round(self.percentile(latencies, 95), 2),
+            'p99_ms': round(self.percentile(latencies, 99), 2),
+            'queries': query_count,
+            'peak_kib': round(peak / 1024, 1),
+            'errors': errors,
+        }
+
+    def percentile(self, values, percent):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+    def machine(self):
+        return f"{platform.node()} {platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+
+    def dataset(self):
+        counts = {model.__name__.lower(): model.objects.count() for model in (User, Follow, Post, Like, Comment, Share)}
+        counts['max_followers'] = User.objects.order_by('-followers_count').values_list(
+            'followers_count', flat=True
+        ).first() or 0
+        return counts
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'operation':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}{'errors':>8}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                f"{result['queries']:>9}{result['peak_kib']:>10.1f}{result['errors']:>8}"
+            )
+
+    def compare(self, run, baseline, tolerance):
+        # Timings and memory only mean something against a baseline from the same data and machine
+        timed = run['dataset'] == baseline.get('dataset') and run['machine'] == baseline.get('machine')
+        if not timed:
+            self.stdout.write(self.style.WARNING(
+                "Baseline comes from another dataset or machine; comparing query counts only"
+            ))
+        regressions = []
+        for name, result in run['operations'].items():
+            previous = baseline.get('operations', {}).get(name)
+            if previous is None:
+                continue
+            if result['errors']:
+                regressions.append(f"{name}: {result['errors']} failed iterations")
+            # Query counts do not depend on the machine, so any increase counts
+            if result['queries'] > previous['queries']:
+                regressions.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+            if not timed or 'p50_ms' not in previous:
+                continue
+            # The median, with some slack, so scheduler noise on millisecond operations does not fail the run
+            if result['p50_ms'] > max(previous['p50_ms'] * (1 + tolerance), previous['p50_ms'] + LATENCY_SLACK_MS):
+                regressions.append(f"{name}: p50 {previous['p50_ms']:.1f} -> {result['p50_ms']:.1f} ms")
+            if result['peak_kib'] > previous['peak_kib'] * (1 + tolerance):
+                regressions.append(f"{name}: peak {previous['peak_kib']:.1f} -> {result['peak_kib']:.1f} KiB")
+        return regressions
\ No newline at end of file
@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import http.client
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.models import User
+
+FEED_QUERY = """
+query BenchmarkFeed {
+  homeFeed(first: 20) {
+    edges { node {
+      id title likesCount commentsCount isLiked
+      author { username avatarImage(size: THUMBNAIL) { url placeholder } }
+      craftCategory { name }
+      images(size: MEDIUM) { url width height }
+      comments(first: 3) { edges { node { content author { username } } } }
+    } }
+  }
+}
+"""
+
+SERVERS = {
+    'wsgi': ['social_backend.wsgi:application', '--worker-class', 'sync'],
+    'asgi': ['social_backend.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+class Command(BaseCommand):
+    help = "Compare requests per second and p99 latency of the feed query under WSGI and ASGI workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="Viewer whose home feed is requested")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers for both servers")
+        parser.add_argument('--concurrency', type=int, default=32, help="Concurrent client connections")
+        parser.add_argument('--duration', type=float, default=15.0, help="Seconds to measure each server")
+        parser.add_argument('--warmup', type=float, default=3.0, help="Seconds of unmeasured traffic first")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--server', choices=sorted(SERVERS), action='append', help="Only run these servers")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.login(user)}'
+        body = json.dumps({'query': FEED_QUERY, 'operationName': 'BenchmarkFeed'}).encode('utf-8')
+
+        rows = []
+        for name in options['server'] or sorted(SERVERS, reverse=True):
+            process = self.start(name, options)
+            try:
+                self.wait_until_ready(options['port'])
+                self.drive(options['port'], body, cookie, options['concurrency'], options['warmup'])
+                latencies, errors, elapsed = self.drive(
+                    options['port'], body, cookie, options['concurrency'], options['duration']
+                )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            rows.append((name, latencies, errors, elapsed))
+
+        self.stdout.write(f"{'server':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, latencies, errors, elapsed in rows:
+            latencies.sort()
+            self.stdout.write(
+                f"{name:<8}{len(latencies):>10}{errors:>8}{len(latencies) / elapsed:>10.1f}"
+                f"{self.percentile(latencies, 50):>10.1f}{self.percentile(latencies, 99):>10.1f}"
+            )
+
+    def login(self, user):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def start(self, name, options):
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[name],
+            '--workers', str(options['workers']),
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--log-level', 'warning',
+        ]
+        # Both servers get the same settings; only the view differs
+        env = dict(os.environ, GRAPHQL_ASYNC=str(name == 'asgi'))
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+    def wait_until_ready(self, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                connection.request('GET', '/admin/login/')
+                connection.getresponse().read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server on port {port} did not start within {timeout}s")
+
+    def drive(self, port, body, cookie, concurrency, duration):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+        headers = {'Content-Type': 'application/json', 'Cookie': cookie}
+
+        def client():
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    connection.request('POST', '/graphql/', body, headers)
+                    response = connection.getresponse()
+                    payload = response.read()
+                    failed = response.status != 200 or b'"errors"' in payload
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    failed = True
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if failed:
+                        errors[0] += 1
+                    else:
+                        latencies.append(elapsed)
+            connection.close()
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0], time.monotonic() - started
+
+    def percentile(self, values, percent):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * percent / 100))]
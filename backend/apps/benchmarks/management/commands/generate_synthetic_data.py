@@ -0,0 +1,241 @@
+import bisect
+import io
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from apps.feed.fanout import rebuild_feed
+from apps.interactions.models import Like, Comment, Share
+from apps.posts.counters import rebuild_counters as rebuild_post_counters
+from apps.posts.models import Post, PostImage, CraftCategory
+from apps.posts.trending import refresh_trending
+from apps.users.follows import rebuild_counters as rebuild_follow_counters, refresh_suggestions
+from apps.users.models import Follow, User
+
+PREFIX = 'synth_'
+CATEGORIES = ['Pottery', 'Jewelry', 'Woodworking', 'Knitting', 'Weaving', 'Leatherwork', 'Glassblowing', 'Quilting']
+MATERIALS = ['clay', 'glaze', 'silver wire', 'oak', 'walnut', 'merino wool', 'linen', 'cotton', 'leather', 'beads']
+WORDS = (
+    'handmade small batch glaze kiln grain texture pattern stitch loom bead polish carve sand finish '
+    'colour natural dye reclaimed workshop commission gift process sketch detail edge form'
+).split()
+IMAGE_POOL_SIZE = 12
+MAX_IMAGES_PER_POST = 6
+BATCH_SIZE = 2000
+
+@contextmanager
+def explicit_timestamps(*models):
+    # Keep the generated created_at/updated_at values instead of "now"
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+class WeightedSampler:
+    """Draws items with probability proportional to their weights."""
+
+    def __init__(self, items, weights, rng):
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+        self.rng = rng
+
+    def draw(self):
+        return self.items[bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+    def sample(self, count, exclude=()):
+        """Up to `count` distinct items, heavy ones first in expectation."""
+        chosen = set()
+        attempts = 0
+        while len(chosen) < count and attempts < count * 5:
+            item = self.draw()
+            if item not in exclude:
+                chosen.add(item)
+            attempts += 1
+        return chosen
+
+class Command(BaseCommand):
+    help = "Create a reproducible synthetic dataset with power-law follows, posts and interactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows-per-user', type=float, default=20.0, help="Mean out-degree")
+        parser.add_argument('--likes-per-post', type=float, default=8.0)
+        parser.add_argument('--comments-per-post', type=float, default=2.0)
+        parser.add_argument('--shares-per-post', type=float, default=0.5)
+        parser.add_argument('--images-per-post', type=float, default=1.5)
+        parser.add_argument('--days', type=int, default=30, help="Spread posts over this many days")
+        parser.add_argument('--alpha', type=float, default=1.6, help="Pareto shape of every distribution")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help=f"Delete existing {PREFIX}* users first")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild feeds, trending scores and follow suggestions")
+
+    def handle(self, *args, **options):
+        existing = User.objects.filter(username__startswith=PREFIX)
+        if existing.exists():
+            if not options['clear']:
+                raise CommandError("Synthetic users already exist; pass --clear to replace them")
+            deleted = existing.delete()[0]
+            self.stdout.write(f"Deleted {deleted} synthetic rows")
+
+        self.seed = options['seed']
+        self.rng = random.Random(self.seed)
+        self.alpha = options['alpha']
+        self.now = timezone.now()
+        with transaction.atomic(), explicit_timestamps(User, Follow, Post, PostImage, Like, Comment, Share):
+            users = self.create_users(options['users'], options['days'])
+            user_ids = [user.pk for user in users]
+            # Who gets followed and who is active are independent power laws
+            popularity = WeightedSampler(user_ids, [self.rng.paretovariate(self.alpha) for _ in user_ids], self.rng)
+            activity = WeightedSampler(user_ids, [self.rng.paretovariate(self.alpha) for _ in user_ids], self.rng)
+
+            follows = self.create_follows(users, popularity, options['follows_per_user'])
+            posts = self.create_posts(options['posts'], activity, options['days'])
+            images = self.create_images(posts, options['images_per_post'])
+            likes = self.create_interactions(Like, 'user', posts, activity, options['likes_per_post'])
+            comments = self.create_interactions(Comment, 'author', posts, activity, options['comments_per_post'])
+            shares = self.create_interactions(Share, 'user', posts, activity, options['shares_per_post'])
+
+            synthetic = User.objects.filter(pk__in=user_ids)
+            rebuild_follow_counters(synthetic)
+            rebuild_post_counters(Post.objects.filter(author__in=synthetic))
+
+        self.stdout.write(
+            f"Created {len(users)} users, {follows} follows, {len(posts)} posts, {images} images, "
+            f"{likes} likes, {comments} comments, {shares} shares"
+        )
+        if options['skip_derived']:
+            return
+        # One transaction instead of a commit per feed and per user's suggestions
+        with transaction.atomic():
+            for user_id in user_ids:
+                rebuild_feed(user_id)
+            suggested = refresh_suggestions()
+        rescored, pruned = refresh_trending()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(user_ids)} feeds, {rescored} trending rows and suggestions for {suggested} users"
+        ))
+
+    def power_count(self, mean, cap):
+        # Pareto draws rescaled to the requested mean, so a few items get most of the activity
+        value = mean * (self.alpha - 1) / self.alpha * self.rng.paretovariate(self.alpha)
+        # Round the fraction up at random so small means keep their expected value
+        return min(cap, int(value) + (self.rng.random() < value % 1))
+
+    def moment(self, days):
+        return self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+
+    def text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def create_users(self, count, days):
+        # One unusable hash for everyone; hashing a password per user would dominate the run
+        password = make_password(None)
+        users = []
+        for index in range(count):
+            username = f'{PREFIX}{index:06d}'
+            joined = self.moment(days * 3)
+            users.append(User(
+                username=username,
+                email=f'{username}@example.com',
+                password=password,
+                first_name=self.rng.choice(WORDS).capitalize(),
+                last_name=self.rng.choice(WORDS).capitalize(),
+                bio=self.text(12),
+                craft_specialization=self.rng.choice(CATEGORIES),
+                location=self.rng.choice(['Accra', 'Lagos', 'Nairobi', 'Casablanca', 'Kigali', 'Dakar']),
+                is_verified_crafter=self.rng.random() < 0.05,
+                date_joined=joined,
+                created_at=joined,
+                updated_at=joined,
+            ))
+        return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+    def create_follows(self, users, popularity, mean):
+        follows = []
+        for user in users:
+            followees = popularity.sample(self.power_count(mean, len(users) - 1), exclude={user.pk})
+            for following_id in followees:
+                follows.append(Follow(
+                    follower_id=user.pk, following_id=following_id, created_at=self.moment(30),
+                ))
+        Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+        return len(follows)
+
+    def create_posts(self, count, activity, days):
+        categories = [CraftCategory.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+        posts = []
+        for index in range(count):
+            created_at = self.moment(days)
+            posts.append(Post(
+                author_id=activity.draw(),
+                title=self.text(self.rng.randint(2, 6)),
+                content=self.text(self.rng.randint(15, 80)),
+                craft_category=self.rng.choice(categories),
+                materials_used=', '.join(self.rng.sample(MATERIALS, 3)),
+                time_to_complete=f'{self.rng.randint(1, 40)} hours',
+                price_range=f'${self.rng.randint(1, 10) * 10}-${self.rng.randint(11, 30) * 10}',
+                is_for_sale=self.rng.random() < 0.3,
+                is_featured=self.rng.random() < 0.02,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        return Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+
+    def image_pool(self):
+        # A few real JPEGs shared by every synthetic PostImage; process_images renders them on demand
+        # Colours come from their own generator, so files left by an earlier run do not shift self.rng
+        palette = random.Random(self.seed)
+        names = []
+        for index in range(IMAGE_POOL_SIZE):
+            name = f'posts/synthetic/{index:02d}.jpg'
+            colour = tuple(palette.randint(40, 220) for _ in range(3))
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', (1200, 900), colour).save(buffer, 'JPEG', quality=80)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+            names.append(name)
+        return names
+
+    def create_images(self, posts, mean):
+        pool = None
+        images = []
+        for post in posts:
+            for order in range(self.power_count(mean, MAX_IMAGES_PER_POST)):
+                # The files are only written once some post gets an image
+                pool = pool or self.image_pool()
+                images.append(PostImage(
+                    post=post, image=self.rng.choice(pool), order=order, width=1200, height=900,
+                    alt_text=post.title, created_at=post.created_at,
+                ))
+        PostImage.objects.bulk_create(images, batch_size=BATCH_SIZE)
+        return len(images)
+
+    def create_interactions(self, model, user_field, posts, activity, mean):
+        rows = []
+        for post in posts:
+            users = activity.sample(self.power_count(mean, len(activity.items)))
+            for user_id in users:
+                # Interactions trail the post, mostly within the first day
+                created_at = min(self.now, post.created_at + timedelta(hours=self.rng.expovariate(1 / 12)))
+                row = model(post=post, created_at=created_at, **{f'{user_field}_id': user_id})
+                if model is Comment:
+                    row.content = self.text(self.rng.randint(3, 25))
+                    row.updated_at = created_at
+                rows.append(row)
+        model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        return len(rows)
\ No newline at end of file
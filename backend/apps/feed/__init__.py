@@ -0,0 +1 @@
+# Feed app
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from social_backend.admin import LargeTableAdmin
+from .models import FeedEntry
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(LargeTableAdmin):
+    list_display = ('owner', 'post', 'author', 'created_at')
+    list_select_related = ('owner', 'post', 'author')
+    search_fields = ('owner__username',)
+    raw_id_fields = ('owner', 'post', 'author')
+    # Newest first through the primary key; there is no index on created_at alone
+    ordering = ('-id',)
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from apps.posts.models import Post
+from apps.users.models import Follow, User
+from social_backend.pagination import DEFAULT_ORDERING, decode_cursor, seek_filter
+from social_backend.pubsub import publish
+from .models import FeedEntry
+
+FEED_ORDERING = ('-created_at', '-post_id')
+HIGH_FANOUT_CACHE_KEY = 'feed:high-fanout-authors'
+
+def high_fanout_author_ids():
+    """Authors whose posts are pulled on read rather than copied into every follower's feed."""
+    author_ids = cache.get(HIGH_FANOUT_CACHE_KEY)
+    if author_ids is None:
+        # Stored counters, so this is a range scan on the followers_count index
+        author_ids = set(
+            User.objects.filter(followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS)
+            .values_list('pk', flat=True)
+        )
+        cache.set(HIGH_FANOUT_CACHE_KEY, author_ids, settings.FEED_HIGH_FANOUT_CACHE_SECONDS)
+    return author_ids
+
+def author_topic(author_id):
+    """Topic of an author's new posts; feedUpdated listens to every followed author's."""
+    return f'author:{author_id}'
+
+def _entry(owner_id, post):
+    return FeedEntry(owner_id=owner_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at)
+
+def fan_out_posts(posts, batch_size=1000):
+    """Copy new posts into their authors' and followers' feeds. Returns the number of entries written."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    FeedEntry.objects.bulk_create(
+        [_entry(post.author_id, post) for post in posts], ignore_conflicts=True, batch_size=batch_size
+    )
+    written = len(posts)
+    pulled = high_fanout_author_ids()
+
+    batch = []
+    for author_id, author_posts in by_author.items():
+        if author_id in pulled:
+            continue
+        follower_ids = (Follow.objects.filter(following_id=author_id)
+                        .values_list('follower_id', flat=True)
+                        .iterator(chunk_size=batch_size))
+        for follower_id in follower_ids:
+            batch.extend(_entry(follower_id, post) for post in author_posts)
+            if len(batch) >= batch_size:
+                FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                written += len(batch)
+                batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    publish((author_topic(post.author_id), {'post_id': post.pk, 'author_id': post.author_id}) for post in posts)
+    return written
+
+def fan_out_post(post, batch_size=1000):
+    """Copy a new post into its author's and followers' feeds. Returns the number of entries written."""
+    return fan_out_posts([post], batch_size)
+
+def backfill_author(owner_id, author_id, limit=None):
+    """Copy an author's most recent posts into one feed, e.g. right after a follow."""
+    posts = (Post.objects.filter(author_id=author_id)
+             .order_by(*DEFAULT_ORDERING)
+             .only('id', 'author_id', 'created_at')[:limit or settings.FEED_BACKFILL_PER_AUTHOR])
+    FeedEntry.objects.bulk_create([_entry(owner_id, post) for post in posts], ignore_conflicts=True)
+
+def remove_author(owner_id, author_id):
+    FeedEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+def trim_feed(owner_id, keep=None):
+    """Drop everything older than the newest `keep` entries of a feed."""
+    keep = keep or settings.FEED_MAX_ENTRIES
+    boundary = list(
+        FeedEntry.objects.filter(owner_id=owner_id)
+        .order_by(*FEED_ORDERING)
+        .values_list('created_at', 'post_id')[keep - 1:keep]
+    )
+    if not boundary:
+        return 0
+    deleted, _ = FeedEntry.objects.filter(owner_id=owner_id).filter(
+        seek_filter(FEED_ORDERING, boundary[0])
+    ).delete()
+    return deleted
+
+def rebuild_feed(owner_id):
+    FeedEntry.objects.filter(owner_id=owner_id).delete()
+    backfill_author(owner_id, owner_id)
+    pulled = high_fanout_author_ids()
+    following = Follow.objects.filter(follower_id=owner_id).values_list('following_id', flat=True)
+    for author_id in following.iterator():
+        if author_id not in pulled:
+            backfill_author(owner_id, author_id)
+    return trim_feed(owner_id)
+
+def _home_feed_querysets(user, limit, after, pulled):
+    values = decode_cursor(after, Post, DEFAULT_ORDERING) if after else None
+
+    entries = FeedEntry.objects.filter(owner=user).select_related('post__author', 'post__craft_category')
+    if values:
+        entries = entries.filter(seek_filter(FEED_ORDERING, values))
+    entries = entries.order_by(*FEED_ORDERING)[:limit + 1]
+
+    recent = None
+    if pulled:
+        followed = Follow.objects.filter(follower=user, following_id__in=pulled).values('following_id')
+        recent = Post.objects.filter(author_id__in=followed).select_related('author', 'craft_category')
+        if values:
+            recent = recent.filter(seek_filter(DEFAULT_ORDERING, values))
+        recent = recent.order_by(*DEFAULT_ORDERING)[:limit + 1]
+    return entries, recent
+
+def _merge_pulled(posts, pulled_posts, limit):
+    if pulled_posts:
+        merged = {post.pk: post for post in pulled_posts}
+        merged.update((post.pk, post) for post in posts)
+        posts = sorted(merged.values(), key=lambda post: (post.created_at, post.pk), reverse=True)
+    return posts[:limit + 1]
+
+def read_home_feed(user, limit, after=None):
+    """
+    Return up to `limit + 1` posts for the user's home feed, newest first.
+    Materialized entries are one range scan; followed high-fanout authors are merged in on read.
+    """
+    entries, recent = _home_feed_querysets(user, limit, after, high_fanout_author_ids())
+    posts = [entry.post for entry in entries]
+    return _merge_pulled(posts, list(recent) if recent is not None else [], limit)
+
+async def aread_home_feed(user, limit, after=None):
+    """read_home_feed through the async ORM, for the ASGI view."""
+    pulled = await sync_to_async(high_fanout_author_ids)()
+    entries, recent = _home_feed_querysets(user, limit, after, pulled)
+    posts = [entry.post async for entry in entries]
+    return _merge_pulled(posts, [post async for post in recent] if recent is not None else [], limit)
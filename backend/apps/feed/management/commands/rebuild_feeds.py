@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.feed.fanout import rebuild_feed
+from apps.users.models import User
+
+class Command(BaseCommand):
+    help = "Rebuild home feeds from the follow graph (all users unless --user is given)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="User id, repeatable")
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            rebuild_feed(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} feed(s)"))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from apps.feed.fanout import trim_feed
+from apps.feed.models import FeedEntry
+
+class Command(BaseCommand):
+    help = "Trim home feeds that grew past FEED_MAX_ENTRIES"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=settings.FEED_MAX_ENTRIES, help="Entries to keep per feed")
+    
+    def handle(self, *args, **options):
+        keep = options['keep']
+        oversized = (FeedEntry.objects.order_by()
+                     .values('owner')
+                     .annotate(total=Count('id'))
+                     .filter(total__gt=keep)
+                     .values_list('owner', flat=True))
+        deleted = sum(trim_feed(owner_id, keep) for owner_id in oversized)
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} feed entries"))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0002_post_engagement_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.post')),
+            ],
+            options={
+                'verbose_name_plural': 'Feed Entries',
+                'indexes': [models.Index(fields=['owner', '-created_at', '-post'], name='feed_feeden_owner_i_04785b_idx'), models.Index(fields=['owner', 'author'], name='feed_feeden_owner_i_ed12af_idx')],
+                'unique_together': {('owner', 'post')},
+            },
+        ),
+    ]
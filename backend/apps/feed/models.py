@@ -0,0 +1,21 @@
+from django.db import models
+from django.conf import settings
+
+class FeedEntry(models.Model):
+    """A post materialized into one follower's home feed by fan-out on write."""
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='feed_entries')
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    # Copied from the post so a feed page is a range scan on (owner, -created_at, -post)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name_plural = "Feed Entries"
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post']),
+            models.Index(fields=['owner', 'author']),
+        ]
+    
+    def __str__(self):
+        return f"Post {self.post_id} in feed of {self.owner_id}"
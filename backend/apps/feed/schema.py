@@ -0,0 +1,59 @@
+import graphene
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError
+from apps.posts.loaders import prime_posts
+from apps.posts.models import Post
+from apps.posts.schema import PostConnection, PostType
+from apps.users.models import Follow
+from social_backend.pagination import DEFAULT_ORDERING, connection_from_nodes, resolve_limit
+from social_backend.execution import is_async, then
+from social_backend.pubsub import subscribe
+from .fanout import aread_home_feed, author_topic, read_home_feed
+
+class FeedQuery(graphene.ObjectType):
+    home_feed = graphene.Field(PostConnection, first=graphene.Int(), after=graphene.String())
+    
+    def resolve_home_feed(self, info, first=None, after=None):
+        user = info.context.user
+        if not user.is_authenticated:
+            return None
+        
+        limit = resolve_limit(first, max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+        
+        def connection(posts):
+            return connection_from_nodes(
+                PostConnection,
+                prime_posts(info, posts[:limit]),
+                DEFAULT_ORDERING,
+                has_previous_page=bool(after),
+                has_next_page=len(posts) > limit,
+            )
+        
+        if is_async(info):
+            return then(aread_home_feed(user, limit, after), connection)
+        return connection(read_home_feed(user, limit, after))
+
+
+class FeedUpdate(graphene.ObjectType):
+    """A new post in the viewer's home feed."""
+    post_id = graphene.ID(required=True)
+    author_id = graphene.ID(required=True)
+    post = graphene.Field(PostType)
+    
+    async def resolve_post(event, info):
+        return await (Post.objects.select_related('author', 'craft_category')
+                      .filter(pk=event['post_id']).afirst())
+
+class FeedSubscription(graphene.ObjectType):
+    feed_updated = graphene.Field(FeedUpdate)
+    
+    async def subscribe_feed_updated(root, info):
+        user = info.context.user
+        if not user.is_authenticated:
+            raise GraphQLError("Authentication required")
+        
+        # Follows made after subscribing are picked up when the client resubscribes
+        following = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
+        author_ids = [user.pk, *[author_id async for author_id in following]]
+        async for event in subscribe(author_topic(author_id) for author_id in author_ids):
+            yield event
\ No newline at end of file
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import Follow
+from .fanout import backfill_author, high_fanout_author_ids, remove_author
+
+@receiver(post_save, sender=Follow)
+def backfill_followed_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.following_id not in high_fanout_author_ids():
+        backfill_author(instance.follower_id, instance.following_id)
+
+@receiver(post_delete, sender=Follow)
+def remove_unfollowed_author(sender, instance, **kwargs):
+    remove_author(instance.follower_id, instance.following_id)
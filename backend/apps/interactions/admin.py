@@ -1,19 +1,26 @@
 from django.contrib import admin
+from social_backend.admin import LargeTableAdmin
 from .models import Like, Comment, Share
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(LargeTableAdmin):
     list_display = ('user', 'post', 'created_at')
+    list_select_related = ('user', 'post')
     list_filter = ('created_at',)
-    search_fields = ('user__username', 'post__content')
-    ordering = ('-created_at',)
+    # A username or a post id
+    search_fields = ('user__username', 'post')
+    raw_id_fields = ('user', 'post')
+    # Newest first through the primary key; there is no index on created_at alone
+    ordering = ('-id',)
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('author', 'post', 'content_preview', 'created_at')
-    list_filter = ('created_at', 'author')
-    search_fields = ('content', 'author__username', 'post__content')
-    ordering = ('-created_at',)
+    list_select_related = ('author', 'post')
+    list_filter = ('created_at',)
+    search_fields = ('author__username', 'post', 'id')
+    raw_id_fields = ('author', 'post')
+    ordering = ('-id',)
     readonly_fields = ('created_at', 'updated_at')
     
     def content_preview(self, obj):
@@ -21,8 +28,10 @@ class CommentAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content'
 
 @admin.register(Share)
-class ShareAdmin(admin.ModelAdmin):
+class ShareAdmin(LargeTableAdmin):
     list_display = ('user', 'post', 'created_at')
+    list_select_related = ('user', 'post')
     list_filter = ('created_at',)
-    search_fields = ('user__username', 'post__content')
-    ordering = ('-created_at',)
\ No newline at end of file
+    search_fields = ('user__username', 'post')
+    raw_id_fields = ('user', 'post')
+    ordering = ('-id',)
\ No newline at end of file
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class InteractionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.interactions'
\ No newline at end of file
+    name = 'apps.interactions'
+    
+    def ready(self):
+        from . import signals, events  # noqa: F401
\ No newline at end of file
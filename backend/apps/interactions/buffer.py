@@ -0,0 +1,266 @@
+"""
+Optional write-behind buffer for like/share taps (INTERACTION_BUFFER).
+
+Each tap stores the user's intended end state per (kind, post) together with the
+state the database had when the first buffered tap arrived, so a like followed by
+an unlike collapses to nothing. A background flusher drains the buffer every
+INTERACTION_FLUSH_INTERVAL seconds and applies it with bulk INSERT / DELETE,
+then moves each post's counter by the rows those statements actually wrote.
+Until then the acting user's own reads overlay their pending intents, so they
+always see their own taps.
+
+'memory' keeps intents per process; 'cache' keeps them in CACHES so every worker
+(and the flush_interactions command) shares one buffer.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.posts.counters import adjust_post_counters
+from apps.posts.models import Post
+from social_backend.background import PeriodicJob
+from .models import Like, Share
+from .signals import COUNTER_FIELDS
+from .toggles import InteractionResult, interaction_changed
+
+KINDS = {
+    'like': Like,
+    'share': Share,
+}
+MODEL_KINDS = {model: kind for kind, model in KINDS.items()}
+# Rows per INSERT, within SQLite's 999 parameter limit
+INSERT_BATCH_SIZE = 300
+
+class MemoryIntentBuffer:
+    def __init__(self):
+        self._intents = {}
+        self._lock = threading.RLock()
+
+    def user_intents(self, user_id):
+        with self._lock:
+            return dict(self._intents.get(user_id, {}))
+
+    def update(self, user_id, apply):
+        with self._lock:
+            intents = self._intents.setdefault(user_id, {})
+            result = apply(intents)
+            if not intents:
+                del self._intents[user_id]
+            return result
+
+    def drain(self):
+        with self._lock:
+            drained, self._intents = self._intents, {}
+        return drained
+
+class CacheIntentBuffer:
+    """
+    Intents live under one cache key per user. Dirty users are appended to a log
+    of numbered slots (cache.incr), which the flusher reads up to the last slot.
+    """
+
+    prefix = 'interactions:buffer:'
+    lock_timeout = 5
+
+    def _user_key(self, user_id):
+        return f'{self.prefix}user:{user_id}'
+
+    def _slot_key(self, slot):
+        return f'{self.prefix}slot:{slot}'
+
+    @contextmanager
+    def _locked(self, name):
+        key = f'{self.prefix}lock:{name}'
+        # The lock key expires on its own if a holder dies
+        while not cache.add(key, 1, self.lock_timeout):
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            cache.delete(key)
+
+    def user_intents(self, user_id):
+        return cache.get(self._user_key(user_id)) or {}
+
+    def update(self, user_id, apply):
+        with self._locked(f'user:{user_id}'):
+            intents = cache.get(self._user_key(user_id)) or {}
+            result = apply(intents)
+            if intents:
+                cache.set(self._user_key(user_id), intents, None)
+                cache.add(self.prefix + 'seq', 0, None)
+                cache.set(self._slot_key(cache.incr(self.prefix + 'seq')), user_id, None)
+            else:
+                cache.delete(self._user_key(user_id))
+        return result
+
+    def drain(self):
+        with self._locked('flush'):
+            start = cache.get(self.prefix + 'flushed', 0)
+            end = cache.get(self.prefix + 'seq', 0)
+            keys = [self._slot_key(slot) for slot in range(start + 1, end + 1)]
+            slots = cache.get_many(keys)
+            user_ids = set()
+            for slot, key in enumerate(keys, start + 1):
+                if key not in slots:
+                    # Claimed by a writer that has not stored its user yet; retry from
+                    # here next time, unless it was already missing on the last drain
+                    if cache.get(self.prefix + 'gap') != slot:
+                        cache.set(self.prefix + 'gap', slot, None)
+                        end = slot - 1
+                        break
+                    continue
+                user_ids.add(slots[key])
+            cache.set(self.prefix + 'flushed', end, None)
+            cache.delete_many(keys[:end - start])
+
+            drained = {}
+            for user_id in user_ids:
+                with self._locked(f'user:{user_id}'):
+                    intents = cache.get(self._user_key(user_id))
+                    cache.delete(self._user_key(user_id))
+                if intents:
+                    drained[user_id] = intents
+        return drained
+
+BUFFERS = {
+    'memory': MemoryIntentBuffer,
+    'cache': CacheIntentBuffer,
+}
+
+_buffer = None
+
+def get_buffer():
+    global _buffer
+    if not settings.INTERACTION_BUFFER:
+        return None
+    if _buffer is None:
+        _buffer = BUFFERS[settings.INTERACTION_BUFFER]()
+    return _buffer
+
+def pending_interactions(user_id):
+    """The user's unflushed intents: {(kind, post_id): (state, stored_state)}."""
+    buffer = get_buffer()
+    if buffer is None:
+        return {}
+    return buffer.user_intents(user_id)
+
+def record(model, user_id, post_id, present=None):
+    """
+    Buffer a like/share tap; present=None toggles. Returns (result, state). The
+    result carries the stored counters: the acting user's pending intents are
+    added on read, like for any later query of theirs.
+    """
+    counters = Post.objects.filter(pk=post_id).values_list(*Post.COUNTER_FIELDS).first()
+    if counters is None:
+        return InteractionResult(post_id, False, None), False
+    key = (MODEL_KINDS[model], post_id)
+
+    def apply(intents):
+        if key in intents:
+            state, stored = intents[key]
+        else:
+            state = stored = model.objects.filter(user_id=user_id, post_id=post_id).exists()
+        new_state = not state if present is None else present
+        if new_state == stored:
+            intents.pop(key, None)
+        else:
+            intents[key] = (new_state, stored)
+        return new_state, new_state != state
+
+    state, changed = get_buffer().update(user_id, apply)
+    return InteractionResult(post_id, changed, dict(zip(Post.COUNTER_FIELDS, counters))), state
+
+def _insert(cursor, model, rows):
+    """Insert (user_id, post_id) rows that do not exist yet; returns the post id of each row written."""
+    if not rows:
+        return []
+    cursor.execute(
+        f"INSERT INTO {model._meta.db_table} (user_id, post_id, created_at) "
+        # PostgreSQL before 16 requires the alias; both backends name VALUES columns column1, column2
+        f"SELECT v.column1, v.column2, %s FROM (VALUES {', '.join(['(%s, %s)'] * len(rows))}) AS v "
+        f"WHERE v.column2 IN (SELECT id FROM {Post._meta.db_table}) "
+        "ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id",
+        [timezone.now(), *(value for row in rows for value in row)],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def apply_intents(drained):
+    """Write drained intents in one transaction. Returns the number of posts touched."""
+    added = defaultdict(list)
+    removed = defaultdict(lambda: defaultdict(list))
+    for user_id, intents in drained.items():
+        for (kind, post_id), (state, stored) in intents.items():
+            if state:
+                added[kind].append((user_id, post_id))
+            else:
+                removed[kind][post_id].append(user_id)
+    touched = {(kind, post_id) for kind, rows in added.items() for user_id, post_id in rows}
+    touched.update((kind, post_id) for kind, posts in removed.items() for post_id in posts)
+    post_ids = {post_id for kind, post_id in touched}
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    with transaction.atomic():
+        existing = set(Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True))
+        with connection.cursor() as cursor:
+            for kind, rows in added.items():
+                rows = [row for row in rows if row[1] in existing]
+                for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                    for post_id in _insert(cursor, KINDS[kind], rows[start:start + INSERT_BATCH_SIZE]):
+                        deltas[post_id][COUNTER_FIELDS[KINDS[kind]]] += 1
+            for kind, posts in removed.items():
+                for post_id, user_ids in posts.items():
+                    cursor.execute(
+                        f"DELETE FROM {KINDS[kind]._meta.db_table} "
+                        f"WHERE post_id = %s AND user_id IN ({', '.join(['%s'] * len(user_ids))}) RETURNING post_id",
+                        [post_id, *user_ids],
+                    )
+                    deltas[post_id][COUNTER_FIELDS[KINDS[kind]]] -= len(cursor.fetchall())
+        # Bulk writes skip the counter signals. Only the rows written move the counters, so
+        # concurrent comment and toggle increments on the same posts are never overwritten
+        for post_id, counter_deltas in deltas.items():
+            adjust_post_counters(post_id, **counter_deltas)
+        counters = {
+            row[0]: dict(zip(Post.COUNTER_FIELDS, row[1:]))
+            for row in Post.objects.filter(pk__in=existing).values_list('id', *Post.COUNTER_FIELDS)
+        }
+
+        def notify():
+            for kind, post_id in touched:
+                if post_id in counters:
+                    interaction_changed.send(
+                        sender=KINDS[kind], user_id=None, post_id=post_id, created=None, counters=counters[post_id],
+                    )
+        transaction.on_commit(notify)
+    return len(existing)
+
+def _restore(buffer, drained):
+    for user_id, intents in drained.items():
+        def apply(current, intents=intents):
+            # Taps made since the drain are newer and win
+            for key, value in intents.items():
+                current.setdefault(key, value)
+        buffer.update(user_id, apply)
+
+def flush():
+    """Apply everything buffered so far. Returns the number of posts touched."""
+    buffer = get_buffer()
+    if buffer is None:
+        return 0
+    drained = buffer.drain()
+    if not drained:
+        return 0
+    try:
+        return apply_intents(drained)
+    except Exception:
+        _restore(buffer, drained)
+        raise
+
+# Taps this process still holds are written on a clean shutdown
+flusher = PeriodicJob(
+    'interaction-flusher', flush, 'INTERACTION_FLUSH_INTERVAL', enabled_setting='INTERACTION_BUFFER', run_at_exit=True,
+)
@@ -0,0 +1,60 @@
+"""
+Live events for the postUpdated and newComment subscriptions.
+
+postUpdated payloads carry only the counters that changed, e.g.
+{'post_id': 1, 'likes_count': 12}.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.posts.models import Post
+from apps.users.models import User
+from social_backend.pubsub import publish
+from .models import Like, Comment, Share
+from .signals import COUNTER_FIELDS, origin_model
+from .toggles import interaction_changed
+
+def post_topic(post_id):
+    return f'post:{post_id}'
+
+def comments_topic(post_id):
+    return f'comments:{post_id}'
+
+def counters_event(post_id, **counters):
+    return post_topic(post_id), {'post_id': post_id, **counters}
+
+@receiver(interaction_changed)
+def publish_interaction(sender, post_id, counters, **kwargs):
+    # Already sent after commit, with the counters the write returned
+    field = COUNTER_FIELDS[sender]
+    publish([counters_event(post_id, **{field: counters[field]})])
+
+def _publish_counter(sender, post_id, events=()):
+    field = COUNTER_FIELDS[sender]
+
+    def send():
+        value = Post.objects.filter(pk=post_id).values_list(field, flat=True).first()
+        if value is not None:
+            publish([counters_event(post_id, **{field: value}), *events])
+    transaction.on_commit(send, robust=True)
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Share)
+def publish_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    events = []
+    if sender is Comment:
+        events.append((comments_topic(instance.post_id), {'comment_id': instance.pk, 'post_id': instance.post_id}))
+    _publish_counter(sender, instance.post_id, events)
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Share)
+def publish_deleted(sender, instance, origin=None, **kwargs):
+    # Nobody needs counters of a post that is being deleted, and a deleted user's
+    # interactions would publish one event per row
+    if origin_model(origin) in (Post, User):
+        return
+    _publish_counter(sender, instance.post_id)
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.interactions.buffer import flush
+
+class Command(BaseCommand):
+    help = "Apply buffered like/share taps now (INTERACTION_BUFFER=cache; a memory buffer only lives in its own process)"
+    
+    def handle(self, *args, **options):
+        if not settings.INTERACTION_BUFFER:
+            self.stdout.write("INTERACTION_BUFFER is not enabled; nothing to flush")
+            return
+        touched = flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed buffered interactions for {touched} post(s)"))
@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-18 19:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0001_initial'),
+        ('posts', '0005_trending_scores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'post'], name='interaction_author__a85a59_idx'),
+        ),
+    ]
@@ -14,7 +14,7 @@ class Like(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.username} likes {self.post.id}"
+        return f"User {self.user_id} likes post {self.post_id}"
 
 class Comment(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
@@ -28,10 +28,12 @@ class Comment(models.Model):
         indexes = [
             models.Index(fields=['post', '-created_at']),
             models.Index(fields=['author', '-created_at']),
+            # Answers "has the viewer commented on these posts" from the index alone
+            models.Index(fields=['author', 'post']),
         ]
     
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.post.id}"
+        return f"Comment by user {self.author_id} on post {self.post_id}"
 
 class Share(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_shares')
@@ -46,4 +48,4 @@ class Share(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.username} shares {self.post.id}"
\ No newline at end of file
+        return f"User {self.user_id} shares post {self.post_id}"
\ No newline at end of file
@@ -1,13 +1,32 @@
 import graphene
+from graphene import relay
 from graphene_django import DjangoObjectType
-from django.db import IntegrityError
+from django.conf import settings
+from django.db import transaction
+from graphql import GraphQLError
+from . import buffer
+from .events import comments_topic, post_topic
 from .models import Like, Comment, Share
+from .toggles import add_interaction, remove_interaction, toggle_like
+from apps.posts.loaders import get_loaders
+from social_backend.execution import sync_resolver
+from social_backend.pubsub import subscribe
 from apps.posts.models import Post
 
 class CommentType(DjangoObjectType):
     class Meta:
         model = Comment
         fields = ('id', 'content', 'author', 'post', 'created_at', 'updated_at')
+    
+    @sync_resolver
+    def resolve_post(self, info):
+        return self.post
+
+class CommentConnection(relay.Connection):
+    total_count = graphene.Int()
+    
+    class Meta:
+        node = CommentType
 
 class LikeType(DjangoObjectType):
     class Meta:
@@ -19,6 +38,46 @@ class ShareType(DjangoObjectType):
         model = Share
         fields = ('id', 'user', 'post', 'created_at')
 
+def _parse_post_id(post_id):
+    try:
+        return int(post_id)
+    except (TypeError, ValueError):
+        return None
+
+def _require_post_id(post_id):
+    parsed = _parse_post_id(post_id)
+    if parsed is None:
+        raise GraphQLError(f"Invalid post id: {post_id}")
+    return parsed
+
+def _remember(info, name, post_id, value):
+    # Later fields of this response see the viewer's new state
+    loader = getattr(get_loaders(info), name)
+    if loader is not None:
+        loader.set(post_id, value)
+
+# PostType fields a mutation payload can read without loading the post row
+PAYLOAD_COUNTER_FIELDS = {'__typename', 'id', 'likesCount', 'commentsCount', 'sharesCount', 'isLiked', 'viewerState'}
+
+def _payload_post(info, result):
+    # The frontend's taps only read counters and the viewer's state; anything else loads the post once
+    selections = []
+    for node in info.field_nodes:
+        for field in node.selection_set.selections:
+            if getattr(field, 'name', None) and field.name.value == 'post' and field.selection_set:
+                selections.extend(field.selection_set.selections)
+    counters_only = all(getattr(field, 'name', None) and field.name.value in PAYLOAD_COUNTER_FIELDS
+                        for field in selections)
+    return result.post(counters_only=counters_only)
+
+def _buffer_tap(info, model, user, post_id, present=None):
+    result, state = buffer.record(model, user.pk, post_id, present)
+    # Read-your-own-writes: the rest of this response overlays the new intent too
+    pending = get_loaders(info).pending_interactions
+    pending.clear()
+    pending.update(buffer.pending_interactions(user.pk))
+    return result, state
+
 class LikePost(graphene.Mutation):
     class Arguments:
         post_id = graphene.ID(required=True)
@@ -28,20 +87,19 @@ class LikePost(graphene.Mutation):
     
     def mutate(self, info, post_id):
         user = info.context.user
-        if not user.is_authenticated:
+        post_id = _parse_post_id(post_id)
+        if not user.is_authenticated or post_id is None:
             return LikePost(success=False, post=None)
         
-        try:
-            post = Post.objects.get(pk=post_id)
-            like, created = Like.objects.get_or_create(user=user, post=post)
-            
-            if not created:
-                # Already liked, so unlike
-                like.delete()
-            
-            return LikePost(success=True, post=post)
-        except Post.DoesNotExist:
+        # Likes, or unlikes if already liked
+        if settings.INTERACTION_BUFFER:
+            result, liked = _buffer_tap(info, Like, user, post_id)
+        else:
+            result, liked = toggle_like(user.pk, post_id)
+        if not result.post_exists:
             return LikePost(success=False, post=None)
+        _remember(info, 'is_liked', post_id, liked)
+        return LikePost(success=True, post=_payload_post(info, result))
 
 class UnlikePost(graphene.Mutation):
     class Arguments:
@@ -52,15 +110,18 @@ class UnlikePost(graphene.Mutation):
     
     def mutate(self, info, post_id):
         user = info.context.user
-        if not user.is_authenticated:
+        post_id = _parse_post_id(post_id)
+        if not user.is_authenticated or post_id is None:
             return UnlikePost(success=False, post=None)
         
-        try:
-            post = Post.objects.get(pk=post_id)
-            Like.objects.filter(user=user, post=post).delete()
-            return UnlikePost(success=True, post=post)
-        except Post.DoesNotExist:
+        if settings.INTERACTION_BUFFER:
+            result = _buffer_tap(info, Like, user, post_id, present=False)[0]
+        else:
+            result = remove_interaction(Like, user.pk, post_id)
+        if not result.post_exists:
             return UnlikePost(success=False, post=None)
+        _remember(info, 'is_liked', post_id, False)
+        return UnlikePost(success=True, post=_payload_post(info, result))
 
 class CreateComment(graphene.Mutation):
     class Arguments:
@@ -76,12 +137,15 @@ class CreateComment(graphene.Mutation):
             return CreateComment(success=False, comment=None)
         
         try:
-            post = Post.objects.get(pk=post_id)
-            comment = Comment.objects.create(
-                author=user,
-                post=post,
-                content=content
-            )
+            with transaction.atomic():
+                post = Post.objects.get(pk=post_id)
+                comment = Comment.objects.create(
+                    author=user,
+                    post=post,
+                    content=content
+                )
+                post.refresh_from_db(fields=['comments_count'])
+            _remember(info, 'has_commented', post.pk, True)
             return CreateComment(success=True, comment=comment)
         except Post.DoesNotExist:
             return CreateComment(success=False, comment=None)
@@ -95,21 +159,44 @@ class SharePost(graphene.Mutation):
     
     def mutate(self, info, post_id):
         user = info.context.user
-        if not user.is_authenticated:
+        post_id = _parse_post_id(post_id)
+        if not user.is_authenticated or post_id is None:
             return SharePost(success=False, post=None)
         
-        try:
-            post = Post.objects.get(pk=post_id)
-            share, created = Share.objects.get_or_create(user=user, post=post)
-            return SharePost(success=True, post=post)
-        except Post.DoesNotExist:
+        # Sharing twice is a no-op
+        if settings.INTERACTION_BUFFER:
+            result = _buffer_tap(info, Share, user, post_id, present=True)[0]
+        else:
+            result = add_interaction(Share, user.pk, post_id)
+        if not result.post_exists:
             return SharePost(success=False, post=None)
-        except IntegrityError:
-            # Already shared
-            return SharePost(success=True, post=post)
+        _remember(info, 'is_shared', post_id, True)
+        return SharePost(success=True, post=_payload_post(info, result))
 
 class InteractionMutation(graphene.ObjectType):
     like_post = LikePost.Field()
     unlike_post = UnlikePost.Field()
     create_comment = CreateComment.Field()
-    share_post = SharePost.Field()
\ No newline at end of file
+    share_post = SharePost.Field()
+
+class PostCounters(graphene.ObjectType):
+    """The counters of a post that changed; the others are null."""
+    post_id = graphene.ID(required=True)
+    likes_count = graphene.Int()
+    comments_count = graphene.Int()
+    shares_count = graphene.Int()
+
+class InteractionSubscription(graphene.ObjectType):
+    post_updated = graphene.Field(PostCounters, post_id=graphene.ID(required=True))
+    new_comment = graphene.Field(CommentType, post_id=graphene.ID(required=True))
+    
+    async def subscribe_post_updated(root, info, post_id):
+        async for counters in subscribe([post_topic(_require_post_id(post_id))]):
+            yield counters
+    
+    async def subscribe_new_comment(root, info, post_id):
+        async for event in subscribe([comments_topic(_require_post_id(post_id))]):
+            yield event
+    
+    async def resolve_new_comment(event, info, post_id):
+        return await Comment.objects.select_related('author').filter(pk=event['comment_id']).afirst()
\ No newline at end of file
@@ -0,0 +1,55 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_delete, post_save, post_delete
+from django.dispatch import receiver
+from apps.posts.counters import adjust_post_counters, rebuild_counters
+from apps.posts.models import Post
+from apps.users.models import User
+from .models import Like, Comment, Share
+
+COUNTER_FIELDS = {
+    Like: 'likes_count',
+    Comment: 'comments_count',
+    Share: 'shares_count',
+}
+# The user each interaction belongs to
+OWNER_FIELDS = {
+    Like: 'user',
+    Comment: 'author',
+    Share: 'user',
+}
+
+def origin_model(origin):
+    """The model a delete started from; `origin` is the instance or queryset deleted."""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Share)
+def increment_post_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_post_counters(instance.post_id, **{COUNTER_FIELDS[sender]: 1})
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Share)
+def decrement_post_counter(sender, instance, origin=None, **kwargs):
+    # A deleted post needs no counters, and a deleted user's posts are recounted once
+    # by rebuild_after_user_delete instead of one UPDATE per row
+    if origin_model(origin) in (Post, User):
+        return
+    adjust_post_counters(instance.post_id, **{COUNTER_FIELDS[sender]: -1})
+
+@receiver(pre_delete, sender=User)
+def collect_user_interactions(sender, instance, **kwargs):
+    # The user's own posts go with them; only other posts need recounting
+    post_ids = set()
+    for model, owner in OWNER_FIELDS.items():
+        rows = model.objects.filter(**{owner: instance}).exclude(post__author=instance)
+        post_ids.update(rows.order_by().values_list('post_id', flat=True).distinct())
+    instance._interacted_post_ids = post_ids
+
+@receiver(post_delete, sender=User)
+def rebuild_after_user_delete(sender, instance, **kwargs):
+    post_ids = getattr(instance, '_interacted_post_ids', None)
+    if post_ids:
+        rebuild_counters(Post.objects.filter(pk__in=post_ids))
\ No newline at end of file
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.posts.counters import drifted_posts
+from apps.posts.models import Post
+from apps.users.models import User
+from .buffer import flush, get_buffer, record
+from .models import Comment, Like, Share
+from .toggles import add_interaction, remove_interaction, toggle_like
+
+class ConcurrentToggleTests(TransactionTestCase):
+    """
+    Double taps from one user on one post, from several threads at once, must
+    never trip the unique constraint and must leave the counters exact.
+    """
+
+    users = 3
+    threads_per_user = 4
+    taps = 25
+
+    def setUp(self):
+        author = User.objects.create_user(username='author', email='author@example.com')
+        self.post = Post.objects.create(author=author, title='Quilt', content='Log cabin')
+        self.user_ids = [
+            User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com').pk
+            for n in range(self.users)
+        ]
+
+    def write(self, action):
+        # SQLite allows one writer at a time and reports the others as locked; retry those
+        for attempt in range(100):
+            try:
+                return action()
+            except OperationalError:
+                if connection.vendor != 'sqlite' or attempt == 99:
+                    raise
+                time.sleep(0.001)
+
+    def tap(self, user_id, seed, start, errors):
+        choices = random.Random(seed)
+        post_id = self.post.pk
+        actions = (
+            lambda: toggle_like(user_id, post_id),
+            lambda: add_interaction(Like, user_id, post_id),
+            lambda: add_interaction(Share, user_id, post_id),
+            lambda: remove_interaction(Share, user_id, post_id),
+        )
+        start.wait()
+        try:
+            for _ in range(self.taps):
+                self.write(choices.choice(actions))
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_counters_match_rows_after_concurrent_toggles(self):
+        workers = [
+            (user_id, index * self.threads_per_user + copy)
+            for index, user_id in enumerate(self.user_ids)
+            for copy in range(self.threads_per_user)
+        ]
+        start = threading.Barrier(len(workers))
+        errors = []
+        threads = [threading.Thread(target=self.tap, args=(*worker, start, errors)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # An IntegrityError here means two writers raced on the same (user, post) row
+        self.assertEqual(errors, [])
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.likes_count, Like.objects.filter(post=post).count())
+        self.assertEqual(post.shares_count, Share.objects.filter(post=post).count())
+        self.assertFalse(drifted_posts(Post.objects.filter(pk=post.pk)).exists())
+
+@override_settings(INTERACTION_BUFFER='memory')
+class BufferFlushTests(TestCase):
+    def setUp(self):
+        # The memory buffer lives for the whole process; start each test empty
+        get_buffer().drain()
+        author = User.objects.create_user(username='author', email='author@example.com')
+        self.users = [
+            User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com') for n in range(3)
+        ]
+        self.post = Post.objects.create(author=author, title='Quilt', content='Log cabin')
+        Like.objects.create(user=self.users[2], post=self.post)
+        Comment.objects.create(author=self.users[0], post=self.post, content='Lovely')
+
+    def test_flush_writes_rows_and_moves_counters(self):
+        record(Like, self.users[0].pk, self.post.pk)
+        record(Like, self.users[1].pk, self.post.pk)
+        record(Share, self.users[1].pk, self.post.pk)
+        record(Like, self.users[2].pk, self.post.pk, present=False)
+        # Taps that cancel out write nothing
+        record(Share, self.users[0].pk, self.post.pk)
+        record(Share, self.users[0].pk, self.post.pk)
+
+        self.assertEqual(flush(), 1)
+
+        self.assertEqual(
+            set(Like.objects.filter(post=self.post).values_list('user_id', flat=True)),
+            {self.users[0].pk, self.users[1].pk},
+        )
+        self.assertEqual(
+            list(Share.objects.filter(post=self.post).values_list('user_id', flat=True)), [self.users[1].pk]
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.likes_count, post.comments_count, post.shares_count), (2, 1, 1))
+        self.assertEqual(flush(), 0)
+
+    def test_flush_skips_rows_that_already_exist(self):
+        record(Like, self.users[0].pk, self.post.pk, present=True)
+        Like.objects.create(user=self.users[0], post=self.post)
+
+        flush()
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.likes_count, Like.objects.filter(post=self.post).count())
+        self.assertFalse(drifted_posts(Post.objects.filter(pk=post.pk)).exists())
+
+class CascadeCounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com')
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com')
+        self.posts = [
+            Post.objects.create(author=self.author, title=f'Quilt {n}', content='Log cabin') for n in range(3)
+        ]
+        for post in self.posts:
+            Like.objects.create(user=self.fan, post=post)
+            Comment.objects.create(author=self.fan, post=post, content='Lovely')
+        Share.objects.create(user=self.fan, post=self.posts[0])
+        Like.objects.create(user=self.author, post=self.posts[0])
+
+    def test_deleting_a_user_recounts_their_posts_in_one_update(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            self.fan.delete()
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(drifted_posts(Post.objects.all()).exists())
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).likes_count, 1)
+
+    def test_deleting_a_post_skips_counter_updates(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.posts[0].delete()
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE "posts_post"')])
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Race-free like/share writes.
+
+Each write is an INSERT ... ON CONFLICT DO NOTHING or a DELETE ... RETURNING, so
+concurrent double-taps never trip the unique constraint and the post counter
+moves by exactly the number of rows written. On PostgreSQL the write and the
+counter update run as a single statement (a data-modifying CTE); other backends
+issue them back to back in the same transaction.
+
+These writes bypass model signals, so `interaction_changed` is sent after commit
+instead.
+"""
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from apps.posts.models import Post
+from .models import Like
+from .signals import COUNTER_FIELDS
+
+interaction_changed = Signal()
+
+class InteractionResult:
+    def __init__(self, post_id, changed, counters):
+        self.post_id = post_id
+        self.changed = changed
+        self.counters = counters
+
+    @property
+    def post_exists(self):
+        return self.counters is not None
+
+    def post(self, counters_only=False):
+        """
+        The Post with its author and category in one query, carrying the counters
+        the write returned. With `counters_only` nothing is read: the Post has just
+        its id and counters, for payloads that select nothing else.
+        """
+        if counters_only:
+            names = ['id', *Post.COUNTER_FIELDS]
+            values = [self.post_id] + [self.counters[name] for name in Post.COUNTER_FIELDS]
+            return Post.from_db(connection.alias, names, values)
+        post = Post.objects.select_related('author', 'craft_category').filter(pk=self.post_id).first()
+        if post is not None:
+            for name in Post.COUNTER_FIELDS:
+                setattr(post, name, self.counters[name])
+        return post
+
+def _write_sql(model, sign):
+    if sign > 0:
+        return (
+            f"INSERT INTO {model._meta.db_table} (user_id, post_id, created_at) "
+            f"SELECT %s, id, %s FROM {Post._meta.db_table} WHERE id = %s "
+            "ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id"
+        )
+    return f"DELETE FROM {model._meta.db_table} WHERE user_id = %s AND post_id = %s RETURNING post_id"
+
+def _update_sql(model, sign, changed, returning=''):
+    counter = COUNTER_FIELDS[model]
+    if sign > 0:
+        assignment = f"{counter} = {counter} + {changed}"
+    else:
+        assignment = f"{counter} = CASE WHEN {counter} > {changed} THEN {counter} - {changed} ELSE 0 END"
+    return (
+        f"UPDATE {Post._meta.db_table} SET {assignment} WHERE id = %s "
+        f"RETURNING {', '.join(Post.COUNTER_FIELDS)}{returning}"
+    )
+
+def _params(sign, user_id, post_id):
+    if sign > 0:
+        return [user_id, timezone.now(), post_id]
+    return [user_id, post_id]
+
+def _execute(cursor, model, sign, user_id, post_id):
+    """
+    Write one interaction row and adjust the counter. Returns (changed, counters);
+    counters is None when nothing was written and the backend could not tell
+    whether the post exists.
+    """
+    params = _params(sign, user_id, post_id)
+    if connection.vendor == 'postgresql':
+        cursor.execute(
+            f"WITH changed AS ({_write_sql(model, sign)}) "
+            + _update_sql(model, sign, '(SELECT COUNT(*) FROM changed)', ', (SELECT COUNT(*) FROM changed)'),
+            [*params, post_id],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return 0, None
+        return row[-1], dict(zip(Post.COUNTER_FIELDS, row[:-1]))
+
+    cursor.execute(_write_sql(model, sign), params)
+    changed = len(cursor.fetchall())
+    if not changed:
+        return 0, None
+    cursor.execute(_update_sql(model, sign, changed), [post_id])
+    return changed, dict(zip(Post.COUNTER_FIELDS, cursor.fetchone()))
+
+def _current_counters(cursor, post_id):
+    cursor.execute(
+        f"SELECT {', '.join(Post.COUNTER_FIELDS)} FROM {Post._meta.db_table} WHERE id = %s", [post_id]
+    )
+    row = cursor.fetchone()
+    return dict(zip(Post.COUNTER_FIELDS, row)) if row else None
+
+def _finish(cursor, model, user_id, post_id, changed, counters, created):
+    if counters is None:
+        counters = _current_counters(cursor, post_id)
+    result = InteractionResult(post_id, bool(changed), counters)
+    if result.changed:
+        transaction.on_commit(lambda: interaction_changed.send(
+            sender=model, user_id=user_id, post_id=post_id, created=created, counters=result.counters,
+        ))
+    return result
+
+def add_interaction(model, user_id, post_id):
+    with transaction.atomic(), connection.cursor() as cursor:
+        changed, counters = _execute(cursor, model, 1, user_id, post_id)
+        return _finish(cursor, model, user_id, post_id, changed, counters, created=True)
+
+def remove_interaction(model, user_id, post_id):
+    with transaction.atomic(), connection.cursor() as cursor:
+        changed, counters = _execute(cursor, model, -1, user_id, post_id)
+        return _finish(cursor, model, user_id, post_id, changed, counters, created=False)
+
+def toggle_like(user_id, post_id):
+    """Like the post, or unlike it if already liked. Returns (result, liked)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        changed, counters = _execute(cursor, Like, 1, user_id, post_id)
+        if changed or (counters is None and connection.vendor == 'postgresql'):
+            result = _finish(cursor, Like, user_id, post_id, changed, counters, created=True)
+            return result, result.post_exists
+        changed, counters = _execute(cursor, Like, -1, user_id, post_id)
+        return _finish(cursor, Like, user_id, post_id, changed, counters, created=False), False
@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Post, CraftCategory
+from django.db.models import Q
+from social_backend.admin import LargeTableAdmin
+from .models import Post, CraftCategory, TrendingScore
+from .search import get_search_backend
+
+# Best full-text matches considered by one admin search
+SEARCH_LIMIT = 1000
 
 @admin.register(CraftCategory)
 class CraftCategoryAdmin(admin.ModelAdmin):
@@ -8,12 +14,15 @@ class CraftCategoryAdmin(admin.ModelAdmin):
     ordering = ('name',)
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ('title', 'author', 'craft_category', 'is_for_sale', 'is_featured', 'created_at')
+    list_select_related = ('author', 'craft_category')
     list_filter = ('craft_category', 'is_for_sale', 'is_featured', 'created_at')
-    search_fields = ('title', 'content', 'author__username', 'materials_used')
+    # Plus title, content and materials_used through the full-text index
+    search_fields = ('author__username', 'id')
     raw_id_fields = ('author',)
-    readonly_fields = ('created_at', 'updated_at')
+    autocomplete_fields = ('craft_category',)
+    readonly_fields = ('likes_count', 'comments_count', 'shares_count', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Basic Information', {
@@ -25,6 +34,9 @@ class PostAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('is_for_sale', 'is_featured')
         }),
+        ('Engagement', {
+            'fields': ('likes_count', 'comments_count', 'shares_count')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -33,4 +45,16 @@ class PostAdmin(admin.ModelAdmin):
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Content'
\ No newline at end of file
+    content_preview.short_description = 'Content'
+    
+    def search_condition(self, request, queryset, term):
+        hits = get_search_backend(queryset.db).search(term, SEARCH_LIMIT)
+        return super().search_condition(request, queryset, term) | Q(pk__in=[post_id for post_id, _ in hits])
+
+@admin.register(TrendingScore)
+class TrendingScoreAdmin(admin.ModelAdmin):
+    list_display = ('post', 'window', 'craft_category', 'score', 'last_interaction_at')
+    list_filter = ('window', 'craft_category')
+    list_select_related = ('post', 'craft_category')
+    raw_id_fields = ('post',)
+    ordering = ('window', '-score')
\ No newline at end of file
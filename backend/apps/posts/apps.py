@@ -1,5 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+SEARCH_MIGRATION = ('posts', '0003_post_search_index')
+
+def ensure_search_index(sender, using, **kwargs):
+    # SQLite table rebuilds in later migrations drop the FTS triggers; put them back
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .search import install_search_index
+    connection = connections[using]
+    if SEARCH_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        install_search_index(connection)
 
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.posts'
\ No newline at end of file
+    name = 'apps.posts'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(ensure_search_index, sender=self)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from apps.interactions.models import Like, Comment, Share
+from .models import Post
+
+COUNTER_SOURCES = {
+    'likes_count': Like,
+    'comments_count': Comment,
+    'shares_count': Share,
+}
+
+def adjust_post_counters(post_id, **deltas):
+    """Apply signed deltas, e.g. adjust_post_counters(1, likes_count=-1), as one UPDATE."""
+    values = {}
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        values[field] = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    if values:
+        Post.objects.filter(pk=post_id).update(**values)
+
+def _count_subquery(model):
+    counts = (model.objects.filter(post=OuterRef('pk'))
+              .order_by()
+              .values('post')
+              .annotate(total=Count('id'))
+              .values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+def actual_counts(queryset):
+    return queryset.annotate(**{
+        f'actual_{field}': _count_subquery(model) for field, model in COUNTER_SOURCES.items()
+    })
+
+def drifted_posts(queryset):
+    posts = actual_counts(queryset)
+    drift = None
+    for field in COUNTER_SOURCES:
+        condition = ~Q(**{field: F(f'actual_{field}')})
+        drift = condition if drift is None else drift | condition
+    return posts.filter(drift)
+
+def rebuild_counters(queryset):
+    """Recompute every counter for the queryset with a single UPDATE ... SET = (SELECT COUNT)."""
+    return queryset.update(**{
+        field: _count_subquery(model) for field, model in COUNTER_SOURCES.items()
+    })
@@ -0,0 +1,268 @@
+import asyncio
+from collections import defaultdict
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from apps.users.models import Follow, User
+from apps.interactions.buffer import pending_interactions
+from apps.interactions.models import Like, Comment, Share
+from .models import Post, PostImage, CraftCategory
+
+class BatchLoader:
+    """
+    Per-request loader. Keys primed by a list resolver are fetched together
+    with one grouped query the first time any of them is loaded.
+
+    With `is_async` set (the ASGI view), load() returns a future instead and
+    every key requested while resolvers run in the same tick is fetched in one
+    async ORM query.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._pending = set()
+        self._futures = {}
+        self._scheduled = False
+        self.is_async = False
+
+    def get_default(self):
+        return None
+
+    def get_queryset(self, keys):
+        raise NotImplementedError
+
+    def collect(self, rows, keys):
+        """Map the fetched rows to {key: value}."""
+        raise NotImplementedError
+
+    def batch_load(self, keys):
+        return self.collect(list(self.get_queryset(keys)), keys)
+
+    async def abatch_load(self, keys):
+        return self.collect([row async for row in self.get_queryset(keys)], keys)
+
+    def prime(self, keys):
+        self._pending.update(key for key in keys if key is not None and key not in self._cache)
+
+    def set(self, key, value):
+        self._pending.discard(key)
+        self._cache[key] = value
+
+    def load(self, key):
+        if key is None:
+            return self.get_default()
+        if self.is_async:
+            return self._load_async(key)
+        if key not in self._cache:
+            self._pending.add(key)
+            keys = list(self._pending)
+            self._pending.clear()
+            results = self.batch_load(keys)
+            for pending_key in keys:
+                self._cache[pending_key] = results.get(pending_key, self.get_default())
+        return self._cache[key]
+
+    def _load_async(self, key):
+        if key in self._cache:
+            return self._cache[key]
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            self._pending.add(key)
+            if not self._scheduled:
+                # Runs once the resolvers of the current tick have queued their keys
+                self._scheduled = True
+                loop.create_task(self._dispatch())
+        return future
+
+    async def _dispatch(self):
+        self._scheduled = False
+        keys = list(self._pending)
+        self._pending.clear()
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for key in keys:
+            # Primed keys nobody awaited yet get a future too, so later loads share this batch
+            if key not in self._futures:
+                self._futures[key] = loop.create_future()
+            futures[key] = self._futures[key]
+        try:
+            results = await self.abatch_load(keys)
+        except Exception as error:
+            for key, future in futures.items():
+                self._futures.pop(key, None)
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for key, future in futures.items():
+            self._futures.pop(key, None)
+            self._cache[key] = results.get(key, self.get_default())
+            if not future.done():
+                future.set_result(self._cache[key])
+
+class ModelLoader(BatchLoader):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def get_queryset(self, keys):
+        return self.model.objects.filter(pk__in=keys)
+
+    def collect(self, rows, keys):
+        return {row.pk: row for row in rows}
+
+class ViewerInteractionLoader(BatchLoader):
+    """
+    Whether the viewer has a row in `queryset` (already filtered to them) for
+    each post id, in one query that leads with the viewer's user column.
+    """
+
+    def __init__(self, queryset, kind=None, pending=None):
+        super().__init__()
+        self.queryset = queryset
+        self.kind = kind
+        self.pending = pending if pending is not None else {}
+
+    def get_default(self):
+        return False
+
+    def get_queryset(self, keys):
+        return self.queryset.filter(post_id__in=keys).order_by().values_list('post_id', flat=True).distinct()
+
+    def collect(self, rows, keys):
+        results = {post_id: True for post_id in rows}
+        if self.kind is not None:
+            for post_id in keys:
+                # Buffered taps that have not been flushed yet
+                if (self.kind, post_id) in self.pending:
+                    results[post_id] = self.pending[(self.kind, post_id)][0]
+        return results
+
+class FollowStateLoader(BatchLoader):
+    """(viewer follows the user, user follows the viewer) for each user id, in one query."""
+
+    def __init__(self, user):
+        super().__init__()
+        self.user = user
+
+    def get_default(self):
+        return (False, False)
+
+    def get_queryset(self, keys):
+        return Follow.objects.filter(
+            Q(follower=self.user, following_id__in=keys) | Q(follower_id__in=keys, following=self.user)
+        ).values_list('follower_id', 'following_id')
+
+    def collect(self, rows, keys):
+        following = {following_id for follower_id, following_id in rows if follower_id == self.user.pk}
+        followers = {follower_id for follower_id, following_id in rows if following_id == self.user.pk}
+        return {key: (key in following, key in followers) for key in keys}
+
+class PostImagesLoader(BatchLoader):
+    def get_default(self):
+        return []
+
+    def get_queryset(self, keys):
+        return PostImage.objects.filter(post_id__in=keys)
+
+    def collect(self, rows, keys):
+        images = defaultdict(list)
+        for image in rows:
+            images[image.post_id].append(image)
+        return images
+
+class FirstCommentsLoader(BatchLoader):
+    """Newest `limit + 1` comments of each post, ranked per post in one windowed query."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def get_default(self):
+        return []
+
+    def get_queryset(self, keys):
+        return (Comment.objects.filter(post_id__in=keys)
+                .select_related('author')
+                .annotate(position=Window(
+                    RowNumber(),
+                    partition_by=[F('post_id')],
+                    order_by=[F('created_at').desc(), F('id').desc()],
+                ))
+                .filter(position__lte=self.limit + 1)
+                .order_by('post_id', 'position'))
+
+    def collect(self, rows, keys):
+        comments = defaultdict(list)
+        for comment in rows:
+            comments[comment.post_id].append(comment)
+        return comments
+
+class Loaders:
+    def __init__(self, user, is_async=False):
+        self.is_async = is_async
+        self.users = ModelLoader(User)
+        self.craft_categories = ModelLoader(CraftCategory)
+        self.comment_pages = {}
+        self.post_images = PostImagesLoader()
+        self.primed_post_ids = set()
+        self.pending_interactions = {}
+        self.is_liked = None
+        self.is_shared = None
+        self.has_commented = None
+        self.follow_state = None
+        if user is not None and user.is_authenticated:
+            self.pending_interactions = pending_interactions(user.pk)
+            self.is_liked = ViewerInteractionLoader(Like.objects.filter(user=user), 'like', self.pending_interactions)
+            self.is_shared = ViewerInteractionLoader(Share.objects.filter(user=user), 'share', self.pending_interactions)
+            self.has_commented = ViewerInteractionLoader(Comment.objects.filter(author=user))
+            self.follow_state = FollowStateLoader(user)
+        for loader in (self.users, self.craft_categories, self.post_images, *self.viewer_loaders(), self.follow_state):
+            if loader is not None:
+                loader.is_async = is_async
+
+    def viewer_loaders(self):
+        return [loader for loader in (self.is_liked, self.is_shared, self.has_commented) if loader is not None]
+
+    def post_loaders(self):
+        return [self.post_images, *self.comment_pages.values(), *self.viewer_loaders()]
+
+    def pending_delta(self, kind, post_id):
+        state, stored = self.pending_interactions.get((kind, post_id), (False, False))
+        return int(state) - int(stored)
+
+    def first_comments(self, limit):
+        loader = self.comment_pages.get(limit)
+        if loader is None:
+            loader = self.comment_pages[limit] = FirstCommentsLoader(limit)
+            loader.is_async = self.is_async
+            loader.prime(self.primed_post_ids)
+        return loader
+
+def get_loaders(info):
+    context = info.context
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = Loaders(getattr(context, 'user', None), getattr(context, 'graphql_async', False))
+        context.loaders = loaders
+    return loaders
+
+def prime_posts(info, posts):
+    loaders = get_loaders(info)
+    post_ids = [post.pk for post in posts]
+    loaders.primed_post_ids.update(post_ids)
+    for loader in loaders.post_loaders():
+        loader.prime(post_ids)
+    loaders.users.prime(post.author_id for post in posts if not Post.author.is_cached(post))
+    loaders.craft_categories.prime(
+        post.craft_category_id for post in posts if not Post.craft_category.is_cached(post)
+    )
+    if loaders.follow_state is not None:
+        loaders.follow_state.prime(post.author_id for post in posts)
+    return posts
+
+def prime_users(info, users):
+    loaders = get_loaders(info)
+    if loaders.follow_state is not None:
+        loaders.follow_state.prime(user.pk for user in users)
+    return users
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from apps.posts.models import POST_IMAGE_SPEC, PostImage
+from apps.users.models import AVATAR_SPEC, User
+from social_backend.images import process
+
+class Command(BaseCommand):
+    help = "Render renditions for post images and avatars that have none or are out of date"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-render every image, not only stale ones")
+    
+    def handle(self, *args, **options):
+        for spec, queryset in (
+            (POST_IMAGE_SPEC, PostImage.objects.exclude(image='')),
+            (AVATAR_SPEC, User.objects.exclude(avatar='').exclude(avatar__isnull=True)),
+        ):
+            processed = 0
+            for instance in queryset.iterator(chunk_size=200):
+                if options['all'] or spec.needs_processing(instance):
+                    process(spec, instance.pk, getattr(instance, spec.field).name, wait=True)
+                    processed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"Rendered {processed} {spec.model._meta.verbose_name_plural}"
+            ))
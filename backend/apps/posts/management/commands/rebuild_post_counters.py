@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from apps.posts.counters import COUNTER_SOURCES, drifted_posts, rebuild_counters
+from apps.posts.models import Post
+
+class Command(BaseCommand):
+    help = "Check and rebuild the stored likes/comments/shares counters on Post"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report posts whose counters drifted")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Posts per UPDATE statement")
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_id = Post.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        drifted = 0
+        rebuilt = 0
+        
+        for start in range(0, max_id, batch_size):
+            batch = Post.objects.filter(id__gt=start, id__lte=start + batch_size).order_by()
+            
+            if options['check']:
+                for post in drifted_posts(batch).only('id', *COUNTER_SOURCES):
+                    drifted += 1
+                    self.stdout.write(
+                        f"Post {post.id}: " + ", ".join(
+                            f"{field} {getattr(post, field)} != {getattr(post, f'actual_{field}')}"
+                            for field in COUNTER_SOURCES
+                            if getattr(post, field) != getattr(post, f'actual_{field}')
+                        )
+                    )
+                continue
+            
+            with transaction.atomic():
+                rebuilt += rebuild_counters(batch)
+        
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS(f"{drifted} post(s) with drifted counters"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {rebuilt} post(s)"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from apps.posts.models import TrendingScore, TrendingWatermark
+from apps.posts.trending import refresh_trending
+
+class Command(BaseCommand):
+    help = "Rescore trending posts that received interactions since the last refresh"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop all scores and rescore the whole window")
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts rescored per batch")
+    
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            TrendingScore.objects.all().delete()
+            TrendingWatermark.objects.all().delete()
+        rescored, pruned = refresh_trending(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {rescored} trending rows, pruned {pruned}"))
\ No newline at end of file
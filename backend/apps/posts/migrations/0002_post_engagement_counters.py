@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    sources = {
+        'likes_count': apps.get_model('interactions', 'Like'),
+        'comments_count': apps.get_model('interactions', 'Comment'),
+        'shares_count': apps.get_model('interactions', 'Share'),
+    }
+    Post.objects.update(**{
+        field: Coalesce(Subquery(
+            model.objects.filter(post=OuterRef('pk')).order_by().values('post')
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ), Value(0))
+        for field, model in sources.items()
+    })
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+        ('interactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='shares_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from apps.posts.search import install_search_index
+    install_search_index(schema_editor.connection, rebuild=True)
+
+
+def uninstall(apps, schema_editor):
+    from apps.posts.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
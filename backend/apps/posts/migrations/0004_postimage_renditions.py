@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='placeholder',
+            field=models.CharField(blank=True, help_text='BlurHash of the image', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_postimage_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=20)),
+                ('score', models.FloatField()),
+                ('last_interaction_at', models.DateTimeField()),
+                ('craft_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.craftcategory')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_scores', to='posts.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', '-score', '-post'], name='posts_trend_window_48cd78_idx'), models.Index(fields=['window', 'craft_category', '-score', '-post'], name='posts_trend_window_147fff_idx'), models.Index(fields=['window', 'last_interaction_at'], name='posts_trend_window_2bd878_idx')],
+                'unique_together': {('post', 'window')},
+            },
+        ),
+    ]
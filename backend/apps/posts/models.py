@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from social_backend.images import ImageSpec
 
 class CraftCategory(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -14,6 +15,8 @@ class CraftCategory(models.Model):
         return self.name
 
 class Post(models.Model):
+    COUNTER_FIELDS = ('likes_count', 'comments_count', 'shares_count')
+    
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posts')
     title = models.CharField(max_length=200, help_text="Title of your craft")
     content = models.TextField(max_length=2000, help_text="Description of your craft")
@@ -26,6 +29,11 @@ class Post(models.Model):
     is_for_sale = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
     
+    # Engagement counters, maintained by apps.interactions.signals
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -39,19 +47,16 @@ class Post(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.title} by {self.author.username}"
-    
-    @property
-    def likes_count(self):
-        return self.likes.count()
-    
-    @property
-    def comments_count(self):
-        return self.comments.count()
+        return self.title
     
-    @property
-    def shares_count(self):
-        return self.shares.count()
+    def save(self, *args, **kwargs):
+        # Counters only change through F() updates; never write back stale in-memory values
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def is_liked_by(self, user):
         if not user.is_authenticated:
@@ -63,6 +68,12 @@ class PostImage(models.Model):
     image = models.ImageField(upload_to='posts/')
     alt_text = models.CharField(max_length=200, blank=True)
     order = models.PositiveIntegerField(default=0)
+    
+    # Filled in by social_backend.images after upload
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    placeholder = models.CharField(max_length=64, blank=True, help_text="BlurHash of the image")
+    renditions = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -72,4 +83,35 @@ class PostImage(models.Model):
         ]
     
     def __str__(self):
-        return f"Image {self.order} for {self.post.title}"
\ No newline at end of file
+        return f"Image {self.order} for post {self.post_id}"
+
+class TrendingScore(models.Model):
+    """A post's decayed interaction score in one trending window, kept by apps.posts.trending."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='trending_scores')
+    window = models.CharField(max_length=20)
+    # Copied from the post so a category's ranking is one range scan
+    craft_category = models.ForeignKey(CraftCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # log2 of the score; only the order matters, so it never has to be decayed in place
+    score = models.FloatField()
+    last_interaction_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['post', 'window']
+        indexes = [
+            models.Index(fields=['window', '-score', '-post']),
+            models.Index(fields=['window', 'craft_category', '-score', '-post']),
+            models.Index(fields=['window', 'last_interaction_at']),
+        ]
+    
+    def __str__(self):
+        return f"Post {self.post_id} trending {self.window}: {self.score:.2f}"
+
+class TrendingWatermark(models.Model):
+    """Highest interaction id of one source already scored by the trending refresh."""
+    source = models.CharField(max_length=20, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.source} up to {self.last_id}"
+
+POST_IMAGE_SPEC = ImageSpec(PostImage, 'image', settings.POST_IMAGE_RENDITIONS)
\ No newline at end of file
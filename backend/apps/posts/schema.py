@@ -1,23 +1,66 @@
 import graphene
+from collections import defaultdict
 from graphene import relay
 from graphene_django import DjangoObjectType
-from graphene_django.filter import DjangoFilterConnectionField
+from graphql import GraphQLError
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Prefetch
-from .models import Post, CraftCategory
-from apps.users.schema import UserType
+from django.utils import timezone
+from .models import POST_IMAGE_SPEC, Post, CraftCategory
+from .loaders import get_loaders, prime_posts
+from .search import search_posts
+from .trending import trending_posts
+from graphene_django.settings import graphene_settings
+from social_backend.pagination import (
+    KeysetConnectionField, connection_from_nodes, decode_values, encode_values, paginate_keyset, resolve_limit,
+)
+from apps.users.schema import ImageSize, ImageType, UserType, size_value
+from social_backend.execution import run_sync, sync_resolver, then
+from social_backend.images import rendition_fields
 from apps.interactions.models import Comment
+from apps.interactions.schema import CommentConnection
+from apps.feed.fanout import fan_out_post, fan_out_posts
+from social_backend.result_cache import invalidate
+
+COMMENT_ORDERING = ('-created_at', '-id')
+COMMENTS_PAGE_SIZE = 20
 
 class CraftCategoryType(DjangoObjectType):
     class Meta:
         model = CraftCategory
         fields = ('id', 'name', 'description', 'created_at')
 
+class ViewerStateType(graphene.ObjectType):
+    """What the viewer has done with a post; all false for anonymous viewers."""
+    liked = graphene.Boolean()
+    shared = graphene.Boolean()
+    commented = graphene.Boolean()
+    
+    def resolve_liked(self, info):
+        return _viewer_state(info, 'is_liked', self)
+    
+    def resolve_shared(self, info):
+        return _viewer_state(info, 'is_shared', self)
+    
+    def resolve_commented(self, info):
+        return _viewer_state(info, 'has_commented', self)
+
+def _viewer_state(info, name, post):
+    loader = getattr(get_loaders(info), name)
+    if loader is None:
+        return False
+    return loader.load(post.pk)
+
 class PostType(DjangoObjectType):
     likes_count = graphene.Int()
     comments_count = graphene.Int()
     shares_count = graphene.Int()
     is_liked = graphene.Boolean()
-    comments = graphene.List('apps.interactions.schema.CommentType')
+    viewer_state = graphene.Field(ViewerStateType, required=True)
+    comments = graphene.Field(CommentConnection, first=graphene.Int(), after=graphene.String())
+    images = graphene.List(ImageType, size=ImageSize(default_value=ImageSize.MEDIUM.value))
+    image = graphene.String(description="URL of the first image at MEDIUM size; images(size:) returns them all")
     
     class Meta:
         model = Post
@@ -26,8 +69,6 @@ class PostType(DjangoObjectType):
                  'created_at', 'updated_at')
         interfaces = (relay.Node,)
         filter_fields = {
-            'content': ['icontains'],
-            'title': ['icontains'],
             'author': ['exact'],
             'craft_category': ['exact'],
             'is_for_sale': ['exact'],
@@ -35,50 +76,160 @@ class PostType(DjangoObjectType):
             'created_at': ['gte', 'lte'],
         }
     
-    def resolve_likes_count(self, info):
-        return self.likes_count
+    def resolve_author(self, info):
+        if Post.author.is_cached(self):
+            return self.author
+        return get_loaders(info).users.load(self.author_id)
+    
+    def resolve_craft_category(self, info):
+        if Post.craft_category.is_cached(self):
+            return self.craft_category
+        return get_loaders(info).craft_categories.load(self.craft_category_id)
     
-    def resolve_comments_count(self, info):
-        return self.comments_count
+    def resolve_likes_count(self, info):
+        return self.likes_count + get_loaders(info).pending_delta('like', self.pk)
     
     def resolve_shares_count(self, info):
-        return self.shares_count
+        return self.shares_count + get_loaders(info).pending_delta('share', self.pk)
+    
+    def resolve_images(self, info, size):
+        def renditions(post_images):
+            images = []
+            for image in post_images:
+                fields = rendition_fields(POST_IMAGE_SPEC, image, size_value(size))
+                if fields is not None:
+                    images.append(dict(fields, id=image.pk, alt_text=image.alt_text))
+            return images
+        return then(get_loaders(info).post_images.load(self.pk), renditions)
+    
+    def resolve_image(self, info):
+        def first_url(post_images):
+            for image in post_images:
+                fields = rendition_fields(POST_IMAGE_SPEC, image, ImageSize.MEDIUM.value)
+                if fields is not None:
+                    return fields['url']
+            return None
+        return then(get_loaders(info).post_images.load(self.pk), first_url)
     
     def resolve_is_liked(self, info):
-        user = info.context.user
-        return self.is_liked_by(user)
+        return _viewer_state(info, 'is_liked', self)
+    
+    def resolve_viewer_state(self, info):
+        # The flags load lazily, each batched over the page
+        return self
     
-    def resolve_comments(self, info):
-        return self.comments.select_related('author').all()
+    def resolve_comments(self, info, first=None, after=None):
+        limit = resolve_limit(
+            first if first is not None else COMMENTS_PAGE_SIZE,
+            max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
+        )
+        
+        def with_total(connection):
+            connection.total_count = self.comments_count
+            return connection
+        
+        if after:
+            # "Load more" on a single post seeks on the (post, -created_at) index
+            return then(run_sync(
+                info,
+                paginate_keyset,
+                Comment.objects.filter(post_id=self.pk).select_related('author'),
+                CommentConnection,
+                COMMENT_ORDERING,
+                first=limit,
+                after=after,
+            ), with_total)
+        
+        def first_page(comments):
+            return with_total(connection_from_nodes(
+                CommentConnection, comments[:limit], COMMENT_ORDERING, has_next_page=len(comments) > limit
+            ))
+        return then(get_loaders(info).first_comments(limit).load(self.pk), first_page)
 
 class PostConnection(relay.Connection):
     class Meta:
         node = PostType
 
+class PostConnectionField(KeysetConnectionField):
+    """Pages PostType through the shared PostConnection instead of a generated PostTypeConnection."""
+    
+    @property
+    def type(self):
+        return PostConnection
+    
+    def resolve_page(self, info, nodes):
+        return prime_posts(info, nodes)
+
+class TrendingWindow(graphene.Enum):
+    DAY = 'day'
+    WEEK = 'week'
+
+def _ranked_connection(info, hits, limit, after):
+    """A PostConnection over (post, rank) hits, paged by [rank, id] cursors."""
+    page = hits[:limit]
+    prime_posts(info, [post for post, rank in page])
+    edges = [PostConnection.Edge(node=post, cursor=encode_values([rank, post.pk])) for post, rank in page]
+    return PostConnection(
+        edges=edges,
+        page_info=relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=bool(after),
+            has_next_page=len(hits) > limit,
+        ),
+    )
+
 class PostQuery(graphene.ObjectType):
     post = graphene.Field(PostType, id=graphene.ID())
-    posts = DjangoFilterConnectionField(PostType)
+    posts = PostConnectionField(PostType)
     craft_categories = graphene.List(CraftCategoryType)
-    posts_by_category = graphene.List(PostType, category_id=graphene.ID())
-    featured_posts = graphene.List(PostType)
+    posts_by_category = PostConnectionField(PostType, category_id=graphene.ID(required=True), fields={
+        name: lookups for name, lookups in PostType._meta.filter_fields.items() if name != 'craft_category'
+    })
+    featured_posts = PostConnectionField(PostType)
+    search_posts = graphene.Field(PostConnection, query=graphene.String(required=True),
+                                  first=graphene.Int(), after=graphene.String())
+    trending_posts = graphene.Field(PostConnection, category_id=graphene.ID(),
+                                    window=TrendingWindow(default_value=TrendingWindow.DAY.value),
+                                    first=graphene.Int(), after=graphene.String())
     
+    @sync_resolver
     def resolve_post(self, info, id):
         try:
-            return Post.objects.select_related('author', 'craft_category').prefetch_related('likes', 'comments', 'shares').get(pk=id)
+            return Post.objects.select_related('author', 'craft_category').get(pk=id)
         except Post.DoesNotExist:
             return None
     
     def resolve_posts(self, info, **kwargs):
-        return Post.objects.select_related('author', 'craft_category').prefetch_related('likes', 'comments', 'shares').all()
+        return Post.objects.select_related('author', 'craft_category').all()
     
+    @sync_resolver
     def resolve_craft_categories(self, info):
         return CraftCategory.objects.all()
     
-    def resolve_posts_by_category(self, info, category_id):
-        return Post.objects.filter(craft_category_id=category_id).select_related('author', 'craft_category').prefetch_related('likes', 'comments', 'shares')
+    def resolve_posts_by_category(self, info, category_id, **kwargs):
+        return Post.objects.filter(craft_category_id=category_id).select_related('author', 'craft_category')
+    
+    def resolve_featured_posts(self, info, **kwargs):
+        return Post.objects.filter(is_featured=True).select_related('author', 'craft_category')
+    
+    @sync_resolver
+    def resolve_search_posts(self, info, query, first=None, after=None):
+        limit = resolve_limit(first, max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+        hits = search_posts(query, limit + 1, decode_values(after, 2) if after else None)
+        return _ranked_connection(info, hits, limit, after)
     
-    def resolve_featured_posts(self, info):
-        return Post.objects.filter(is_featured=True).select_related('author', 'craft_category').prefetch_related('likes', 'comments', 'shares')
+    @sync_resolver
+    def resolve_trending_posts(self, info, window, category_id=None, first=None, after=None):
+        limit = resolve_limit(first, max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+        if category_id is not None:
+            category_id = _parse_id(category_id)
+            if category_id is None:
+                raise GraphQLError("Invalid category id")
+        # Graphene passes enum members to resolvers
+        window = getattr(window, 'value', window)
+        hits = trending_posts(window, category_id, limit + 1, decode_values(after, 2) if after else None)
+        return _ranked_connection(info, hits, limit, after)
 
 class CreatePost(graphene.Mutation):
     class Arguments:
@@ -118,6 +269,7 @@ class CreatePost(graphene.Mutation):
                 price_range=kwargs.get('price_range', ''),
                 is_for_sale=kwargs.get('is_for_sale', False)
             )
+            fan_out_post(post)
             
             return CreatePost(success=True, post=post, errors=None)
             
@@ -203,7 +355,219 @@ class DeletePost(graphene.Mutation):
         except Exception as e:
             return DeletePost(success=False, errors=[str(e)])
 
+class PostInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    content = graphene.String(required=True)
+    craft_category_id = graphene.ID()
+    materials_used = graphene.String()
+    time_to_complete = graphene.String()
+    price_range = graphene.String()
+    is_for_sale = graphene.Boolean()
+
+class PostUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String()
+    content = graphene.String()
+    craft_category_id = graphene.ID()
+    materials_used = graphene.String()
+    time_to_complete = graphene.String()
+    price_range = graphene.String()
+    is_for_sale = graphene.Boolean()
+
+class BulkPostResult(graphene.ObjectType):
+    index = graphene.Int()
+    id = graphene.ID()
+    success = graphene.Boolean()
+    post = graphene.Field(PostType)
+    errors = graphene.List(graphene.String)
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _clean_post_input(item, category_ids, partial=False):
+    """Validate one bulk item the way CreatePost/UpdatePost do. Returns (values, errors)."""
+    values = {}
+    errors = []
+    title = item.get('title')
+    if title or not partial:
+        title = (title or '').strip()
+        if len(title) < 3:
+            errors.append("Title must be at least 3 characters")
+        values['title'] = title
+    content = item.get('content')
+    if content or not partial:
+        content = (content or '').strip()
+        if len(content) < 10:
+            errors.append("Content must be at least 10 characters")
+        values['content'] = content
+    for name in ('materials_used', 'time_to_complete', 'price_range'):
+        if name in item:
+            values[name] = item[name] or ''
+    if 'is_for_sale' in item:
+        values['is_for_sale'] = bool(item['is_for_sale'])
+    if 'craft_category_id' in item:
+        category_id = item['craft_category_id']
+        if category_id is not None:
+            category_id = _parse_id(category_id)
+            if category_id not in category_ids:
+                errors.append("Craft category not found")
+        values['craft_category_id'] = category_id
+
+    for name, value in values.items():
+        max_length = Post._meta.get_field(name).max_length
+        if isinstance(value, str) and max_length and len(value) > max_length:
+            errors.append(f"{name} must be at most {max_length} characters")
+    return values, errors
+
+def _category_ids(items):
+    ids = {_parse_id(item.get('craft_category_id')) for item in items}
+    ids.discard(None)
+    return set(CraftCategory.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+
+def _check_batch(user, items):
+    if not user.is_authenticated:
+        return ["Authentication required"]
+    if len(items) > settings.GRAPHQL_BULK_MUTATION_MAX_ITEMS:
+        return [f"At most {settings.GRAPHQL_BULK_MUTATION_MAX_ITEMS} items per request"]
+    return None
+
+class BulkCreatePosts(graphene.Mutation):
+    class Arguments:
+        posts = graphene.List(graphene.NonNull(PostInput), required=True)
+    
+    success = graphene.Boolean()
+    results = graphene.List(BulkPostResult)
+    errors = graphene.List(graphene.String)
+    
+    def mutate(self, info, posts):
+        user = info.context.user
+        errors = _check_batch(user, posts)
+        if errors:
+            return BulkCreatePosts(success=False, results=[], errors=errors)
+        
+        # Validate everything before writing anything
+        category_ids = _category_ids(posts)
+        results = []
+        new_posts = []
+        for index, item in enumerate(posts):
+            values, item_errors = _clean_post_input(item, category_ids)
+            result = BulkPostResult(index=index, success=not item_errors, errors=item_errors or None)
+            results.append(result)
+            if not item_errors:
+                result.post = Post(author=user, **values)
+                new_posts.append(result.post)
+        
+        if new_posts:
+            with transaction.atomic():
+                Post.objects.bulk_create(new_posts, batch_size=500)
+                fan_out_posts(new_posts)
+            # bulk_create sends no post_save
+            invalidate('posts')
+            prime_posts(info, new_posts)
+        for result in results:
+            if result.post is not None:
+                result.id = result.post.pk
+        return BulkCreatePosts(success=len(new_posts) == len(posts), results=results, errors=None)
+
+class BulkUpdatePosts(graphene.Mutation):
+    class Arguments:
+        posts = graphene.List(graphene.NonNull(PostUpdateInput), required=True)
+    
+    success = graphene.Boolean()
+    results = graphene.List(BulkPostResult)
+    errors = graphene.List(graphene.String)
+    
+    def mutate(self, info, posts):
+        user = info.context.user
+        errors = _check_batch(user, posts)
+        if errors:
+            return BulkUpdatePosts(success=False, results=[], errors=errors)
+        
+        category_ids = _category_ids(posts)
+        post_ids = [_parse_id(item['id']) for item in posts]
+        existing = Post.objects.filter(pk__in=[pk for pk in post_ids if pk is not None], author=user).in_bulk()
+        results = []
+        seen = set()
+        # Group posts by the set of fields that actually changed, one bulk_update per group
+        changed_groups = defaultdict(list)
+        for index, (item, post_id) in enumerate(zip(posts, post_ids)):
+            result = BulkPostResult(index=index, id=item['id'], success=False)
+            results.append(result)
+            post = existing.get(post_id)
+            if post is None:
+                result.errors = ["Post not found or permission denied"]
+                continue
+            if post_id in seen:
+                result.errors = ["Duplicate post id"]
+                continue
+            seen.add(post_id)
+            values, item_errors = _clean_post_input(item, category_ids, partial=True)
+            if item_errors:
+                result.errors = item_errors
+                continue
+            changed = []
+            for name, value in values.items():
+                if getattr(post, name) != value:
+                    setattr(post, name, value)
+                    changed.append(name)
+            if changed:
+                changed_groups[tuple(sorted(changed))].append(post)
+            result.success = True
+            result.post = post
+        
+        if changed_groups:
+            now = timezone.now()
+            with transaction.atomic():
+                for fields, group in changed_groups.items():
+                    for post in group:
+                        post.updated_at = now
+                    Post.objects.bulk_update(group, [*fields, 'updated_at'], batch_size=500)
+            # bulk_update sends no post_save
+            invalidate('posts')
+        prime_posts(info, [result.post for result in results if result.post is not None])
+        return BulkUpdatePosts(success=all(result.success for result in results), results=results, errors=None)
+
+class BulkDeletePosts(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+    
+    success = graphene.Boolean()
+    results = graphene.List(BulkPostResult)
+    errors = graphene.List(graphene.String)
+    
+    def mutate(self, info, ids):
+        user = info.context.user
+        errors = _check_batch(user, ids)
+        if errors:
+            return BulkDeletePosts(success=False, results=[], errors=errors)
+        
+        post_ids = [_parse_id(value) for value in ids]
+        owned = set(Post.objects.filter(
+            pk__in=[pk for pk in post_ids if pk is not None], author=user
+        ).values_list('pk', flat=True))
+        results = []
+        deleting = set()
+        for index, (value, post_id) in enumerate(zip(ids, post_ids)):
+            if post_id in owned and post_id not in deleting:
+                deleting.add(post_id)
+                results.append(BulkPostResult(index=index, id=value, success=True))
+            else:
+                results.append(BulkPostResult(index=index, id=value, success=False, errors=[
+                    "Duplicate post id" if post_id in deleting else "Post not found or permission denied"
+                ]))
+        
+        if deleting:
+            with transaction.atomic():
+                Post.objects.filter(pk__in=deleting, author=user).delete()
+        return BulkDeletePosts(success=all(result.success for result in results), results=results, errors=None)
+
 class PostMutation(graphene.ObjectType):
     create_post = CreatePost.Field()
     update_post = UpdatePost.Field()
-    delete_post = DeletePost.Field()
\ No newline at end of file
+    delete_post = DeletePost.Field()
+    bulk_create_posts = BulkCreatePosts.Field()
+    bulk_update_posts = BulkUpdatePosts.Field()
+    bulk_delete_posts = BulkDeletePosts.Field()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Full-text search over Post.title, Post.content and Post.materials_used.
+
+PostgreSQL keeps a weighted tsvector in a generated column with a GIN index;
+SQLite keeps an external-content FTS5 table maintained by triggers. Both are
+updated by the database itself whenever a post is inserted, edited or deleted.
+"""
+import re
+from django.db import connections, router
+from django.db.models import Q
+from .models import Post
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE posts_post ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(materials_used, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS posts_post_search_vector_gin ON posts_post USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS posts_post_search_vector_gin",
+    "ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        title, content, materials_used,
+        content='posts_post', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, title, content, materials_used)
+        VALUES (new.id, new.title, new.content, new.materials_used);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content, materials_used)
+        VALUES ('delete', old.id, old.title, old.content, old.materials_used);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update AFTER UPDATE OF title, content, materials_used ON posts_post
+    WHEN old.title IS NOT new.title OR old.content IS NOT new.content OR old.materials_used IS NOT new.materials_used
+    BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content, materials_used)
+        VALUES ('delete', old.id, old.title, old.content, old.materials_used);
+        INSERT INTO posts_post_fts(rowid, title, content, materials_used)
+        VALUES (new.id, new.title, new.content, new.materials_used);
+    END
+    """,
+]
+
+SQLITE_REBUILD = "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update",
+    "DROP TABLE IF EXISTS posts_post_fts",
+]
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+def install_search_index(connection, rebuild=False):
+    """Create the index objects if missing. Safe to call repeatedly."""
+    if connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_INSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_INSTALL)
+        if rebuild:
+            _execute(connection, [SQLITE_REBUILD])
+
+def uninstall_search_index(connection):
+    if connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_UNINSTALL)
+    elif connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_UNINSTALL)
+
+def _terms(text):
+    return re.findall(r'\w+', text.lower())
+
+class PostgresSearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, text, limit, after=None):
+        terms = _terms(text)
+        if not terms:
+            return []
+        # ts_rank_cd returns real; cast so the value in a cursor compares exactly on the next page
+        rank = "ts_rank_cd(search_vector, query, 32)::float8"
+        sql = [f"SELECT id, {rank} AS rank FROM posts_post, plainto_tsquery('english', %s) query "
+               "WHERE search_vector @@ query"]
+        params = [' '.join(terms)]
+        if after:
+            sql.append(f"AND ({rank} < %s OR ({rank} = %s AND id < %s))")
+            params += [after[0], after[0], after[1]]
+        sql.append("ORDER BY rank DESC, id DESC LIMIT %s")
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return cursor.fetchall()
+
+class SqliteSearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, text, limit, after=None):
+        terms = _terms(text)
+        if not terms:
+            return []
+        # bm25 is "lower is better"; column weights favour title, then materials
+        rank = "bm25(posts_post_fts, 10.0, 2.0, 5.0)"
+        match = ' '.join('"%s"' % term for term in terms)
+        sql = [f"SELECT rowid, {rank} AS rank FROM posts_post_fts WHERE posts_post_fts MATCH %s"]
+        params = [match]
+        if after:
+            sql.append(f"AND ({rank} > %s OR ({rank} = %s AND rowid < %s))")
+            params += [after[0], after[0], after[1]]
+        sql.append("ORDER BY rank, rowid DESC LIMIT %s")
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return cursor.fetchall()
+
+class FallbackSearchBackend:
+    """Unranked substring search for databases without a full-text index."""
+
+    def search(self, text, limit, after=None):
+        terms = _terms(text)
+        if not terms:
+            return []
+        posts = Post.objects.order_by('-id')
+        for term in terms:
+            posts = posts.filter(
+                Q(title__icontains=term) | Q(content__icontains=term) | Q(materials_used__icontains=term)
+            )
+        if after:
+            posts = posts.filter(id__lt=after[1])
+        return [(post_id, 0.0) for post_id in posts.values_list('id', flat=True)[:limit]]
+
+def get_search_backend(using='default'):
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(connection)
+    if connection.vendor == 'sqlite':
+        return SqliteSearchBackend(connection)
+    return FallbackSearchBackend()
+
+def search_posts(text, limit, after=None):
+    """
+    Return up to `limit` (post, rank) pairs, best match first. The backend's raw
+    rank and the post id together form the keyset cursor for the next page.
+    """
+    # Reads go where the replica router sends them, pinned to the primary after a write
+    using = router.db_for_read(Post)
+    hits = get_search_backend(using).search(text, limit, after)
+    posts = (Post.objects.using(using).select_related('author', 'craft_category')
+             .in_bulk([post_id for post_id, _ in hits]))
+    return [(posts[post_id], score) for post_id, score in hits if post_id in posts]
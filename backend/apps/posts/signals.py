@@ -0,0 +1,45 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.interactions.models import Like, Comment, Share
+from apps.interactions.toggles import interaction_changed
+from social_backend.images import renditions_ready, schedule, strip_upload
+from social_backend.result_cache import invalidate_on_commit
+from .models import POST_IMAGE_SPEC, Post, PostImage, CraftCategory, TrendingScore
+
+@receiver(post_save, sender=CraftCategory)
+@receiver(post_delete, sender=CraftCategory)
+def invalidate_category_results(sender, **kwargs):
+    invalidate_on_commit('categories')
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Share)
+@receiver(post_delete, sender=Share)
+@receiver(interaction_changed)
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+@receiver(renditions_ready, sender=PostImage)
+def invalidate_post_results(sender, **kwargs):
+    invalidate_on_commit('posts')
+
+@receiver(post_save, sender=Post)
+def sync_trending_category(sender, instance, created, raw=False, **kwargs):
+    # Keeps category rankings right between refreshes when a post is recategorised
+    if not created and not raw:
+        TrendingScore.objects.filter(post=instance).exclude(
+            craft_category_id=instance.craft_category_id
+        ).update(craft_category_id=instance.craft_category_id)
+
+@receiver(pre_save, sender=PostImage)
+def strip_post_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        strip_upload(POST_IMAGE_SPEC, instance)
+
+@receiver(post_save, sender=PostImage)
+def process_post_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule(POST_IMAGE_SPEC, instance)
\ No newline at end of file
@@ -0,0 +1,170 @@
+from django.test import TestCase, override_settings
+from apps.feed.models import FeedEntry
+from apps.users.models import Follow, User
+from .models import CraftCategory, Post
+
+class GraphQLTestCase(TestCase):
+    def graphql(self, query, variables=None):
+        response = self.client.post(
+            '/graphql/', {'query': query, 'variables': variables or {}}, content_type='application/json'
+        )
+        return response.json()
+
+BULK_RESULT = 'success errors results { index id success errors }'
+
+class BulkMutationTests(GraphQLTestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com')
+        self.other = User.objects.create_user(username='other', email='other@example.com')
+        self.follower = User.objects.create_user(username='follower', email='follower@example.com')
+        Follow.objects.create(follower=self.follower, following=self.owner)
+        self.category = CraftCategory.objects.create(name='Quilting')
+        self.mine = Post.objects.create(author=self.owner, title='Log cabin', content='Strips around a centre')
+        self.theirs = Post.objects.create(author=self.other, title='Churn dash', content='Half square triangles')
+        self.client.force_login(self.owner)
+
+    def bulk(self, mutation, argument, value, variable_type):
+        data = self.graphql(
+            f'mutation($items: {variable_type}) {{ {mutation}({argument}: $items) {{ {BULK_RESULT} }} }}',
+            {'items': value},
+        )
+        self.assertNotIn('errors', data)
+        return data['data'][mutation]
+
+    def test_create_writes_valid_items_and_reports_the_rest(self):
+        result = self.bulk('bulkCreatePosts', 'posts', [
+            {
+                'title': 'Double wedding ring', 'content': 'Curved piecing, a lot of it',
+                'craftCategoryId': self.category.pk,
+            },
+            {'title': 'No', 'content': 'Too short'},
+            {'title': 'Lone star', 'content': 'Eight diamond points', 'craftCategoryId': 999999},
+            {'title': 'Bear paw', 'content': 'Four paws and a sash'},
+        ], '[PostInput!]!')
+
+        self.assertFalse(result['success'])
+        self.assertEqual([item['success'] for item in result['results']], [True, False, False, True])
+        self.assertEqual(
+            result['results'][1]['errors'],
+            ["Title must be at least 3 characters", "Content must be at least 10 characters"],
+        )
+        self.assertEqual(result['results'][2]['errors'], ["Craft category not found"])
+        created = Post.objects.filter(pk__in=[result['results'][0]['id'], result['results'][3]['id']])
+        self.assertEqual(sorted(created.values_list('title', flat=True)), ['Bear paw', 'Double wedding ring'])
+        self.assertEqual(set(created.values_list('author', flat=True)), {self.owner.pk})
+        self.assertFalse(Post.objects.filter(title__in=['No', 'Lone star']).exists())
+        # Fanned out to the author and their follower
+        self.assertEqual(
+            set(FeedEntry.objects.filter(post__in=created).values_list('owner', 'post')),
+            {(owner.pk, post.pk) for owner in (self.owner, self.follower) for post in created},
+        )
+
+    def test_update_only_touches_the_viewers_posts(self):
+        result = self.bulk('bulkUpdatePosts', 'posts', [
+            {'id': self.mine.pk, 'title': 'Log cabin, barn raising'},
+            {'id': self.theirs.pk, 'title': 'Not yours'},
+            {'id': self.mine.pk, 'title': 'Twice'},
+            {'id': 'abc', 'title': 'Bad id'},
+        ], '[PostUpdateInput!]!')
+
+        self.assertFalse(result['success'])
+        self.assertEqual([item['success'] for item in result['results']], [True, False, False, False])
+        self.assertEqual(result['results'][1]['errors'], ["Post not found or permission denied"])
+        self.assertEqual(result['results'][2]['errors'], ["Duplicate post id"])
+        self.assertEqual(result['results'][3]['errors'], ["Post not found or permission denied"])
+        self.mine.refresh_from_db()
+        self.theirs.refresh_from_db()
+        self.assertEqual(self.mine.title, 'Log cabin, barn raising')
+        self.assertEqual(self.theirs.title, 'Churn dash')
+
+    def test_update_applies_valid_items_when_others_fail_validation(self):
+        second = Post.objects.create(author=self.owner, title='Flying geese', content='Rectangles and squares')
+        result = self.bulk('bulkUpdatePosts', 'posts', [
+            {'id': self.mine.pk, 'content': 'Short'},
+            {'id': second.pk, 'isForSale': True, 'priceRange': '$$'},
+        ], '[PostUpdateInput!]!')
+
+        self.assertEqual(result['results'][0]['errors'], ["Content must be at least 10 characters"])
+        self.assertTrue(result['results'][1]['success'])
+        self.mine.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.mine.content, 'Strips around a centre')
+        self.assertEqual((second.is_for_sale, second.price_range), (True, '$$'))
+
+    def test_delete_only_removes_the_viewers_posts(self):
+        result = self.bulk('bulkDeletePosts', 'ids', [self.mine.pk, self.theirs.pk, self.mine.pk, 999999], '[ID!]!')
+
+        self.assertFalse(result['success'])
+        self.assertEqual([item['success'] for item in result['results']], [True, False, False, False])
+        self.assertEqual(
+            [item['errors'] for item in result['results'][1:]],
+            [["Post not found or permission denied"], ["Duplicate post id"], ["Post not found or permission denied"]],
+        )
+        self.assertFalse(Post.objects.filter(pk=self.mine.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.theirs.pk).exists())
+
+    def test_anonymous_requests_write_nothing(self):
+        self.client.logout()
+        result = self.bulk('bulkDeletePosts', 'ids', [self.mine.pk, self.theirs.pk], '[ID!]!')
+
+        self.assertEqual(result['errors'], ["Authentication required"])
+        self.assertEqual(result['results'], [])
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(GRAPHQL_BULK_MUTATION_MAX_ITEMS=2)
+    def test_oversized_batches_are_refused_whole(self):
+        result = self.bulk('bulkCreatePosts', 'posts', [
+            {'title': f'Nine patch {n}', 'content': 'Nine squares in a grid'} for n in range(3)
+        ], '[PostInput!]!')
+
+        self.assertEqual(result['errors'], ["At most 2 items per request"])
+        self.assertFalse(Post.objects.filter(title__startswith='Nine patch').exists())
+
+class KeysetPaginationTests(GraphQLTestCase):
+    """Pages over posts that share created_at must neither skip nor repeat a post."""
+
+    def setUp(self):
+        author = User.objects.create_user(username='author', email='author@example.com')
+        posts = [Post.objects.create(author=author, title=f'Block {n}', content='Sampler quilt') for n in range(7)]
+        # Three posts at one instant, three at another, one on its own
+        instants = [posts[0].created_at, posts[3].created_at, posts[6].created_at]
+        for index, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(created_at=instants[min(index // 3, 2)])
+        self.expected = list(Post.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+        self.client.force_login(author)
+
+    def page(self, arguments, variables):
+        data = self.graphql(
+            f'query($cursor: String) {{ posts({arguments}) {{ edges {{ node {{ title }} }} '
+            f'pageInfo {{ hasNextPage hasPreviousPage startCursor endCursor }} }} }}',
+            variables,
+        )
+        self.assertNotIn('errors', data)
+        connection = data['data']['posts']
+        return [edge['node']['title'] for edge in connection['edges']], connection['pageInfo']
+
+    def test_forward_pages_cover_every_post_once(self):
+        titles, cursor = [], None
+        while True:
+            page, info = self.page('first: 2, after: $cursor', {'cursor': cursor})
+            titles += page
+            if not info['hasNextPage']:
+                break
+            cursor = info['endCursor']
+        self.assertEqual(titles, self.expected)
+
+    def test_backward_pages_cover_every_post_once(self):
+        titles, cursor = [], None
+        while True:
+            page, info = self.page('last: 2, before: $cursor', {'cursor': cursor})
+            titles = page + titles
+            if not info['hasPreviousPage']:
+                break
+            cursor = info['startCursor']
+        self.assertEqual(titles, self.expected)
+
+    def test_a_page_can_start_between_tied_posts(self):
+        # The second post is the first of three tied posts
+        _, info = self.page('first: 2, after: $cursor', {'cursor': None})
+        page, _ = self.page('first: 3, after: $cursor', {'cursor': info['endCursor']})
+        self.assertEqual(page, self.expected[2:5])
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Trending posts: time-decayed velocity of likes, comments and shares.
+
+In each window (TRENDING_WINDOWS) a post scores the sum of
+weight * 2 ** ((t - EPOCH) / half_life) over its interactions of the last
+`window` seconds, stored as log2. Decay shrinks every post by the same factor,
+so the order never changes without new interactions and untouched rows are
+never rewritten.
+
+refresh_trending() finds the posts with interactions past the last refresh by
+primary key, rescores only those from their recent rows (the
+(post, -created_at) indexes), and drops posts with no activity left in a window.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+from apps.interactions.models import Like, Comment, Share
+from social_backend.background import PeriodicJob
+from social_backend.pagination import seek_filter
+from social_backend.result_cache import invalidate
+from .models import Post, TrendingScore, TrendingWatermark
+
+SOURCES = {
+    'like': Like,
+    'comment': Comment,
+    'share': Share,
+}
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_ORDERING = ('-score', '-post_id')
+# Newer rows may still have lower ids in uncommitted transactions, so they are rescanned next time
+SETTLE_TIME = timedelta(minutes=1)
+REFRESH_LOCK_KEY = 'trending:refresh-lock'
+
+def _horizon(now):
+    return now - timedelta(seconds=max(length for length, half_life in settings.TRENDING_WINDOWS.values()))
+
+def touched_posts(now):
+    """Return the ids of posts with interactions since the last refresh, and the watermarks that moved."""
+    stored = dict(TrendingWatermark.objects.values_list('source', 'last_id'))
+    post_ids = set()
+    watermarks = {}
+    for source, model in SOURCES.items():
+        if source in stored:
+            rows = seen = model.objects.order_by().filter(id__gt=stored[source])
+        else:
+            # First refresh: everything still inside the longest window
+            seen = model.objects.order_by()
+            rows = seen.filter(created_at__gte=_horizon(now))
+        post_ids.update(rows.values_list('post_id', flat=True).distinct())
+        settled = seen.filter(created_at__lte=now - SETTLE_TIME).aggregate(last_id=Max('id'))['last_id']
+        if settled is not None:
+            watermarks[source] = settled
+        elif source not in stored:
+            watermarks[source] = 0
+    return post_ids, watermarks
+
+def _activity(post_ids, since):
+    """{post_id: [(minute, weight)]} for the posts' interactions since `since`."""
+    activity = defaultdict(list)
+    for source, model in SOURCES.items():
+        weight = settings.TRENDING_WEIGHTS[source]
+        rows = (model.objects.filter(post_id__in=post_ids, created_at__gte=since)
+                .annotate(minute=TruncMinute('created_at'))
+                .order_by()
+                .values('post_id', 'minute')
+                .annotate(total=Count('id'))
+                .values_list('post_id', 'minute', 'total'))
+        for post_id, minute, total in rows:
+            activity[post_id].append((minute, weight * total))
+    return activity
+
+def log_score(activity, half_life):
+    exponents = [((minute - EPOCH).total_seconds() / half_life, weight) for minute, weight in activity]
+    top = max(exponent for exponent, weight in exponents)
+    return top + math.log2(sum(weight * 2 ** (exponent - top) for exponent, weight in exponents))
+
+def rescore(post_ids, now=None):
+    """Recompute every window's score for the given posts. Returns the number of rows written."""
+    now = now or timezone.now()
+    categories = dict(Post.objects.filter(pk__in=post_ids).order_by().values_list('id', 'craft_category_id'))
+    activity = _activity(list(categories), _horizon(now))
+
+    scores = []
+    inactive = defaultdict(list)
+    for window, (length, half_life) in settings.TRENDING_WINDOWS.items():
+        since = now - timedelta(seconds=length)
+        for post_id, category_id in categories.items():
+            recent = [(minute, weight) for minute, weight in activity.get(post_id, ()) if minute >= since]
+            if not recent:
+                inactive[window].append(post_id)
+                continue
+            scores.append(TrendingScore(
+                post_id=post_id,
+                window=window,
+                craft_category_id=category_id,
+                score=log_score(recent, half_life),
+                last_interaction_at=max(minute for minute, weight in recent),
+            ))
+
+    with transaction.atomic():
+        TrendingScore.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=['post', 'window'],
+            update_fields=['craft_category', 'score', 'last_interaction_at'],
+            batch_size=500,
+        )
+        for window, inactive_ids in inactive.items():
+            TrendingScore.objects.filter(window=window, post_id__in=inactive_ids).delete()
+    return len(scores)
+
+def prune(now=None):
+    """Drop posts without interactions inside their window, and windows no longer configured."""
+    now = now or timezone.now()
+    pruned = TrendingScore.objects.exclude(window__in=list(settings.TRENDING_WINDOWS)).delete()[0]
+    for window, (length, half_life) in settings.TRENDING_WINDOWS.items():
+        pruned += TrendingScore.objects.filter(
+            window=window, last_interaction_at__lt=now - timedelta(seconds=length)
+        ).delete()[0]
+    return pruned
+
+def refresh_trending(now=None, batch_size=500):
+    """Rescore posts with new interactions and prune stale ones. Returns (rescored, pruned)."""
+    now = now or timezone.now()
+    post_ids, watermarks = touched_posts(now)
+    post_ids = sorted(post_ids)
+    rescored = 0
+    for start in range(0, len(post_ids), batch_size):
+        rescored += rescore(post_ids[start:start + batch_size], now)
+    pruned = prune(now)
+    TrendingWatermark.objects.bulk_create(
+        [TrendingWatermark(source=source, last_id=last_id) for source, last_id in watermarks.items()],
+        update_conflicts=True,
+        unique_fields=['source'],
+        update_fields=['last_id'],
+    )
+    if rescored or pruned:
+        invalidate('trending')
+    return rescored, pruned
+
+def trending_posts(window, category_id=None, limit=20, after=None):
+    """Return [(post, score)] of one window, best first, after the (score, post id) cursor values."""
+    scores = TrendingScore.objects.filter(window=window).select_related('post__author', 'post__craft_category')
+    if category_id is not None:
+        scores = scores.filter(craft_category_id=category_id)
+    if after:
+        scores = scores.filter(seek_filter(TRENDING_ORDERING, after))
+    return [(score.post, score.score) for score in scores.order_by(*TRENDING_ORDERING)[:limit]]
+
+refresher = PeriodicJob('trending-refresher', refresh_trending, 'TRENDING_REFRESH_INTERVAL', REFRESH_LOCK_KEY)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from social_backend.admin import LargeTableAdmin
 from .models import User, Follow
 
 @admin.register(User)
@@ -8,19 +9,26 @@ class UserAdmin(BaseUserAdmin):
         ('Crafter Information', {
             'fields': ('craft_specialization', 'location', 'website', 'is_verified_crafter', 'avatar', 'bio')
         }),
+        ('Follows', {
+            'fields': ('followers_count', 'following_count')
+        }),
     )
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Crafter Information', {
             'fields': ('email', 'craft_specialization', 'location', 'website', 'is_verified_crafter')
         }),
     )
-    list_display = ('username', 'email', 'craft_specialization', 'location', 'is_verified_crafter', 'is_staff')
+    list_display = (
+        'username', 'email', 'craft_specialization', 'location', 'followers_count', 'is_verified_crafter', 'is_staff',
+    )
+    readonly_fields = ('followers_count', 'following_count')
     list_filter = BaseUserAdmin.list_filter + ('is_verified_crafter', 'craft_specialization')
     search_fields = ('username', 'email', 'craft_specialization', 'location')
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ('follower', 'following', 'created_at')
+    list_select_related = ('follower', 'following')
     list_filter = ('created_at',)
     search_fields = ('follower__username', 'following__username')
     raw_id_fields = ('follower', 'following')
@@ -0,0 +1,171 @@
+"""
+Follow graph: follow/unfollow and precomputed crafter suggestions.
+
+followers_count and following_count on User are kept by the Follow signals.
+A user's suggestions are friends-of-friends ranked by how many of their
+followees follow each candidate, plus crafters sharing their
+craft_specialization. They are stored in FollowSuggestion, so reading them is
+one range scan on (user, -score) instead of a walk over the graph.
+
+Following or unfollowing marks the user's suggestions stale
+(suggestions_refreshed_at = NULL); the background refresher recomputes stale
+users from the (follower, ...) index. Follows made by a user's followees also
+change their friends-of-friends, which `manage.py refresh_suggestions --all`
+picks up.
+"""
+import math
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from social_backend.background import PeriodicJob
+from .models import Follow, FollowSuggestion, User
+
+REFRESH_LOCK_KEY = 'follows:refresh-lock'
+
+def _mark_stale(user_id, suggested_id=None):
+    User.objects.filter(pk=user_id).update(suggestions_refreshed_at=None)
+    if suggested_id is not None:
+        # Never keep suggesting someone who was just followed
+        FollowSuggestion.objects.filter(user_id=user_id, suggested_id=suggested_id).delete()
+
+def follow(user, following_id):
+    """Follow a user. Returns (followed user or None, created)."""
+    target = User.objects.filter(pk=following_id, is_active=True).exclude(pk=user.pk).first()
+    if target is None:
+        return None, False
+    # The counters move in Follow's post_save, so only for a written row; a duplicate,
+    # even one from a concurrent request, just rolls back to the savepoint
+    try:
+        with transaction.atomic():
+            Follow.objects.create(follower=user, following=target)
+            _mark_stale(user.pk, target.pk)
+        created = True
+    except IntegrityError:
+        created = False
+    target.refresh_from_db(fields=User.COUNTER_FIELDS)
+    return target, created
+
+def unfollow(user, following_id):
+    """Stop following a user. Returns (unfollowed user or None, deleted)."""
+    target = User.objects.filter(pk=following_id).exclude(pk=user.pk).first()
+    if target is None:
+        return None, False
+    with transaction.atomic():
+        # Deleted through the ORM so the counter and feed signals run
+        deleted = Follow.objects.filter(follower=user, following=target).delete()[0] > 0
+        if deleted:
+            _mark_stale(user.pk)
+    target.refresh_from_db(fields=User.COUNTER_FIELDS)
+    return target, deleted
+
+def rebuild_counters(queryset):
+    """Recompute followers_count and following_count for the queryset with a single UPDATE."""
+    sides = {
+        'followers_count': 'following',
+        'following_count': 'follower',
+    }
+    return queryset.update(**{
+        field: Coalesce(Subquery(
+            Follow.objects.filter(**{side: OuterRef('pk')}).order_by().values(side)
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ), Value(0))
+        for field, side in sides.items()
+    })
+
+def _popularity(followers_count):
+    # Below 1 for any realistic count, so it only breaks ties between equal mutual counts
+    return math.log10(1 + followers_count) / 10
+
+def compute_suggestions(user, limit=None, now=None):
+    """Recompute and store one user's suggestions. Returns the number stored."""
+    limit = limit or settings.FOLLOW_SUGGESTIONS_PER_USER
+    followees = Follow.objects.filter(follower_id=user.pk).values('following_id')
+    mutual = dict(
+        Follow.objects.filter(follower_id__in=followees)
+        .exclude(following_id=user.pk)
+        .exclude(following_id__in=followees)
+        .order_by()
+        .values('following_id')
+        .annotate(total=Count('id'))
+        .order_by('-total')
+        .values_list('following_id', 'total')[:limit * 5]
+    )
+    candidate_ids = set(mutual)
+    specialization = user.craft_specialization.strip()
+    if specialization:
+        candidate_ids.update(
+            User.objects.filter(craft_specialization__iexact=specialization, is_active=True)
+            .exclude(pk=user.pk)
+            .exclude(pk__in=followees)
+            .order_by('-followers_count')
+            .values_list('pk', flat=True)[:limit * 5]
+        )
+
+    suggestions = []
+    weight = settings.FOLLOW_SUGGESTION_SPECIALIZATION_WEIGHT
+    candidates = User.objects.filter(pk__in=candidate_ids, is_active=True).values_list(
+        'pk', 'craft_specialization', 'followers_count'
+    )
+    for candidate_id, candidate_specialization, followers_count in candidates:
+        same = bool(specialization) and candidate_specialization.strip().lower() == specialization.lower()
+        mutual_count = mutual.get(candidate_id, 0)
+        suggestions.append(FollowSuggestion(
+            user_id=user.pk,
+            suggested_id=candidate_id,
+            score=mutual_count + (weight if same else 0) + _popularity(followers_count),
+            mutual_count=mutual_count,
+            same_specialization=same,
+        ))
+    suggestions.sort(key=lambda suggestion: -suggestion.score)
+    suggestions = suggestions[:limit]
+
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user.pk).delete()
+        FollowSuggestion.objects.bulk_create(suggestions)
+        User.objects.filter(pk=user.pk).update(suggestions_refreshed_at=now or timezone.now())
+    return len(suggestions)
+
+def refresh_suggestions(everyone=False, batch_size=200):
+    """Recompute stale users' suggestions, or every active user's. Returns the number of users refreshed."""
+    users = User.objects.filter(is_active=True).only('pk', 'craft_specialization').order_by('pk')
+    if not everyone:
+        users = users.filter(suggestions_refreshed_at__isnull=True)
+    now = timezone.now()
+    refreshed = 0
+    last_id = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return refreshed
+        for user in batch:
+            compute_suggestions(user, now=now)
+        refreshed += len(batch)
+        last_id = batch[-1].pk
+
+def _popular_crafters(user, limit):
+    # Before the first refresh: the most followed crafters the user does not follow yet
+    followees = Follow.objects.filter(follower_id=user.pk).values('following_id')
+    crafters = (User.objects.filter(is_active=True)
+                .exclude(pk=user.pk)
+                .exclude(pk__in=followees)
+                .order_by('-followers_count', '-pk')[:limit])
+    return [FollowSuggestion(user_id=user.pk, suggested=crafter, score=_popularity(crafter.followers_count))
+            for crafter in crafters]
+
+def suggested_crafters(user, limit):
+    """Return the user's stored suggestions, best first, with `suggested` loaded."""
+    suggestions = list(
+        FollowSuggestion.objects.filter(user_id=user.pk)
+        .select_related('suggested')
+        .order_by('-score', '-suggested_id')[:limit]
+    )
+    if not suggestions and user.suggestions_refreshed_at is None:
+        return _popular_crafters(user, limit)
+    return suggestions
+
+refresher = PeriodicJob(
+    'suggestions-refresher', refresh_suggestions, 'FOLLOW_SUGGESTION_REFRESH_INTERVAL', REFRESH_LOCK_KEY,
+)
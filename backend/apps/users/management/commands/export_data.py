@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.models import User
+from social_backend.export import DATASETS, FORMATS, export_chunks
+
+class Command(BaseCommand):
+    help = "Stream one dataset as NDJSON or CSV, for one crafter or the whole table"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--user', help="Username; exports the whole table when omitted")
+        parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--output', help="File to write; stdout when omitted")
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE)
+    
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']}")
+        chunks = export_chunks(options['dataset'], options['format'], user, options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['dataset']} to {options['output']}"))
\ No newline at end of file
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.users.follows import refresh_suggestions
+
+class Command(BaseCommand):
+    help = "Recompute follow suggestions for users whose follows changed since the last refresh"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='everyone',
+                            help="Recompute every active user, e.g. nightly for follows made by their followees")
+        parser.add_argument('--batch-size', type=int, default=200, help="Users loaded per batch")
+    
+    def handle(self, *args, **options):
+        refreshed = refresh_suggestions(everyone=options['everyone'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed suggestions for {refreshed} users"))
\ No newline at end of file
@@ -0,0 +1,101 @@
+# Generated by Django 5.0 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+    sides = {
+        'followers_count': 'following',
+        'following_count': 'follower',
+    }
+    User.objects.update(**{
+        field: Coalesce(Subquery(
+            Follow.objects.filter(**{side: OuterRef('pk')}).order_by().values(side)
+            .annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ), Value(0))
+        for field, side in sides.items()
+    })
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_avatar_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('mutual_count', models.PositiveIntegerField(default=0)),
+                ('same_specialization', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='users_follo_followe_3a2483_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='users_follo_followi_e01def_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='suggestions_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at', '-id'], name='users_follo_followe_f64d1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at', '-id'], name='users_follo_followi_20813a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-followers_count'], name='users_user_followe_7f43e6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['suggestions_refreshed_at'], name='users_user_suggest_a3a9ed_idx'),
+        ),
+        migrations.AddField(
+            model_name='followsuggestion',
+            name='suggested',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='followsuggestion',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='followsuggestion',
+            index=models.Index(fields=['user', '-score'], name='users_follo_user_id_ea5df3_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='followsuggestion',
+            unique_together={('user', 'suggested')},
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
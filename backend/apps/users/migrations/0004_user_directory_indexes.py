@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+USERNAME_PREFIX_INDEX = 'users_user_username_prefix_idx'
+
+
+def create_username_prefix_index(apps, schema_editor):
+    # username__istartswith: UPPER(username::text) LIKE 'X%' on PostgreSQL, a case-insensitive LIKE on SQLite
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {USERNAME_PREFIX_INDEX} '
+            f'ON users_user (UPPER(username::text) text_pattern_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {USERNAME_PREFIX_INDEX} ON users_user (username COLLATE NOCASE)'
+        )
+
+
+def drop_username_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {USERNAME_PREFIX_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_follow_graph'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='users_user_created_7b26de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['craft_specialization', '-created_at', '-id'], name='users_user_craft_s_1decd8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['location', '-created_at', '-id'], name='users_user_locatio_35e692_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_verified_crafter', '-created_at', '-id'], name='users_user_is_veri_e6fb50_idx'),
+        ),
+        migrations.RunPython(create_username_prefix_index, drop_username_prefix_index),
+    ]
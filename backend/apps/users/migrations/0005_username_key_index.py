@@ -0,0 +1,43 @@
+from django.db import migrations
+
+OLD_INDEX = 'users_user_username_prefix_idx'
+USERNAME_KEY_INDEX = 'users_user_username_key_idx'
+
+
+def create_username_key_index(apps, schema_editor):
+    # The expression apps.users.schema.username_key orders, seeks and prefix-matches on, plus the id tie-breaker
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {USERNAME_KEY_INDEX} '
+            f'ON users_user ((UPPER(username::text) COLLATE "C"), id)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {USERNAME_KEY_INDEX} ON users_user (username COLLATE NOCASE, id)'
+        )
+    if vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {OLD_INDEX}')
+
+
+def restore_username_prefix_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {OLD_INDEX} ON users_user (UPPER(username::text) text_pattern_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {OLD_INDEX} ON users_user (username COLLATE NOCASE)')
+    if vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {USERNAME_KEY_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_key_index, restore_username_prefix_index),
+    ]
@@ -1,11 +1,20 @@
 from django.contrib.auth.models import AbstractUser
+from django.conf import settings
 from django.db import models
+from social_backend.images import ImageSpec
 
 class User(AbstractUser):
+    COUNTER_FIELDS = ('followers_count', 'following_count')
+    
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Filled in by social_backend.images after upload
+    avatar_width = models.PositiveIntegerField(null=True, blank=True)
+    avatar_height = models.PositiveIntegerField(null=True, blank=True)
+    avatar_placeholder = models.CharField(max_length=64, blank=True)
+    avatar_renditions = models.JSONField(default=dict, blank=True)
     bio = models.TextField(max_length=500, blank=True)
     
     # Crafter-specific fields
@@ -14,12 +23,38 @@ class User(AbstractUser):
     website = models.URLField(max_length=200, blank=True)
     is_verified_crafter = models.BooleanField(default=False)
     
+    # Follow counters, maintained by apps.users.signals
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # None until apps.users.follows has (re)computed this user's FollowSuggestion rows
+    suggestions_refreshed_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-followers_count']),
+            models.Index(fields=['suggestions_refreshed_at']),
+            # The users connection: newest first, optionally filtered on one of these
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['craft_specialization', '-created_at', '-id']),
+            models.Index(fields=['location', '-created_at', '-id']),
+            models.Index(fields=['is_verified_crafter', '-created_at', '-id']),
+        ]
+    
     def __str__(self):
         return self.username
     
+    def save(self, *args, **kwargs):
+        # Counters only change through F() updates; never write back stale in-memory values
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username
@@ -32,9 +67,30 @@ class Follow(models.Model):
     class Meta:
         unique_together = ['follower', 'following']
         indexes = [
-            models.Index(fields=['follower']),
-            models.Index(fields=['following']),
+            # Also serve the newest-first follower and following lists
+            models.Index(fields=['follower', '-created_at', '-id']),
+            models.Index(fields=['following', '-created_at', '-id']),
+        ]
+    
+    def __str__(self):
+        return f"User {self.follower_id} follows user {self.following_id}"
+
+class FollowSuggestion(models.Model):
+    """A crafter precomputed for `user` to follow (see apps.users.follows)."""
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='follow_suggestions')
+    suggested = models.ForeignKey('User', on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    # How many of the user's followees follow the suggested crafter
+    mutual_count = models.PositiveIntegerField(default=0)
+    same_specialization = models.BooleanField(default=False)
+    
+    class Meta:
+        unique_together = ['user', 'suggested']
+        indexes = [
+            models.Index(fields=['user', '-score']),
         ]
     
     def __str__(self):
-        return f"{self.follower.username} follows {self.following.username}"
\ No newline at end of file
+        return f"{self.suggested_id} suggested to {self.user_id}"
+
+AVATAR_SPEC = ImageSpec(User, 'avatar', settings.AVATAR_RENDITIONS, prefix='avatar_')
\ No newline at end of file
@@ -1,28 +1,232 @@
 import graphene
+from graphene import relay
 from graphene_django import DjangoObjectType
-from .models import User
+from graphene_django.settings import graphene_settings
+from django.conf import settings
+from django.db import connections
+from django.db.models.functions import Collate, Upper
+from apps.posts.loaders import get_loaders, prime_users
+from social_backend.execution import sync_resolver, then
+from social_backend.images import rendition_fields
+from social_backend.pagination import (
+    DEFAULT_ORDERING, decode_cursor, encode_cursor, paginate_keyset, resolve_limit, seek_filter,
+)
+from .follows import follow, suggested_crafters, unfollow
+from .models import AVATAR_SPEC, Follow, User
+
+FOLLOW_ORDERING = ('-created_at', '-id')
+# Prefix searches page alphabetically, on the expression users_user_username_key_idx covers
+USERNAME_ORDERING = ('username_key', 'id')
+
+class ImageSize(graphene.Enum):
+    THUMBNAIL = 'thumbnail'
+    MEDIUM = 'medium'
+    LARGE = 'large'
+    ORIGINAL = 'original'
+
+class ImageType(graphene.ObjectType):
+    id = graphene.ID()
+    url = graphene.String(description="JPEG rendition, or the upload itself until it is processed")
+    webp_url = graphene.String()
+    width = graphene.Int()
+    height = graphene.Int()
+    placeholder = graphene.String(description="BlurHash to show while the image loads")
+    alt_text = graphene.String()
+
+def size_value(size):
+    # Graphene passes enum members to resolvers
+    return getattr(size, 'value', size)
 
 class UserType(DjangoObjectType):
+    avatar_image = graphene.Field(ImageType, size=ImageSize(default_value=ImageSize.MEDIUM.value))
+    is_following = graphene.Boolean(description="Whether the viewer follows this user")
+    follows_viewer = graphene.Boolean(description="Whether this user follows the viewer")
+    followers = graphene.Field('apps.users.schema.UserConnection', first=graphene.Int(), after=graphene.String())
+    following = graphene.Field('apps.users.schema.UserConnection', first=graphene.Int(), after=graphene.String())
+    
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'avatar', 'bio', 'created_at')
+        fields = (
+            'id', 'username', 'email', 'first_name', 'last_name', 'avatar', 'bio', 'craft_specialization',
+            'followers_count', 'following_count', 'created_at',
+        )
+    
+    def resolve_avatar_image(self, info, size):
+        return rendition_fields(AVATAR_SPEC, self, size_value(size))
+    
+    def resolve_is_following(self, info):
+        loader = get_loaders(info).follow_state
+        if loader is None:
+            return False
+        return then(loader.load(self.pk), lambda state: state[0])
+    
+    def resolve_follows_viewer(self, info):
+        loader = get_loaders(info).follow_state
+        if loader is None:
+            return False
+        return then(loader.load(self.pk), lambda state: state[1])
+    
+    @sync_resolver
+    def resolve_followers(self, info, first=None, after=None):
+        return _follow_connection(info, Follow.objects.filter(following=self), 'follower',
+                                  self.followers_count, first, after)
+    
+    @sync_resolver
+    def resolve_following(self, info, first=None, after=None):
+        return _follow_connection(info, Follow.objects.filter(follower=self), 'following',
+                                  self.following_count, first, after)
+
+class UserConnection(relay.Connection):
+    total_count = graphene.Int()
+    
+    class Meta:
+        node = UserType
+    
+    @sync_resolver
+    def resolve_total_count(self, info):
+        # The users query leaves its matches to count here, only when asked for
+        if self.total_count is None and getattr(self, 'matches', None) is not None:
+            self.total_count = self.matches.count()
+        return self.total_count
+
+def username_key(using):
+    """Case-insensitive username sort key, the expression of users_user_username_key_idx."""
+    if connections[using].vendor == 'sqlite':
+        return Collate('username', 'NOCASE')
+    # Byte order, so one index serves both the LIKE 'PREFIX%' range and the ORDER BY
+    return Collate(Upper('username'), 'C')
+
+def _follow_connection(info, follows, side, total_count, first, after):
+    """Users on one side of `follows`, most recently followed first, paged by the follow's cursor."""
+    limit = resolve_limit(first, max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+    if after:
+        follows = follows.filter(seek_filter(FOLLOW_ORDERING, decode_cursor(after, Follow, FOLLOW_ORDERING)))
+    rows = list(follows.select_related(side).order_by(*FOLLOW_ORDERING)[:limit + 1])
+    page = rows[:limit]
+    prime_users(info, [getattr(row, side) for row in page])
+    edges = [UserConnection.Edge(node=getattr(row, side), cursor=encode_cursor(row, FOLLOW_ORDERING)) for row in page]
+    return UserConnection(
+        edges=edges,
+        page_info=relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=bool(after),
+            has_next_page=len(rows) > limit,
+        ),
+        total_count=total_count,
+    )
+
+class SuggestedCrafterType(graphene.ObjectType):
+    user = graphene.Field(UserType, required=True)
+    mutual_count = graphene.Int(description="How many people the viewer follows also follow this crafter")
+    same_specialization = graphene.Boolean()
+    
+    def resolve_user(self, info):
+        return self.suggested
 
 class UserQuery(graphene.ObjectType):
     user = graphene.Field(UserType, id=graphene.ID())
-    users = graphene.List(UserType)
+    users = graphene.Field(
+        UserConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        craft_specialization=graphene.String(),
+        location=graphene.String(),
+        is_verified_crafter=graphene.Boolean(),
+        username_prefix=graphene.String(description="Case-insensitive; pages alphabetically by username"),
+    )
     me = graphene.Field(UserType)
+    suggested_crafters = graphene.List(SuggestedCrafterType, first=graphene.Int())
     
+    @sync_resolver
     def resolve_user(self, info, id):
         try:
             return User.objects.get(pk=id)
         except User.DoesNotExist:
             return None
     
-    def resolve_users(self, info):
-        return User.objects.all()
+    @sync_resolver
+    def resolve_users(self, info, first=None, after=None, username_prefix=None, **filters):
+        users = User.objects.filter(is_active=True, **{
+            field: value for field, value in filters.items() if value is not None
+        })
+        ordering = DEFAULT_ORDERING
+        if username_prefix:
+            users = users.annotate(username_key=username_key(users.db))
+            if connections[users.db].vendor == 'sqlite':
+                # Case-insensitive LIKE, which SQLite answers from the NOCASE index
+                users = users.filter(username__istartswith=username_prefix)
+            else:
+                users = users.filter(username_key__startswith=username_prefix.upper())
+            ordering = USERNAME_ORDERING
+        connection = paginate_keyset(
+            users, UserConnection, ordering, first=first, after=after,
+            max_limit=graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
+        )
+        connection.matches = users
+        prime_users(info, [edge.node for edge in connection.edges])
+        return connection
     
     def resolve_me(self, info):
         user = info.context.user
         if user.is_authenticated:
             return user
-        return None
\ No newline at end of file
+        return None
+    
+    @sync_resolver
+    def resolve_suggested_crafters(self, info, first=None):
+        user = info.context.user
+        if not user.is_authenticated:
+            return []
+        
+        limit = resolve_limit(first, max_limit=settings.FOLLOW_SUGGESTIONS_PER_USER)
+        suggestions = suggested_crafters(user, limit)
+        prime_users(info, [suggestion.suggested for suggestion in suggestions])
+        return suggestions
+
+def _parse_user_id(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+class FollowUser(graphene.Mutation):
+    class Arguments:
+        user_id = graphene.ID(required=True)
+    
+    success = graphene.Boolean()
+    user = graphene.Field(UserType)
+    
+    def mutate(self, info, user_id):
+        viewer = info.context.user
+        user_id = _parse_user_id(user_id)
+        if not viewer.is_authenticated or user_id is None:
+            return FollowUser(success=False, user=None)
+        
+        # Following twice is a no-op; following yourself fails
+        target = follow(viewer, user_id)[0]
+        if target is None:
+            return FollowUser(success=False, user=None)
+        return FollowUser(success=True, user=target)
+
+class UnfollowUser(graphene.Mutation):
+    class Arguments:
+        user_id = graphene.ID(required=True)
+    
+    success = graphene.Boolean()
+    user = graphene.Field(UserType)
+    
+    def mutate(self, info, user_id):
+        viewer = info.context.user
+        user_id = _parse_user_id(user_id)
+        if not viewer.is_authenticated or user_id is None:
+            return UnfollowUser(success=False, user=None)
+        
+        target = unfollow(viewer, user_id)[0]
+        if target is None:
+            return UnfollowUser(success=False, user=None)
+        return UnfollowUser(success=True, user=target)
+
+class UserMutation(graphene.ObjectType):
+    follow_user = FollowUser.Field()
+    unfollow_user = UnfollowUser.Field()
\ No newline at end of file
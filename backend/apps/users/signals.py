@@ -0,0 +1,35 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from social_backend.images import schedule, strip_upload
+from .models import AVATAR_SPEC, Follow, User
+
+@receiver(pre_save, sender=User)
+def strip_avatar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        strip_upload(AVATAR_SPEC, instance)
+
+@receiver(post_save, sender=User)
+def process_avatar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule(AVATAR_SPEC, instance)
+
+def _adjust_follow_counters(follow, delta):
+    if delta > 0:
+        following_count, followers_count = F('following_count') + delta, F('followers_count') + delta
+    else:
+        following_count = Greatest(F('following_count') + delta, 0)
+        followers_count = Greatest(F('followers_count') + delta, 0)
+    User.objects.filter(pk=follow.follower_id).update(following_count=following_count)
+    User.objects.filter(pk=follow.following_id).update(followers_count=followers_count)
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _adjust_follow_counters(instance, 1)
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counters(sender, instance, **kwargs):
+    # Also runs for admin deletes and cascades from User deletion
+    _adjust_follow_counters(instance, -1)
\ No newline at end of file
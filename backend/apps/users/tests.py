@@ -0,0 +1,57 @@
+import threading
+import time
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+from .follows import follow, unfollow
+from .models import Follow, User
+
+class FollowTests(TransactionTestCase):
+    def setUp(self):
+        self.crafter = User.objects.create_user(username='crafter', email='crafter@example.com')
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com')
+
+    def assertCounts(self, followers, following):
+        self.crafter.refresh_from_db()
+        self.fan.refresh_from_db()
+        self.assertEqual((self.crafter.followers_count, self.fan.following_count), (followers, following))
+
+    def test_following_twice_is_a_no_op(self):
+        self.assertEqual(follow(self.fan, self.crafter.pk)[1], True)
+        self.assertEqual(follow(self.fan, self.crafter.pk)[1], False)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertCounts(1, 1)
+
+        self.assertEqual(unfollow(self.fan, self.crafter.pk)[1], True)
+        self.assertCounts(0, 0)
+
+    def test_concurrent_follows_write_one_row(self):
+        start = threading.Barrier(6)
+        created, errors = [], []
+
+        def request():
+            start.wait()
+            try:
+                # SQLite allows one writer at a time and reports the others as locked; retry those
+                for attempt in range(100):
+                    try:
+                        created.append(follow(self.fan, self.crafter.pk)[1])
+                        break
+                    except OperationalError:
+                        if connection.vendor != 'sqlite' or attempt == 99:
+                            raise
+                        time.sleep(0.001)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(created), [False] * 5 + [True])
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertCounts(1, 1)
\ No newline at end of file
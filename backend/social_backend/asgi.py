@@ -0,0 +1,20 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_backend.settings')
+# Serve GraphQL through the async view unless explicitly turned off
+os.environ.setdefault('GRAPHQL_ASYNC', 'True')
+django_application = get_asgi_application()
+
+# Imported once Django is set up: the schema pulls in every app's models
+from .background import start_background_jobs  # noqa: E402
+from .subscriptions import SubscriptionServer  # noqa: E402
+
+subscription_application = SubscriptionServer()
+# Only server processes run the periodic jobs, not tests or management commands
+start_background_jobs()
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await subscription_application(scope, receive, send)
+    return await django_application(scope, receive, send)
\ No newline at end of file
@@ -0,0 +1,64 @@
+import weakref
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from social_backend.pooling import close_pool, get_pool
+
+# libpq's PQtransactionStatus values, the same under psycopg2 and psycopg 3
+TRANSACTION_IDLE = 0
+TRANSACTION_UNKNOWN = 4
+
+def give_back(pool, connection):
+    """Return a lent connection to the pool, or drop it when it is broken."""
+    try:
+        status = TRANSACTION_UNKNOWN if connection.closed else connection.info.transaction_status
+        if status == TRANSACTION_UNKNOWN:
+            return pool.discard(connection)
+        if status != TRANSACTION_IDLE:
+            # Closed mid-transaction, e.g. after an error: never lend that state
+            connection.rollback()
+    except Exception:
+        pool.discard(connection)
+        raise
+    pool.checkin(connection)
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would make DROP DATABASE fail
+        close_pool(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that borrows connections from a per-worker ConnectionPool."""
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Off for the maintenance connection; connections held for good (LISTEN) turn it off too
+        self.pooled = self.alias != NO_DB_ALIAS
+        self.pool = None
+        self._reclaim = None
+
+    def get_new_connection(self, conn_params):
+        if not self.pooled:
+            return super().get_new_connection(conn_params)
+        pool = get_pool(self.alias, self.settings_dict)
+        connection = pool.checkout(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        self.pool = pool
+        # A wrapper dropped without close(), e.g. with the thread of an ASGI request
+        # cancelled by a client disconnect, hands the connection back when collected
+        self._reclaim = weakref.finalize(self, give_back, pool, connection)
+        # The parent sets this only when it opens the connection
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        pool, self.pool = self.pool, None
+        self._reclaim.detach()
+        with self.wrap_database_errors:
+            give_back(pool, self.connection)
\ No newline at end of file
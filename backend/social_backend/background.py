@@ -0,0 +1,96 @@
+"""
+Periodic jobs on daemon threads: trending refreshes, follow suggestions and the
+interaction flusher.
+
+Only the server entry points (wsgi.py, asgi.py) call start_background_jobs(),
+so tests, migrations, shells and other management commands never run them.
+BACKGROUND_JOBS = False leaves them all to their management commands, e.g. for
+a dedicated cron worker.
+"""
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('social_backend.background')
+
+# Started by start_background_jobs()
+JOBS = (
+    'apps.posts.trending.refresher',
+    'apps.users.follows.refresher',
+    'apps.interactions.buffer.flusher',
+)
+
+class PeriodicJob:
+    """
+    Calls `function` every `interval_setting` seconds; an interval of 0 turns
+    the job off, as does a false `enabled_setting`. With a `lock_key`, only one
+    process runs it per interval when CACHES is shared. `run_at_exit` runs it
+    once more on a clean shutdown.
+    """
+
+    def __init__(self, name, function, interval_setting, lock_key=None, enabled_setting=None, run_at_exit=False):
+        self.name = name
+        self.function = function
+        self.interval_setting = interval_setting
+        self.lock_key = lock_key
+        self.enabled_setting = enabled_setting
+        self.run_at_exit = run_at_exit
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return getattr(settings, self.interval_setting)
+
+    @property
+    def enabled(self):
+        if self.enabled_setting and not getattr(settings, self.enabled_setting):
+            return False
+        return self.interval > 0
+
+    def run_once(self):
+        if self.lock_key and not cache.add(self.lock_key, 1, self.interval):
+            return
+        try:
+            self.function()
+        except Exception:
+            logger.exception("Background job %s failed", self.name)
+        finally:
+            connection.close()
+
+    def _run_forever(self):
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
+
+    def start(self):
+        """Start the thread unless it is running or turned off. Returns whether this call started it."""
+        if self._thread is not None or not self.enabled:
+            return False
+        with self._lock:
+            if self._thread is not None:
+                return False
+            if self.lock_key and isinstance(caches['default'], (LocMemCache, DummyCache)):
+                logger.warning(
+                    "CACHES is per process, so every worker runs %s; use a shared cache or "
+                    "BACKGROUND_JOBS=False with cron when running several", self.name,
+                )
+            self._thread = threading.Thread(target=self._run_forever, name=self.name, daemon=True)
+            self._thread.start()
+            if self.run_at_exit:
+                atexit.register(self.function)
+            return True
+
+def start_background_jobs():
+    """Start every job in JOBS in this process; call once the application is loaded."""
+    if not settings.BACKGROUND_JOBS:
+        return
+    for path in JOBS:
+        import_string(path).start()
\ No newline at end of file
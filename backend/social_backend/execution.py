@@ -0,0 +1,39 @@
+"""
+Helpers for resolvers that serve both the sync (WSGI) and async (ASGI) views.
+
+Under the async view, queries execute on the event loop. Per-post fields go
+through the async loaders. Anything that still uses the sync ORM must be handed
+to a worker thread, because Django raises SynchronousOnlyOperation otherwise.
+"""
+import functools
+import inspect
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+def is_async(info):
+    return getattr(info.context, 'graphql_async', False)
+
+def _evaluate(result):
+    # A lazy queryset handed back to the event loop would be evaluated there
+    return list(result) if isinstance(result, QuerySet) else result
+
+def run_sync(info, func, *args, **kwargs):
+    """Call a sync-ORM function, in a worker thread when executing asynchronously."""
+    if is_async(info):
+        return sync_to_async(lambda: _evaluate(func(*args, **kwargs)))()
+    return func(*args, **kwargs)
+
+def sync_resolver(resolver):
+    """Decorate a resolver that uses the sync ORM so it is safe under the async view."""
+    @functools.wraps(resolver)
+    def wrapper(root, info, **kwargs):
+        return run_sync(info, resolver, root, info, **kwargs)
+    return wrapper
+
+def then(value, callback):
+    """Apply callback to a loader result, awaiting it first when it is awaitable."""
+    if inspect.isawaitable(value):
+        async def chain():
+            return callback(await value)
+        return chain()
+    return callback(value)
@@ -0,0 +1,126 @@
+"""
+Streaming exports of a crafter's data, or of whole tables for analytics.
+
+Rows come from QuerySet.iterator(chunk_size=EXPORT_CHUNK_SIZE), a server-side
+cursor on PostgreSQL, and are written out one chunk at a time as NDJSON or
+CSV, so memory stays flat however large the export. Under ASGI the response
+gets an async iterator, since Django would buffer a sync one there in full.
+"""
+import csv
+import io
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from apps.interactions.models import Like, Comment, Share
+from apps.posts.models import Post
+from apps.users.models import Follow, User
+
+class Dataset:
+    def __init__(self, model, owner, fields):
+        self.model = model
+        # The field that ties a row to the crafter being exported
+        self.owner = owner
+        self.fields = fields
+        self.columns = [field.replace('__', '_') for field in fields]
+
+    def queryset(self, user=None):
+        queryset = self.model.objects.all()
+        if user is not None:
+            queryset = queryset.filter(**{self.owner: user})
+        return queryset.order_by('pk').values_list(*self.fields)
+
+DATASETS = {
+    'posts': Dataset(Post, 'author', (
+        'id', 'author_id', 'title', 'content', 'craft_category__name', 'materials_used', 'time_to_complete',
+        'price_range', 'is_for_sale', 'is_featured', 'likes_count', 'comments_count', 'shares_count',
+        'created_at', 'updated_at',
+    )),
+    'comments': Dataset(Comment, 'author', ('id', 'author_id', 'post_id', 'content', 'created_at', 'updated_at')),
+    'likes': Dataset(Like, 'user', ('id', 'user_id', 'post_id', 'created_at')),
+    'shares': Dataset(Share, 'user', ('id', 'user_id', 'post_id', 'created_at')),
+    'followers': Dataset(Follow, 'following', ('id', 'follower_id', 'follower__username', 'following_id', 'created_at')),
+    'following': Dataset(Follow, 'follower', ('id', 'follower_id', 'following_id', 'following__username', 'created_at')),
+}
+
+class NdjsonWriter:
+    content_type = 'application/x-ndjson'
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+    def header(self):
+        return ''
+
+    def rows(self, rows):
+        return ''.join(self.encoder.encode(dict(zip(self.columns, row))) + '\n' for row in rows)
+
+class CsvWriter:
+    content_type = 'text/csv'
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def header(self):
+        return self.rows([self.columns])
+
+    def rows(self, rows):
+        self.writer.writerows(rows)
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+FORMATS = {'ndjson': NdjsonWriter, 'csv': CsvWriter}
+
+def export_chunks(dataset, format, user=None, chunk_size=None):
+    """Yield `dataset` as text in `format`, `chunk_size` rows at a time; the whole table without `user`."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    writer = FORMATS[format](DATASETS[dataset].columns)
+    rows = DATASETS[dataset].queryset(user).iterator(chunk_size=chunk_size)
+    header = writer.header()
+    if header:
+        yield header
+    while chunk := list(islice(rows, chunk_size)):
+        yield writer.rows(chunk)
+
+async def aexport_chunks(*args, **kwargs):
+    # aiterator() runs values_list() queries on the event loop in Django 5.0, so step the sync
+    # generator instead; thread-sensitive calls all land on one thread and so one cursor
+    chunks = export_chunks(*args, **kwargs)
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield chunk
+
+@never_cache
+@require_GET
+def export_data(request, dataset):
+    """
+    The signed-in crafter's `dataset` as an NDJSON (default) or CSV download.
+    Staff may pass `?user=<username>` to export someone else's.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if dataset not in DATASETS:
+        return JsonResponse({'error': f"Unknown dataset; choose one of {', '.join(DATASETS)}"}, status=404)
+    format = request.GET.get('format', 'ndjson')
+    if format not in FORMATS:
+        return JsonResponse({'error': f"Unknown format; choose one of {', '.join(FORMATS)}"}, status=400)
+    user = request.user
+    username = request.GET.get('user')
+    if username and username != user.username:
+        if not user.is_staff:
+            return JsonResponse({'error': 'Only staff can export other users'}, status=403)
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            return JsonResponse({'error': f"No user named {username}"}, status=404)
+    chunks = aexport_chunks if isinstance(request, ASGIRequest) else export_chunks
+    response = StreamingHttpResponse(chunks(dataset, format, user), content_type=FORMATS[format].content_type)
+    response['Content-Disposition'] = f'attachment; filename="{user.username}-{dataset}.{format}"'
+    return response
\ No newline at end of file
@@ -0,0 +1,40 @@
+import hmac
+import time
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from .pooling import pool_stats
+
+def _may_see_details(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    token = settings.HEALTH_CHECK_TOKEN
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Health-Token', ''), token)
+
+@never_cache
+def database_health(request):
+    """
+    `SELECT 1` on every configured database. Staff and callers sending
+    HEALTH_CHECK_TOKEN also get the aliases, latencies and this worker's pool
+    counters; everyone else gets only the status.
+    """
+    databases = {}
+    healthy = True
+    for alias in connections:
+        started = time.perf_counter()
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            ok = True
+        except DatabaseError:
+            ok = healthy = False
+        databases[alias] = {'ok': ok, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+    body = {'status': 'ok' if healthy else 'unavailable'}
+    if _may_see_details(request):
+        for alias, counters in pool_stats().items():
+            if alias in databases:
+                databases[alias]['pool'] = counters
+        body['databases'] = databases
+    return JsonResponse(body, status=200 if healthy else 503)
\ No newline at end of file
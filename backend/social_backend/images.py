@@ -0,0 +1,165 @@
+"""
+Upload pipeline for image fields.
+
+A new upload loses its EXIF, XMP and text metadata (camera, GPS) before it is
+stored, so the original is safe to serve until its renditions exist. When an
+image field changes, its bytes are rendered in a process pool once the
+transaction commits (see renditions.py). The resulting JPEG/WebP files are
+saved next to each other in storage. Width, height, a BlurHash placeholder and
+the rendition paths are then written back with a queryset update, so the
+request thread never decodes an image.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.dispatch import Signal
+from .renditions import render_renditions, strip_metadata
+
+logger = logging.getLogger('social_backend.images')
+
+# Sent with sender=model and pk once an instance's renditions are stored
+renditions_ready = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+class ImageSpec:
+    """
+    An image field plus the columns its renditions are recorded in:
+    `<prefix>width`, `<prefix>height`, `<prefix>placeholder`, `<prefix>renditions`.
+    """
+
+    def __init__(self, model, field, widths, prefix=''):
+        self.model = model
+        self.field = field
+        self.widths = widths
+        self.prefix = prefix
+
+    def column(self, name):
+        return self.prefix + name
+
+    def needs_processing(self, instance):
+        image = getattr(instance, self.field)
+        renditions = getattr(instance, self.column('renditions')) or {}
+        return bool(image) and renditions.get('source') != image.name
+
+def get_executor():
+    global _executor
+    if settings.IMAGE_PROCESSING_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers only import Pillow; forking a threaded server is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+    return _executor
+
+def strip_upload(spec, instance):
+    """Remove metadata from a file assigned to the field but not yet saved to storage."""
+    image = getattr(instance, spec.field)
+    if not image or image._committed:
+        return
+    image.file.seek(0)
+    data = image.file.read()
+    stripped = strip_metadata(data)
+    if stripped is not data:
+        image.file = ContentFile(stripped, name=image.name)
+    else:
+        image.file.seek(0)
+
+def schedule(spec, instance):
+    """Render renditions for `instance` after the current transaction commits."""
+    if not spec.needs_processing(instance):
+        return
+    pk, source = instance.pk, getattr(instance, spec.field).name
+    transaction.on_commit(lambda: process(spec, pk, source))
+
+def _render(spec, data):
+    return render_renditions(data, spec.widths, settings.IMAGE_MAX_DIMENSION, settings.IMAGE_QUALITY)
+
+def process(spec, pk, source, wait=False):
+    try:
+        with default_storage.open(source, 'rb') as image_file:
+            data = image_file.read()
+    except OSError:
+        logger.exception("Could not read %s for %s %s", source, spec.model._meta.label, pk)
+        return
+
+    executor = get_executor()
+    if executor is None or wait:
+        store(spec, pk, source, _render(spec, data))
+        return
+    future = executor.submit(render_renditions, data, spec.widths, settings.IMAGE_MAX_DIMENSION,
+                             settings.IMAGE_QUALITY)
+    future.add_done_callback(lambda future: _store_future(spec, pk, source, future))
+
+def _store_future(spec, pk, source, future):
+    # Runs on the executor's management thread, which has its own DB connection
+    try:
+        store(spec, pk, source, future.result())
+    except Exception:
+        logger.exception("Rendering %s for %s %s failed", source, spec.model._meta.label, pk)
+    finally:
+        connection.close()
+
+def store(spec, pk, source, rendered):
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:10]
+    directory = f'renditions/{spec.model._meta.label_lower}/{pk}'
+    sizes = {}
+    for name, rendition in rendered['renditions'].items():
+        entry = {'width': rendition['width'], 'height': rendition['height']}
+        for key, extension in (('jpeg', 'jpg'), ('webp', 'webp')):
+            # The source digest in the name busts CDN caches when the upload is replaced
+            path = f'{directory}/{name}-{digest}.{extension}'
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            entry[key] = default_storage.save(path, ContentFile(rendition[key]))
+        sizes[name] = entry
+
+    # Skip the write if the field was replaced while this upload was rendering
+    updated = spec.model.objects.filter(pk=pk, **{spec.field: source}).update(**{
+        spec.column('width'): rendered['width'],
+        spec.column('height'): rendered['height'],
+        spec.column('placeholder'): rendered['placeholder'],
+        spec.column('renditions'): {'source': source, 'sizes': sizes},
+    })
+    if updated:
+        renditions_ready.send(sender=spec.model, pk=pk)
+    return updated
+
+def rendition_fields(spec, instance, size):
+    """
+    Fields for the GraphQL ImageType: the requested rendition, the largest one
+    when that size is not rendered, or the untouched upload while processing.
+    """
+    image = getattr(instance, spec.field)
+    if not image:
+        return None
+    renditions = getattr(instance, spec.column('renditions')) or {}
+    # Renditions of a replaced upload are stale until the new one is processed
+    sizes = (renditions.get('sizes') or {}) if renditions.get('source') == image.name else {}
+    rendition = sizes.get(size) or (max(sizes.values(), key=lambda entry: entry['width']) if sizes else None)
+    placeholder = getattr(instance, spec.column('placeholder')) or None
+    if rendition is None:
+        return {
+            'url': image.url,
+            'webp_url': None,
+            'width': getattr(instance, spec.column('width')),
+            'height': getattr(instance, spec.column('height')),
+            'placeholder': placeholder,
+        }
+    return {
+        'url': default_storage.url(rendition['jpeg']),
+        'webp_url': default_storage.url(rendition['webp']),
+        'width': rendition['width'],
+        'height': rendition['height'],
+        'placeholder': placeholder,
+    }
@@ -0,0 +1,162 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from graphene import relay
+from graphene_django.filter import DjangoFilterConnectionField
+from graphql import GraphQLError
+from .execution import run_sync
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+def _field_name(ordering_field):
+    return ordering_field.lstrip('-')
+
+def _reverse(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+def encode_values(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_values(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        raise GraphQLError(f"Invalid cursor: {cursor}")
+    return values
+
+def _model_field(model, name):
+    # None for an annotation, e.g. an index expression to order by; its value is stored as is
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+def encode_cursor(node, ordering):
+    values = []
+    for field in ordering:
+        model_field = _model_field(node, _field_name(field))
+        values.append(getattr(node, _field_name(field)) if model_field is None else model_field.value_to_string(node))
+    return encode_values(values)
+
+def decode_cursor(cursor, model, ordering):
+    values = decode_values(cursor, len(ordering))
+    try:
+        decoded = []
+        for field, value in zip(ordering, values):
+            model_field = _model_field(model, _field_name(field))
+            if model_field is None and not isinstance(value, (str, int, float)):
+                raise TypeError
+            decoded.append(value if model_field is None else model_field.to_python(value))
+        return decoded
+    except (ValueError, TypeError, ValidationError):
+        raise GraphQLError(f"Invalid cursor: {cursor}")
+
+def seek_filter(ordering, values):
+    """
+    Rows strictly after `values` in `ordering`, e.g. for ('-created_at', '-id'):
+    created_at <= c AND (created_at < c OR (created_at = c AND id < i)).
+    The leading bound keeps the lookup a range scan on the first column's index.
+    """
+    condition = Q()
+    for position, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{_field_name(field)}__{lookup}': values[position]})
+        for previous, value in zip(ordering[:position], values[:position]):
+            step &= Q(**{_field_name(previous): value})
+        condition |= step
+    leading = 'lte' if ordering[0].startswith('-') else 'gte'
+    return Q(**{f'{_field_name(ordering[0])}__{leading}': values[0]}) & condition
+
+def resolve_limit(first=None, last=None, max_limit=None):
+    if first is not None and last is not None:
+        raise GraphQLError("Pass either `first` or `last`, not both")
+    limit = first if first is not None else last
+    if limit is None:
+        limit = max_limit
+    if limit is not None and limit < 0:
+        raise GraphQLError("`first` and `last` must be positive")
+    if max_limit is not None and limit > max_limit:
+        raise GraphQLError(f"Requesting {limit} records exceeds the limit of {max_limit}")
+    return limit
+
+def connection_from_nodes(connection_type, nodes, ordering, has_previous_page=False, has_next_page=False):
+    edges = [connection_type.Edge(node=node, cursor=encode_cursor(node, ordering)) for node in nodes]
+    page_info = relay.PageInfo(
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+        has_previous_page=has_previous_page,
+        has_next_page=has_next_page,
+    )
+    return connection_type(edges=edges, page_info=page_info)
+
+def paginate_keyset(queryset, connection_type, ordering=DEFAULT_ORDERING, first=None, after=None,
+                    last=None, before=None, max_limit=None):
+    """Build a relay connection by seeking on `ordering` instead of OFFSET."""
+    limit = resolve_limit(first, last, max_limit)
+    model = queryset.model
+    backward = last is not None
+    if after:
+        queryset = queryset.filter(seek_filter(ordering, decode_cursor(after, model, ordering)))
+    if before:
+        reverse = _reverse(ordering)
+        queryset = queryset.filter(seek_filter(reverse, decode_cursor(before, model, ordering)))
+
+    queryset = queryset.order_by(*(_reverse(ordering) if backward else ordering))
+    nodes = list(queryset[:limit + 1]) if limit is not None else list(queryset)
+    has_more = limit is not None and len(nodes) > limit
+    nodes = nodes[:limit] if limit is not None else nodes
+    if backward:
+        nodes.reverse()
+
+    return connection_from_nodes(
+        connection_type,
+        nodes,
+        ordering,
+        has_previous_page=has_more if backward else bool(after),
+        has_next_page=bool(before) if backward else has_more,
+    )
+
+class KeysetConnectionField(DjangoFilterConnectionField):
+    """
+    DjangoFilterConnectionField that pages with (created_at, id) seek cursors,
+    so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, type_, *args, ordering=DEFAULT_ORDERING, **kwargs):
+        self.ordering = tuple(ordering)
+        super().__init__(type_, *args, **kwargs)
+        # Offsets are exactly what keyset pagination avoids
+        self._base_args.pop('offset', None)
+
+    def resolve_page(self, info, nodes):
+        return nodes
+
+    def wrap_resolve(self, parent_resolver):
+        queryset_resolver = self.get_queryset_resolver()
+
+        def resolve(root, info, **args):
+            iterable = parent_resolver(root, info, **args)
+            if iterable is None:
+                iterable = self.get_manager()
+            queryset = queryset_resolver(self.connection_type, iterable, info, args)
+            connection = paginate_keyset(
+                queryset,
+                self.connection_type,
+                self.ordering,
+                first=args.get('first'),
+                after=args.get('after'),
+                last=args.get('last'),
+                before=args.get('before'),
+                max_limit=self.max_limit,
+            )
+            self.resolve_page(info, [edge.node for edge in connection.edges])
+            return connection
+
+        def resolve_safely(root, info, **args):
+            # The filterset and the page query use the sync ORM
+            return run_sync(info, resolve, root, info, **args)
+
+        return resolve_safely
@@ -0,0 +1,87 @@
+"""
+Automatic persisted queries (the Apollo "APQ" protocol).
+
+Clients send `extensions.persistedQuery.sha256Hash` instead of the query text.
+Unknown hashes answer `PersistedQueryNotFound`, after which the client retries
+once with the full text so the server can register it. Query text is shared
+between workers through the Django cache; parsed, validated documents are kept
+per process so known operations skip parse and validate entirely.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, parse, validate
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+PERSISTED_QUERY_NOT_SUPPORTED = 'PersistedQueryNotSupported'
+CACHE_PREFIX = 'graphql:apq:'
+
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+def get_persisted_query_extension(request, data):
+    extensions = request.GET.get('extensions') or data.get('extensions')
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise GraphQLError("Extensions are invalid JSON.")
+    if not isinstance(extensions, dict):
+        return None
+    return extensions.get('persistedQuery')
+
+class PersistedQueryRegistry:
+    def __init__(self, max_documents=None):
+        self.max_documents = max_documents or settings.GRAPHQL_DOCUMENT_CACHE_SIZE
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, request, data, query):
+        """Return (hash, query text), registering or looking up persisted queries."""
+        persisted = get_persisted_query_extension(request, data)
+        if persisted is None:
+            return (query_hash(query) if query else None), query
+
+        if persisted.get('version') != 1 or not settings.GRAPHQL_PERSISTED_QUERIES:
+            raise GraphQLError(
+                PERSISTED_QUERY_NOT_SUPPORTED, extensions={'code': 'PERSISTED_QUERY_NOT_SUPPORTED'}
+            )
+        sha256 = persisted.get('sha256Hash')
+        if query:
+            if query_hash(query) != sha256:
+                raise GraphQLError("provided sha does not match query")
+            cache.set(CACHE_PREFIX + sha256, query, settings.GRAPHQL_PERSISTED_QUERY_TIMEOUT)
+            return sha256, query
+
+        query = cache.get(CACHE_PREFIX + sha256) if sha256 else None
+        if query is None:
+            raise GraphQLError(PERSISTED_QUERY_NOT_FOUND, extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+        return sha256, query
+
+    def get_document(self, schema, sha256, query):
+        """Return (document, errors), parsing and validating each distinct query once per process."""
+        with self._lock:
+            document = self._documents.get(sha256)
+            if document is not None:
+                self._documents.move_to_end(sha256)
+                return document, []
+
+        try:
+            document = parse(query)
+        except GraphQLError as error:
+            return None, [error]
+        errors = validate(schema, document, max_errors=graphene_settings.MAX_VALIDATION_ERRORS)
+        if errors:
+            return None, errors
+
+        with self._lock:
+            self._documents[sha256] = document
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return document, []
+
+registry = PersistedQueryRegistry()
@@ -0,0 +1,204 @@
+"""
+Per-worker database connection pool (DATABASE_CONNECTIONS = 'pool').
+
+Django opens a connection per thread and, with CONN_MAX_AGE = 0, closes it
+when the request ends. The pooled PostgreSQL backend
+(social_backend.backends.postgresql) lends connections from a ConnectionPool
+instead and takes them back on close, so requests skip the TCP, TLS and auth
+handshake. Connections never outlive a request in one thread, which keeps the
+pool safe under ASGI, where every request runs its sync ORM calls in a
+different thread.
+
+A connection idle for more than MAX_IDLE seconds is closed. One idle for more
+than CHECK_AFTER seconds runs `SELECT 1` before it is lent, and is replaced if
+that fails. At most MAX_SIZE connections are open per worker; a request that
+finds them all lent waits up to TIMEOUT seconds and then fails with
+PoolTimeout.
+"""
+import os
+import threading
+import time
+from collections import deque
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    'MAX_SIZE': 10,
+    'MAX_IDLE': 300,
+    'TIMEOUT': 10,
+    'CHECK_AFTER': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+class PoolTimeout(OperationalError):
+    pass
+
+class ConnectionPool:
+    def __init__(self, alias, name, max_size, max_idle, timeout, check_after):
+        self.alias = alias
+        self.name = name
+        self.pid = os.getpid()
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.check_after = check_after
+        # (connection, returned at), most recently returned on the right
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self.closed = False
+        self.stats = {
+            'connects': 0,
+            'reuses': 0,
+            'waits': 0,
+            'wait_ms': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'idle_closed': 0,
+            'discarded': 0,
+        }
+
+    def checkout(self, connect):
+        """Lend an idle connection, or open one with `connect()` while below MAX_SIZE."""
+        while True:
+            connection, idle_for = self._take()
+            if connection is None:
+                return self._open(connect)
+            if idle_for < self.check_after or self._is_usable(connection):
+                with self._condition:
+                    self.stats['reuses'] += 1
+                return connection
+            with self._condition:
+                self.stats['health_check_failures'] += 1
+            self.discard(connection)
+
+    def _take(self):
+        deadline = time.monotonic() + self.timeout
+        waited = None
+        with self._condition:
+            try:
+                while True:
+                    self._close_idle()
+                    if self._idle:
+                        # The most recently returned connection is the least likely to have gone stale
+                        connection, returned_at = self._idle.pop()
+                        return connection, time.monotonic() - returned_at
+                    if self._size < self.max_size:
+                        # Reserved now, opened outside the lock
+                        self._size += 1
+                        return None, 0
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No connection to '{self.alias}' became free within {self.timeout}s "
+                            f"({self.max_size} open)"
+                        )
+                    if waited is None:
+                        waited = time.monotonic()
+                        self.stats['waits'] += 1
+                    self._condition.wait(remaining)
+            finally:
+                if waited is not None:
+                    self.stats['wait_ms'] += (time.monotonic() - waited) * 1000
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.stats['connects'] += 1
+        return connection
+
+    def _is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not getattr(connection, 'autocommit', True):
+                connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_idle(self):
+        # Oldest on the left; called with the lock held
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            connection = self._idle.popleft()[0]
+            self._size -= 1
+            self.stats['idle_closed'] += 1
+            self._close(connection)
+
+    def checkin(self, connection):
+        with self._condition:
+            if not self.closed:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+        # Lent before the pool was closed
+        self._close(connection)
+
+    def discard(self, connection):
+        """Close a lent connection for good and free its slot."""
+        self._close(connection)
+        with self._condition:
+            self._size -= 1
+            self.stats['discarded'] += 1
+            self._condition.notify()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            while self._idle:
+                self._close(self._idle.pop()[0])
+                self._size -= 1
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                **self.stats,
+                'wait_ms': round(self.stats['wait_ms'], 1),
+            }
+
+def get_pool(alias, settings_dict):
+    name = settings_dict['NAME']
+    pool = _pools.get(alias)
+    if pool is not None and pool.name == name and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.name != name or pool.pid != os.getpid():
+            if pool is not None and pool.pid == os.getpid():
+                # The database was switched, e.g. to the test database
+                pool.close()
+            # A pool inherited through fork() is dropped without closing the parent's sockets
+            options = {**DEFAULTS, **settings_dict.get('POOL', {})}
+            pool = _pools[alias] = ConnectionPool(
+                alias, name, options['MAX_SIZE'], options['MAX_IDLE'], options['TIMEOUT'], options['CHECK_AFTER'],
+            )
+        return pool
+
+def close_pool(alias):
+    with _pools_lock:
+        pool = _pools.pop(alias, None)
+    if pool is not None and pool.pid == os.getpid():
+        pool.close()
+
+def pool_stats():
+    """{alias: counters} for this worker's pools."""
+    return {alias: pool.snapshot() for alias, pool in list(_pools.items()) if pool.pid == os.getpid()}
\ No newline at end of file
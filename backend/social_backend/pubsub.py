@@ -0,0 +1,172 @@
+"""
+Publish/subscribe for GraphQL subscriptions (SUBSCRIPTION_BROKER).
+
+Events are (topic, payload) pairs with JSON-serializable payloads. They are
+published from sync code once a transaction commits, and consumed by
+subscription resolvers on the ASGI event loop.
+
+'memory' only reaches subscribers connected to the same process. 'postgres'
+relays every event through LISTEN/NOTIFY, so all workers see them. Any other
+value is imported as a broker class with the same publish/subscribe interface.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('social_backend.pubsub')
+
+class Subscriber:
+    def __init__(self, loop, max_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(max_size)
+
+    def put(self, payload):
+        if self.queue.full():
+            # A slow client loses its oldest event rather than holding the others back
+            self.queue.get_nowait()
+        self.queue.put_nowait(payload)
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        for topic, payload in events:
+            self.deliver(topic, payload)
+
+    def deliver(self, topic, payload):
+        """Hand an event to this process's subscribers; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, payload)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down
+                pass
+
+    def listen(self):
+        pass
+
+    async def subscribe(self, topics):
+        """Yield the payload of every event published to `topics` until closed."""
+        self.listen()
+        subscriber = Subscriber(asyncio.get_running_loop(), settings.SUBSCRIPTION_QUEUE_SIZE)
+        with self._lock:
+            for topic in topics:
+                self._subscribers[topic].add(subscriber)
+        try:
+            while True:
+                yield await subscriber.queue.get()
+        finally:
+            with self._lock:
+                for topic in topics:
+                    self._subscribers[topic].discard(subscriber)
+                    if not self._subscribers[topic]:
+                        del self._subscribers[topic]
+
+class PostgresBroker(InProcessBroker):
+    """Relays events through NOTIFY on one channel; each process LISTENs once it has subscribers."""
+
+    channel = 'graphql_events'
+    # PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+    max_payload = 7500
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, events):
+        with connection.cursor() as cursor:
+            for payload in self._chunks(events):
+                cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def _chunks(self, events):
+        chunk, size = [], 2
+        for event in events:
+            encoded = json.dumps(event)
+            if chunk and size + len(encoded) + 1 > self.max_payload:
+                yield f"[{','.join(chunk)}]"
+                chunk, size = [], 2
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        if chunk:
+            yield f"[{','.join(chunk)}]"
+
+    def listen(self):
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen_forever, name='pubsub-listener', daemon=True)
+                self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Listening for %s notifications failed", self.channel)
+                time.sleep(1)
+
+    def _listen(self):
+        database = connections.create_connection(DEFAULT_DB_ALIAS)
+        # Held for good and left LISTENing, so never borrowed from the connection pool
+        database.pooled = False
+        try:
+            database.ensure_connection()
+            raw = database.connection
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.channel}')
+            while True:
+                if not select.select([raw], [], [], 5)[0]:
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    for topic, payload in json.loads(raw.notifies.pop(0).payload):
+                        self.deliver(topic, payload)
+        finally:
+            database.close()
+
+BROKERS = {
+    'memory': InProcessBroker,
+    'postgres': PostgresBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                name = settings.SUBSCRIPTION_BROKER
+                broker_class = BROKERS[name] if name in BROKERS else import_string(name)
+                _broker = broker_class()
+    return _broker
+
+def publish(events):
+    """Publish [(topic, payload), ...] once the current transaction commits."""
+    events = list(events)
+    if not events:
+        return
+
+    def send():
+        try:
+            get_broker().publish(events)
+        except Exception:
+            # Live updates are best effort; the write they describe has committed
+            logger.exception("Publishing %d events failed", len(events))
+    transaction.on_commit(send)
+
+def subscribe(topics):
+    return get_broker().subscribe(list(topics))
@@ -0,0 +1,223 @@
+"""
+Pillow-only image rendering. Nothing here touches Django, so it can run in a
+spawned worker process.
+"""
+import io
+import math
+import zlib
+from PIL import Image, ImageOps
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+FORMATS = (
+    ('jpeg', 'JPEG', {'optimize': True, 'progressive': True}),
+    ('webp', 'WEBP', {'method': 4}),
+)
+
+def _base83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+def _to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+def _to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def _signed_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+def blurhash(image, x_components=4, y_components=3):
+    """Encode a BlurHash (https://blurha.sh) placeholder for an RGB image."""
+    image = image.copy()
+    image.thumbnail((32, 32))
+    width, height = image.size
+    pixels = [tuple(_to_linear(channel) for channel in pixel) for pixel in image.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                basis_y = math.cos(math.pi * j * y / height)
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * basis_y
+                    r, g, b = pixels[y * width + x]
+                    red += basis * r
+                    green += basis * g
+                    blue += basis * b
+            scale = 1 / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        quantised_max = max(0, min(82, math.floor(max(abs(v) for f in ac for v in f) * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1
+        result += _base83(0, 1)
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+
+    def quantise(value):
+        return max(0, min(18, math.floor(_signed_pow(value / maximum, 0.5) * 9 + 9.5)))
+
+    for r, g, b in ac:
+        result += _base83(quantise(r) * 19 * 19 + quantise(g) * 19 + quantise(b), 2)
+    return result
+
+def _flatten(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def _encode(image, image_format, quality, options):
+    buffer = io.BytesIO()
+    # No exif= argument: metadata from the upload is never written back
+    image.save(buffer, image_format, quality=quality, **options)
+    return buffer.getvalue()
+
+def render_renditions(data, widths, max_dimension, quality):
+    """
+    Decode an upload, apply its EXIF orientation and render JPEG and WebP
+    renditions for `widths` ({name: width}; None keeps the full size, capped at
+    `max_dimension`). Returns the oriented size, a placeholder and the encoded
+    renditions.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = _flatten(ImageOps.exif_transpose(source))
+    width, height = image.size
+
+    renditions = {}
+    for name, target in widths.items():
+        if target is None:
+            scale = min(1, max_dimension / max(width, height))
+        else:
+            scale = min(1, target / width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+        rendition = {'width': size[0], 'height': size[1]}
+        for key, image_format, options in FORMATS:
+            rendition[key] = _encode(resized, image_format, quality, options)
+        renditions[name] = rendition
+
+    return {
+        'width': width,
+        'height': height,
+        'placeholder': blurhash(image),
+        'renditions': renditions,
+    }
+
+# Metadata stripping works on the encoded bytes, so the original keeps its exact pixels
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_METADATA_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'eXIf', b'tIME'}
+# APP1 (EXIF, XMP), APP3-APP13 (IPTC among them), APP15 and comments; APP0 (JFIF),
+# APP2 (ICC profile) and APP14 (Adobe colour transform) affect how the image decodes
+JPEG_METADATA_MARKERS = {0xE1, *range(0xE3, 0xEE), 0xEF, 0xFE}
+EXIF_ORIENTATION = 0x0112
+
+def _orientation_exif(payload):
+    # Keep only the orientation, which renderers and browsers need to show the image upright;
+    # the result is the TIFF block without the "Exif" header, or empty
+    try:
+        exif = Image.Exif()
+        exif.load(payload)
+        orientation = exif.get(EXIF_ORIENTATION)
+    except Exception:
+        return b''
+    if orientation in (None, 1):
+        return b''
+    kept = Image.Exif()
+    kept[EXIF_ORIENTATION] = orientation
+    return kept.tobytes()[6:]
+
+def _strip_jpeg(data):
+    parts = [data[:2]]
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return data
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == 0xDA:
+            # Scan data to the end of the image; anything appended after it (e.g. multi-picture
+            # thumbnails with their own EXIF) is dropped
+            end = data.find(b'\xff\xd9', position)
+            parts.append(data[position:] if end < 0 else data[position:end + 2])
+            return b''.join(parts)
+        length = int.from_bytes(data[position + 2:position + 4], 'big')
+        segment = data[position:position + 2 + length]
+        if marker == 0xE1 and segment[4:10] == b'Exif\x00\x00':
+            exif = _orientation_exif(segment[4:])
+            if exif:
+                parts.append(b'\xff\xe1' + (len(exif) + 8).to_bytes(2, 'big') + b'Exif\x00\x00' + exif)
+        elif marker == 0xE2 and segment[4:8] == b'MPF\x00':
+            pass
+        elif marker not in JPEG_METADATA_MARKERS:
+            parts.append(segment)
+        position += 2 + length
+    return data
+
+def _strip_png(data):
+    parts = [PNG_SIGNATURE]
+    position = len(PNG_SIGNATURE)
+    while position + 12 <= len(data):
+        length = int.from_bytes(data[position:position + 4], 'big')
+        chunk_type = data[position + 4:position + 8]
+        end = position + 12 + length
+        if chunk_type == b'eXIf':
+            exif = _orientation_exif(data[position + 8:end - 4])
+            if exif:
+                parts.append(len(exif).to_bytes(4, 'big') + b'eXIf' + exif
+                             + zlib.crc32(b'eXIf' + exif).to_bytes(4, 'big'))
+        elif chunk_type not in PNG_METADATA_CHUNKS:
+            parts.append(data[position:end])
+        position = end
+        if chunk_type == b'IEND':
+            return b''.join(parts)
+    return data
+
+def _strip_webp(data):
+    chunks = []
+    exif = b''
+    position = 12
+    while position + 8 <= len(data):
+        chunk_type = data[position:position + 4]
+        length = int.from_bytes(data[position + 4:position + 8], 'little')
+        end = position + 8 + length + (length & 1)
+        if chunk_type == b'EXIF':
+            exif = _orientation_exif(data[position + 8:position + 8 + length])
+        elif chunk_type != b'XMP ':
+            chunks.append(data[position:end])
+        position = end
+    if chunks and chunks[0][:4] == b'VP8X':
+        # The "has EXIF" and "has XMP" flags must match the chunks that are left
+        flags = chunks[0][8] & ~0x0C | (0x08 if exif else 0)
+        chunks[0] = chunks[0][:8] + bytes([flags]) + chunks[0][9:]
+        if exif:
+            chunks.append(b'EXIF' + len(exif).to_bytes(4, 'little') + exif + b'\x00' * (len(exif) & 1))
+    body = b'WEBP' + b''.join(chunks)
+    return b'RIFF' + len(body).to_bytes(4, 'little') + body
+
+def strip_metadata(data):
+    """
+    Drop EXIF (camera, GPS), XMP, IPTC and text metadata from a JPEG, PNG or
+    WebP without re-encoding it; only the orientation tag is kept. Other
+    formats, and files that do not parse, are returned unchanged.
+    """
+    if data[:2] == b'\xff\xd8':
+        return _strip_jpeg(data)
+    if data[:8] == PNG_SIGNATURE:
+        return _strip_png(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _strip_webp(data)
+    return data
\ No newline at end of file
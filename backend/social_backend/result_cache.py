@@ -0,0 +1,108 @@
+"""
+Shared result cache for anonymous reads of feed and category root fields.
+
+Entries are keyed by the query hash, operation name, variables, viewer class and
+the current version of every tag the operation depends on. Invalidation swaps a
+tag's version for a fresh token, so stale entries are simply never read again and
+expire on their own. Writers invalidate after commit: a swap inside their
+transaction would let a concurrent read cache the old rows under the new version.
+"""
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from graphql import FieldNode, OperationType, Undefined, value_from_ast_untyped
+
+VERSION_PREFIX = 'graphql:result-version:'
+RESULT_PREFIX = 'graphql:result:'
+
+# Root field -> tags its result depends on
+CACHEABLE_ROOT_FIELDS = {
+    'craftCategories': ('categories',),
+    'featuredPosts': ('posts', 'categories'),
+    'posts': ('posts', 'categories'),
+    'trendingPosts': ('trending', 'posts', 'categories'),
+}
+# Connections only cache their first page
+PAGED_ROOT_FIELDS = {'featuredPosts', 'posts', 'trendingPosts'}
+
+def viewer_class(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    # Authenticated results carry per-viewer state such as isLiked
+    return None
+
+def _root_tags(operation, variables):
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+    tags = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value not in CACHEABLE_ROOT_FIELDS:
+            return None
+        name = selection.name.value
+        if name in PAGED_ROOT_FIELDS:
+            for argument in selection.arguments:
+                if argument.name.value not in ('after', 'before', 'last'):
+                    continue
+                if value_from_ast_untyped(argument.value, variables) not in (None, Undefined):
+                    return None
+        tags.update(CACHEABLE_ROOT_FIELDS[name])
+    return tags
+
+def _versions(tags):
+    keys = [VERSION_PREFIX + tag for tag in sorted(tags)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+def result_cache_key(request, operation, sha256, operation_name, variables):
+    """Return the cache key for a cacheable operation, or None."""
+    if not settings.GRAPHQL_RESULT_CACHE_SECONDS:
+        return None
+    viewer = viewer_class(request)
+    if viewer is None:
+        return None
+    tags = _root_tags(operation, variables or {})
+    if not tags:
+        return None
+    raw = json.dumps(
+        [sha256, operation_name, variables or {}, viewer, _versions(tags)],
+        sort_keys=True,
+        default=str,
+    )
+    return RESULT_PREFIX + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def get_cached_result(key):
+    return cache.get(key)
+
+def set_cached_result(key, data):
+    cache.set(key, data, settings.GRAPHQL_RESULT_CACHE_SECONDS)
+
+def invalidate(*tags):
+    cache.set_many({VERSION_PREFIX + tag: uuid.uuid4().hex for tag in tags}, None)
+
+class _PendingInvalidation:
+    def __init__(self, tags):
+        self.tags = set(tags)
+
+    def __call__(self):
+        invalidate(*self.tags)
+
+def invalidate_on_commit(*tags):
+    """
+    invalidate() once the current transaction commits, or right away outside one.
+    Every write of a transaction shares one swap, so a cascade of thousands of
+    rows costs a single cache write.
+    """
+    connection = transaction.get_connection()
+    for savepoint_ids, callback, robust in connection.run_on_commit:
+        if isinstance(callback, _PendingInvalidation):
+            callback.tags.update(tags)
+            return
+    transaction.on_commit(_PendingInvalidation(tags), robust=True)
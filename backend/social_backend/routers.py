@@ -0,0 +1,133 @@
+"""
+Read replicas with read-your-writes (DATABASE_REPLICA_URLS).
+
+ReplicaRouter sends writes, and reads inside a transaction, to `default` and
+other reads to a replica picked once per request. GraphQL mutations run with
+the request pinned to the primary, and so does the rest of any request that
+wrote. Such a response sets REPLICA_PIN_COOKIE for REPLICA_PIN_SECONDS; while
+a client sends it back, all its reads stay on the primary, so it never reads a
+replica that has not caught up with its own writes. Other clients may see a
+write up to the replication lag late.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+class RoutingState:
+    """Shared by reference, so writes made in sync_to_async threads pin the request too."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+    @property
+    def on_primary(self):
+        return self.pinned or self.wrote
+
+@contextmanager
+def use_primary(writes=False):
+    """
+    Route every read in the block to the primary. `writes` also pins the rest
+    of the request and the client, for blocks that may write through raw SQL,
+    which the router never sees.
+    """
+    state = _state.get()
+    token = None
+    if state is None:
+        state = RoutingState()
+        token = _state.set(state)
+    pinned, state.pinned = state.pinned, True
+    state.wrote = state.wrote or writes
+    try:
+        yield state
+    finally:
+        state.pinned = pinned
+        if token is not None:
+            _state.reset(token)
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return None
+        state = _state.get()
+        if (state is not None and state.on_primary) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related objects come from wherever the instance was read
+            return instance._state.db
+        if state is None:
+            return random.choice(replicas)
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+class ReplicaPinningMiddleware:
+    """Tracks whether a request wrote and keeps recent writers on the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, state, response)
+
+    def pin(self, request, state, response):
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
\ No newline at end of file
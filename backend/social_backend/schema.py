@@ -1,12 +1,16 @@
 import graphene
-from apps.users.schema import UserQuery
+from apps.users.schema import UserQuery, UserMutation
 from apps.posts.schema import PostQuery, PostMutation
-from apps.interactions.schema import InteractionMutation
+from apps.interactions.schema import InteractionMutation, InteractionSubscription
+from apps.feed.schema import FeedQuery, FeedSubscription
 
-class Query(UserQuery, PostQuery, graphene.ObjectType):
+class Query(UserQuery, PostQuery, FeedQuery, graphene.ObjectType):
     pass
 
-class Mutation(PostMutation, InteractionMutation, graphene.ObjectType):
+class Mutation(UserMutation, PostMutation, InteractionMutation, graphene.ObjectType):
     pass
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+class Subscription(InteractionSubscription, FeedSubscription, graphene.ObjectType):
+    pass
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +29,8 @@ LOCAL_APPS = [
     'apps.users',
     'apps.posts',
     'apps.interactions',
+    'apps.feed',
+    'apps.benchmarks',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -37,6 +39,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'social_backend.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,6 +67,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'social_backend.wsgi.application'
+ASGI_APPLICATION = 'social_backend.asgi.application'
 
 # Database
 # Use DATABASE_URL if available (for cloud deployments)
@@ -92,6 +96,53 @@ else:
         }
     }
 
+# Read replicas: comma-separated database URLs. Reads go to a replica unless the
+# client wrote within the last REPLICA_PIN_SECONDS; writes always go to default.
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica{index}'] = dict(dj_database_url.parse(replica_url), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['social_backend.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+REPLICA_PIN_COOKIE = 'db_pin'
+
+# Connection reuse for PostgreSQL. 'pool' lends connections from a per-worker pool
+# for each request and is safe under ASGI; 'persistent' keeps each thread's
+# connection for DATABASE_CONN_MAX_AGE seconds (sync WSGI workers only); 'none'
+# connects per request.
+DATABASE_CONNECTIONS = config('DATABASE_CONNECTIONS', default='pool')
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=600, cast=int)
+DATABASE_POOL = {
+    'MAX_SIZE': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+    'MAX_IDLE': config('DATABASE_POOL_MAX_IDLE', default=300, cast=int),
+    'TIMEOUT': config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+    'CHECK_AFTER': config('DATABASE_POOL_CHECK_AFTER', default=30, cast=int),
+}
+for database in DATABASES.values():
+    database['CONN_HEALTH_CHECKS'] = True
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    if DATABASE_CONNECTIONS == 'pool':
+        # CONN_MAX_AGE = 0 hands the connection back to the pool when the request ends
+        database.update(ENGINE='social_backend.backends.postgresql', CONN_MAX_AGE=0, POOL=DATABASE_POOL)
+    elif DATABASE_CONNECTIONS == 'persistent':
+        database['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+
+# /health/db/ shows aliases, latencies and pool counters only to staff or to requests sending
+# this value in X-Health-Token; everyone else gets just the status
+HEALTH_CHECK_TOKEN = config('HEALTH_CHECK_TOKEN', default='')
+
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached
+# in production so every worker shares persisted queries and cached results.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='social-backend'),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,11 +179,89 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # GraphQL settings
 GRAPHENE = {
     'SCHEMA': 'social_backend.schema.schema',
-    # 'MIDDLEWARE': [
-    #     'graphql_jwt.middleware.JSONWebTokenMiddleware',
-    # ],
+    'MIDDLEWARE': [
+        # 'graphql_jwt.middleware.JSONWebTokenMiddleware',
+        'social_backend.tracing.TracingMiddleware',
+    ],
 }
 
+# Resolver timing and SQL accounting, logged per operation; with the header set, staff
+# (anyone under DEBUG) also get the trace in the response extensions
+GRAPHQL_TRACING = config('GRAPHQL_TRACING', default=True, cast=bool)
+GRAPHQL_TRACE_HEADER = 'X-GraphQL-Trace'
+
+# Serve /graphql/ with the async view (set by social_backend.asgi)
+GRAPHQL_ASYNC = config('GRAPHQL_ASYNC', default=False, cast=bool)
+
+# Static query cost limits, checked before execution
+GRAPHQL_MAX_QUERY_COST = config('GRAPHQL_MAX_QUERY_COST', default=5000, cast=int)
+GRAPHQL_MAX_QUERY_DEPTH = config('GRAPHQL_MAX_QUERY_DEPTH', default=10, cast=int)
+# Assumed size of list fields that take no `first`/`last` argument
+GRAPHQL_DEFAULT_LIST_SIZE = config('GRAPHQL_DEFAULT_LIST_SIZE', default=50, cast=int)
+
+# Largest list accepted by bulkCreatePosts/bulkUpdatePosts/bulkDeletePosts
+GRAPHQL_BULK_MUTATION_MAX_ITEMS = config('GRAPHQL_BULK_MUTATION_MAX_ITEMS', default=500, cast=int)
+
+# Automatic persisted queries: query text is shared through CACHES, parsed documents per process
+GRAPHQL_PERSISTED_QUERIES = config('GRAPHQL_PERSISTED_QUERIES', default=True, cast=bool)
+GRAPHQL_PERSISTED_QUERY_TIMEOUT = config('GRAPHQL_PERSISTED_QUERY_TIMEOUT', default=60 * 60 * 24 * 30, cast=int)
+GRAPHQL_DOCUMENT_CACHE_SIZE = config('GRAPHQL_DOCUMENT_CACHE_SIZE', default=500, cast=int)
+# Shared result cache for anonymous feed and category queries (0 disables it)
+GRAPHQL_RESULT_CACHE_SECONDS = config('GRAPHQL_RESULT_CACHE_SECONDS', default=60, cast=int)
+# Cache-Control max-age for anonymous GET queries
+GRAPHQL_GET_CACHE_SECONDS = config('GRAPHQL_GET_CACHE_SECONDS', default=30, cast=int)
+
+# Image renditions, name -> width in pixels (None keeps the full size up to IMAGE_MAX_DIMENSION)
+POST_IMAGE_RENDITIONS = {'thumbnail': 320, 'medium': 720, 'large': 1280, 'original': None}
+AVATAR_RENDITIONS = {'thumbnail': 64, 'medium': 128, 'large': 256}
+IMAGE_MAX_DIMENSION = config('IMAGE_MAX_DIMENSION', default=2560, cast=int)
+IMAGE_QUALITY = config('IMAGE_QUALITY', default=80, cast=int)
+# Worker processes rendering uploads; 0 renders inline on the committing thread
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+
+# Periodic jobs run on daemon threads in server processes started through wsgi.py/asgi.py (see
+# social_backend.background); tests and management commands never start them. False leaves them
+# to cron: refresh_trending, refresh_suggestions and flush_interactions
+BACKGROUND_JOBS = config('BACKGROUND_JOBS', default=True, cast=bool)
+
+# Write-behind buffer for like/share taps: '' writes through, 'memory' buffers per process,
+# 'cache' buffers in CACHES so all workers share it
+INTERACTION_BUFFER = config('INTERACTION_BUFFER', default='')
+INTERACTION_FLUSH_INTERVAL = config('INTERACTION_FLUSH_INTERVAL', default=2.0, cast=float)
+
+# Trending posts: window -> (length, half-life) in seconds; scores are refreshed every
+# TRENDING_REFRESH_INTERVAL seconds by one worker (0 leaves it to `manage.py refresh_trending`)
+TRENDING_WINDOWS = {'day': (24 * 3600, 6 * 3600), 'week': (7 * 24 * 3600, 36 * 3600)}
+TRENDING_WEIGHTS = {'like': 1.0, 'comment': 3.0, 'share': 4.0}
+TRENDING_REFRESH_INTERVAL = config('TRENDING_REFRESH_INTERVAL', default=60, cast=int)
+
+# GraphQL subscriptions: 'memory' reaches subscribers in the same process, 'postgres' relays
+# events through LISTEN/NOTIFY to every worker; any other value is a broker class path
+SUBSCRIPTION_BROKER = config('SUBSCRIPTION_BROKER', default='memory')
+SUBSCRIPTION_QUEUE_SIZE = config('SUBSCRIPTION_QUEUE_SIZE', default=100, cast=int)
+SUBSCRIPTION_MAX_PER_CONNECTION = config('SUBSCRIPTION_MAX_PER_CONNECTION', default=20, cast=int)
+SUBSCRIPTION_INIT_TIMEOUT = config('SUBSCRIPTION_INIT_TIMEOUT', default=10, cast=float)
+
+# Home feed settings
+# Authors with more followers than this are pulled on read instead of fanned out on write
+FEED_FANOUT_MAX_FOLLOWERS = config('FEED_FANOUT_MAX_FOLLOWERS', default=5000, cast=int)
+FEED_MAX_ENTRIES = config('FEED_MAX_ENTRIES', default=1000, cast=int)
+FEED_BACKFILL_PER_AUTHOR = config('FEED_BACKFILL_PER_AUTHOR', default=50, cast=int)
+FEED_HIGH_FANOUT_CACHE_SECONDS = config('FEED_HIGH_FANOUT_CACHE_SECONDS', default=600, cast=int)
+
+# Follow suggestions: friends-of-friends plus a craft_specialization match, stored per user and
+# recomputed for users whose follows changed every FOLLOW_SUGGESTION_REFRESH_INTERVAL seconds
+# (0 leaves it to `manage.py refresh_suggestions`)
+FOLLOW_SUGGESTIONS_PER_USER = config('FOLLOW_SUGGESTIONS_PER_USER', default=20, cast=int)
+FOLLOW_SUGGESTION_SPECIALIZATION_WEIGHT = 2.0
+FOLLOW_SUGGESTION_REFRESH_INTERVAL = config('FOLLOW_SUGGESTION_REFRESH_INTERVAL', default=30, cast=int)
+
+# Admin changelists count exactly up to this many rows, then estimate (see social_backend.admin)
+ADMIN_COUNT_LIMIT = config('ADMIN_COUNT_LIMIT', default=10000, cast=int)
+
+# Rows fetched per server-side cursor round trip and written per chunk by /export/ and `manage.py export_data`
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = config('DEBUG', default=True, cast=bool)  # Only allow all origins in development
 
@@ -165,5 +294,22 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     X_FRAME_OPTIONS = 'DENY'
 
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'social_backend': {
+            'handlers': ['console'],
+            'level': config('APP_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
\ No newline at end of file
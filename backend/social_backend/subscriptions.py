@@ -0,0 +1,240 @@
+"""
+GraphQL subscriptions over WebSocket, speaking the graphql-transport-ws protocol
+(graphql-ws, Apollo Client's GraphQLWsLink). asgi.py routes WebSocket
+connections for /graphql/ here; HTTP stays with Django.
+
+Each event is executed with its own context, so loaders never serve values
+cached while resolving an earlier event.
+"""
+import asyncio
+import inspect
+import json
+import logging
+from importlib import import_module
+from urllib.parse import urlsplit
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import HttpRequest, parse_cookie
+from django.http.request import validate_host
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate
+from graphql.execution import create_source_event_stream
+from .persisted_queries import query_hash, registry
+from .validation import QueryCost, query_cost_rule
+
+logger = logging.getLogger('social_backend.graphql')
+
+PROTOCOL = 'graphql-transport-ws'
+
+class SubscriptionContext:
+    """The parts of a request that resolvers read from info.context."""
+
+    graphql_async = True
+
+    def __init__(self, user):
+        self.user = user
+
+def _headers(scope):
+    return {name.decode('latin1'): value.decode('latin1') for name, value in scope.get('headers', ())}
+
+def _origin_allowed(headers):
+    # Browsers send cookies with cross-site WebSocket handshakes, so foreign pages are refused
+    origin = headers.get('origin')
+    if origin is None or getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+        return True
+    if origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        return True
+    return validate_host(urlsplit(origin).hostname or '', settings.ALLOWED_HOSTS)
+
+async def _get_user(headers):
+    request = HttpRequest()
+    request.COOKIES = parse_cookie(headers.get('cookie', ''))
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    request.session = session_store(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    return await aget_user(request)
+
+def _format_errors(errors):
+    return [GraphQLView.format_error(error) for error in errors]
+
+class SubscriptionConnection:
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.headers = _headers(scope)
+        self.schema = graphene_settings.SCHEMA.graphql_schema
+        self.user = None
+        self.operations = {}
+
+    async def send(self, message):
+        async with self._send_lock:
+            await self._send(message)
+
+    async def send_message(self, message):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(message, cls=DjangoJSONEncoder)})
+
+    async def close(self, code, reason):
+        await self.send({'type': 'websocket.close', 'code': code, 'reason': reason})
+        return False
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if PROTOCOL not in self.scope.get('subprotocols', ()) or not _origin_allowed(self.headers):
+            await self.send({'type': 'websocket.close', 'code': 4403})
+            return
+        await self.send({'type': 'websocket.accept', 'subprotocol': PROTOCOL})
+
+        loop = asyncio.get_running_loop()
+        init_deadline = loop.time() + settings.SUBSCRIPTION_INIT_TIMEOUT
+        try:
+            while True:
+                timeout = None if self.user is not None else max(0, init_deadline - loop.time())
+                try:
+                    message = await asyncio.wait_for(self.receive(), timeout)
+                except asyncio.TimeoutError:
+                    await self.close(4408, 'Connection initialisation timeout')
+                    break
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive':
+                    if not await self.handle(message.get('text') or message.get('bytes')):
+                        break
+        finally:
+            tasks = list(self.operations.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await sync_to_async(close_old_connections)()
+
+    async def handle(self, raw):
+        """Handle one client message. Returns False once the connection is closed."""
+        try:
+            message = json.loads(raw)
+            message_type = message['type']
+        except (ValueError, TypeError, KeyError):
+            return await self.close(4400, 'Invalid message')
+
+        if message_type == 'connection_init':
+            if self.user is not None:
+                return await self.close(4429, 'Too many initialisation requests')
+            self.user = await _get_user(self.headers)
+            await self.send_message({'type': 'connection_ack'})
+        elif message_type == 'ping':
+            await self.send_message({'type': 'pong'})
+        elif message_type == 'pong':
+            pass
+        elif message_type == 'subscribe':
+            if self.user is None:
+                return await self.close(4401, 'Unauthorized')
+            operation_id, payload = message.get('id'), message.get('payload')
+            if not isinstance(operation_id, str) or not isinstance(payload, dict):
+                return await self.close(4400, 'Invalid message')
+            if operation_id in self.operations:
+                return await self.close(4409, f'Subscriber for {operation_id} already exists')
+            if len(self.operations) >= settings.SUBSCRIPTION_MAX_PER_CONNECTION:
+                await self.send_message({'id': operation_id, 'type': 'error', 'payload': [{
+                    'message': f"At most {settings.SUBSCRIPTION_MAX_PER_CONNECTION} subscriptions per connection",
+                }]})
+                return True
+            task = asyncio.get_running_loop().create_task(self.run_operation(operation_id, payload))
+            self.operations[operation_id] = task
+            task.add_done_callback(lambda task: self.forget(operation_id, task))
+        elif message_type == 'complete':
+            task = self.operations.pop(message.get('id'), None)
+            if task is not None:
+                task.cancel()
+        else:
+            return await self.close(4400, f'Unexpected message type {message_type}')
+        return True
+
+    def forget(self, operation_id, task):
+        # The client may already be reusing the id for a new subscription
+        if self.operations.get(operation_id) is task:
+            del self.operations[operation_id]
+
+    def prepare(self, query, variables, operation_name):
+        """Parse, validate and cost-check an operation. Returns (document, errors)."""
+        if not isinstance(query, str) or not query:
+            return None, [GraphQLError("Must provide query string.")]
+        sha256 = query_hash(query)
+        document, errors = registry.get_document(self.schema, sha256, query)
+        if errors:
+            return None, errors
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None or operation_ast.operation != OperationType.SUBSCRIPTION:
+            return None, [GraphQLError(
+                "Only subscriptions are served over WebSocket; send queries and mutations over HTTP."
+            )]
+
+        query_cost = QueryCost()
+        errors = validate(self.schema, document, [query_cost_rule(variables, query_cost)])
+        logger.info(
+            "graphql subscription operation=%s hash=%s cost=%d depth=%d rejected=%s",
+            operation_name or '-',
+            sha256[:12],
+            query_cost.cost,
+            query_cost.depth,
+            query_cost.rejected,
+        )
+        return document, errors
+
+    async def run_operation(self, operation_id, payload):
+        variables = payload.get('variables') or {}
+        operation_name = payload.get('operationName')
+        document, errors = self.prepare(payload.get('query'), variables, operation_name)
+        if errors:
+            await self.send_message({'id': operation_id, 'type': 'error', 'payload': _format_errors(errors)})
+            return
+
+        stream = await create_source_event_stream(
+            self.schema, document, context_value=SubscriptionContext(self.user),
+            variable_values=variables, operation_name=operation_name,
+        )
+        if isinstance(stream, ExecutionResult):
+            await self.send_message({'id': operation_id, 'type': 'error', 'payload': _format_errors(stream.errors)})
+            return
+
+        try:
+            async for event in stream:
+                result = execute(
+                    self.schema, document, root_value=event, context_value=SubscriptionContext(self.user),
+                    variable_values=variables, operation_name=operation_name,
+                )
+                if inspect.isawaitable(result):
+                    result = await result
+                response = {'data': result.data}
+                if result.errors:
+                    response['errors'] = _format_errors(result.errors)
+                await self.send_message({'id': operation_id, 'type': 'next', 'payload': response})
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            # Raised by the subscribe resolver itself, e.g. a bad argument or a missing login
+            await self.send_message({'id': operation_id, 'type': 'error', 'payload': _format_errors([error])})
+            return
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        await self.send_message({'id': operation_id, 'type': 'complete'})
+
+class SubscriptionServer:
+    """ASGI application for WebSocket connections."""
+
+    def __init__(self, path='/graphql/'):
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope['path'].rstrip('/') != self.path.rstrip('/'):
+            await receive()
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        await SubscriptionConnection(scope, receive, send).run()
@@ -0,0 +1,48 @@
+from django.test import TestCase, override_settings
+
+POSTS_WITH_COMMENTS = '''
+query($first: Int) {
+    posts(first: $first) { edges { node { title comments(first: 100) { edges { node { content } } } } } }
+}
+'''
+
+class QueryCostTests(TestCase):
+    """Over-budget operations are rejected at validation, before any resolver runs."""
+
+    def graphql(self, query, variables=None):
+        response = self.client.post(
+            '/graphql/', {'query': query, 'variables': variables or {}}, content_type='application/json'
+        )
+        return response.json()
+
+    def assertRejected(self, query, variables, message):
+        with self.assertNumQueries(0):
+            data = self.graphql(query, variables)
+        self.assertIsNone(data.get('data'))
+        self.assertTrue(any(error['message'].startswith(message) for error in data['errors']), data['errors'])
+
+    def test_operations_within_budget_run(self):
+        data = self.graphql(POSTS_WITH_COMMENTS, {'first': 5})
+        self.assertNotIn('errors', data)
+        self.assertEqual(data['data']['posts']['edges'], [])
+
+    def test_expensive_operations_are_rejected(self):
+        self.assertRejected(POSTS_WITH_COMMENTS, {'first': 100}, "Query cost")
+
+    def test_negative_page_sizes_cost_as_much_as_the_largest_page(self):
+        self.assertRejected(POSTS_WITH_COMMENTS, {'first': -100000}, "Query cost")
+        self.assertRejected(
+            '{ posts(first: -100000) { edges { node { comments(first: 100) { edges { node { content } } } } } } }', {},
+            "Query cost",
+        )
+
+    def test_negative_page_sizes_are_refused_at_execution(self):
+        data = self.graphql('{ posts(first: -1) { edges { node { title } } } }')
+        self.assertEqual([error['message'] for error in data['errors']], ["`first` and `last` must be positive"])
+
+    @override_settings(GRAPHQL_MAX_QUERY_DEPTH=4)
+    def test_deep_operations_are_rejected(self):
+        self.assertRejected(
+            '{ posts(first: 1) { edges { node { author { username } } } } }', {},
+            "Query depth 5 exceeds the maximum allowed depth of 4",
+        )
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Per-operation resolver timing and SQL accounting (GRAPHQL_TRACING).
+
+TracingMiddleware times every resolver that is not a plain attribute lookup,
+keyed by schema coordinate (e.g. PostType.author), and marks it as the current
+field. A DB execute wrapper attributes each query to the current field, so
+loaders count against the field that triggered the batch, and groups queries
+by fingerprint: the SQL with IN lists collapsed. A fingerprint repeated from
+one field is the shape of an N+1.
+
+Every traced operation logs one summary line. With the GRAPHQL_TRACE_HEADER
+request header, staff users (anyone under DEBUG) also get the trace in the
+response's `extensions`.
+"""
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from graphene.types.resolver import dict_or_attr_resolver
+
+logger = logging.getLogger('social_backend.graphql')
+
+# A fingerprint repeated this often from one field is logged as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+TOP_RESOLVERS = 10
+
+_current_trace = contextvars.ContextVar('graphql_trace', default=None)
+_current_field = contextvars.ContextVar('graphql_field', default=None)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+def fingerprint(sql):
+    return IN_LIST.sub('IN (...)', sql)
+
+class Trace:
+    def __init__(self, operation_name):
+        self.operation_name = operation_name or '-'
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        # coordinate -> [calls, seconds, queries, query seconds]
+        self.fields = defaultdict(lambda: [0, 0.0, 0, 0.0])
+        # fingerprint -> {coordinate: count}
+        self.queries = defaultdict(lambda: defaultdict(int))
+        self.query_count = 0
+        self.query_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_resolver(self, coordinate, elapsed):
+        with self._lock:
+            stats = self.fields[coordinate]
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def add_query(self, sql, elapsed, coordinate):
+        with self._lock:
+            self.query_count += 1
+            self.query_time += elapsed
+            self.queries[fingerprint(sql)][coordinate or '-'] += 1
+            if coordinate is not None:
+                stats = self.fields[coordinate]
+                stats[2] += 1
+                stats[3] += elapsed
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def duplicates(self):
+        """Fingerprints executed more than once, most repeated first."""
+        repeated = []
+        for sql, coordinates in self.queries.items():
+            count = sum(coordinates.values())
+            if count > 1:
+                repeated.append((count, sql, coordinates))
+        repeated.sort(key=lambda item: -item[0])
+        return repeated
+
+    def summary(self):
+        resolvers = sorted(self.fields.items(), key=lambda item: -item[1][1])
+        return {
+            'operation': self.operation_name,
+            'durationMs': round(self.duration * 1000, 2),
+            'sql': {'count': self.query_count, 'durationMs': round(self.query_time * 1000, 2)},
+            'resolvers': [
+                {
+                    'path': coordinate,
+                    'calls': calls,
+                    'durationMs': round(seconds * 1000, 2),
+                    'sqlCount': queries,
+                    'sqlDurationMs': round(query_seconds * 1000, 2),
+                }
+                for coordinate, (calls, seconds, queries, query_seconds) in resolvers
+            ],
+            'duplicateQueries': [
+                {
+                    'fingerprint': hashlib.sha1(sql.encode()).hexdigest()[:12],
+                    'count': count,
+                    'paths': dict(coordinates),
+                    'sql': sql[:500],
+                }
+                for count, sql, coordinates in self.duplicates()
+            ],
+        }
+
+    def log(self):
+        summary = self.summary()
+        duplicates = self.duplicates()
+        suspected = any(
+            count >= N_PLUS_ONE_THRESHOLD
+            for total, sql, coordinates in duplicates for count in coordinates.values()
+        )
+        logger.log(
+            logging.WARNING if suspected else logging.INFO,
+            "graphql trace operation=%s duration_ms=%.1f sql=%d sql_ms=%.1f duplicate_sql=%d slowest=%s",
+            self.operation_name,
+            self.duration * 1000,
+            self.query_count,
+            self.query_time * 1000,
+            sum(total - 1 for total, sql, coordinates in duplicates),
+            ','.join(
+                f"{resolver['path']}:{resolver['durationMs']:.1f}ms/{resolver['sqlCount']}q"
+                for resolver in summary['resolvers'][:5]
+            ) or '-',
+            extra={'graphql_trace': summary},
+        )
+        return summary
+
+def record_query(execute, sql, params, many, context):
+    trace = _current_trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.add_query(sql, time.perf_counter() - started, _current_field.get())
+
+def install(database):
+    if record_query not in database.execute_wrappers:
+        database.execute_wrappers.append(record_query)
+
+def _install_on_new_connection(sender, connection, **kwargs):
+    install(connection)
+
+# Also covers the worker threads behind sync_to_async and the async ORM
+connection_created.connect(_install_on_new_connection)
+
+def wants_trace(request):
+    if not request.headers.get(settings.GRAPHQL_TRACE_HEADER):
+        return False
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or (user is not None and user.is_staff)
+
+@contextmanager
+def trace_operation(request, operation_name):
+    """Trace the execution inside the block; exposed traces are left on request.graphql_extensions."""
+    if not settings.GRAPHQL_TRACING:
+        yield None
+        return
+    install(connection)
+    trace = Trace(operation_name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        summary = trace.log()
+        if wants_trace(request):
+            request.graphql_extensions = {'tracing': summary}
+
+class TracingMiddleware:
+    """Graphene middleware timing resolvers of the operation being traced."""
+
+    def resolve(self, next, root, info, **args):
+        trace = _current_trace.get()
+        # Plain attribute lookups are most fields and cost less than timing them
+        if trace is None or getattr(next, 'func', None) is dict_or_attr_resolver:
+            return next(root, info, **args)
+
+        coordinate = f'{info.parent_type.name}.{info.field_name}'
+        token = _current_field.set(coordinate)
+        started = time.perf_counter()
+        try:
+            result = next(root, info, **args)
+        except Exception:
+            trace.add_resolver(coordinate, time.perf_counter() - started)
+            raise
+        finally:
+            _current_field.reset(token)
+        if hasattr(result, '__await__'):
+            return self._await(trace, coordinate, started, result)
+        trace.add_resolver(coordinate, time.perf_counter() - started)
+        return result
+
+    async def _await(self, trace, coordinate, started, result):
+        token = _current_field.set(coordinate)
+        try:
+            return await result
+        finally:
+            _current_field.reset(token)
+            trace.add_resolver(coordinate, time.perf_counter() - started)
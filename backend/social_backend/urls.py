@@ -2,12 +2,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from .export import export_data
+from .health import database_health
+from .views import AsyncSocialGraphQLView, SocialGraphQLView
+
+graphql_view = AsyncSocialGraphQLView if settings.GRAPHQL_ASYNC else SocialGraphQLView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql/', csrf_exempt(graphql_view.as_view(graphiql=True))),
+    path('health/db/', database_health),
+    path('export/<str:dataset>/', export_data),
 ]
 
 if settings.DEBUG:
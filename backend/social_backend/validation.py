@@ -0,0 +1,127 @@
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    InlineFragmentNode,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    value_from_ast_untyped,
+)
+
+class QueryCost:
+    """Static estimate of the rows an operation can touch, filled in during validation."""
+
+    def __init__(self):
+        self.cost = 0
+        self.depth = 0
+        self.rejected = False
+
+def measure_operation(context, operation, variables):
+    schema = context.schema
+    root_type = schema.get_root_type(operation.operation)
+    return _measure(context, operation.selection_set, root_type, variables, 1, None, set())
+
+def _page_size(field_node, variables):
+    for argument in field_node.arguments:
+        if argument.name.value in ('first', 'last'):
+            value = value_from_ast_untyped(argument.value, variables)
+            if isinstance(value, int):
+                # Negative or oversized pages are refused at execution; cost them as the largest
+                # page so they can never offset the rest of the operation
+                max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+                return value if 0 <= value <= max_limit else max_limit
+    return None
+
+def _measure(context, selection_set, parent_type, variables, depth, page_hint, visited_fragments):
+    """Return (cost, depth) for a selection set, multiplying list fields by their expected size."""
+    cost = 0
+    max_depth = depth - 1
+    if selection_set is None or parent_type is None:
+        return cost, max_depth
+
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            # Introspection and __typename are cheap and asked for by every tool
+            if name.startswith('__'):
+                continue
+            field = getattr(parent_type, 'fields', {}).get(name)
+            if field is None:
+                continue
+
+            field_type = get_nullable_type(field.type)
+            named_type = get_named_type(field_type)
+            child_hint = _page_size(selection, variables)
+            if child_hint is None and named_type.name.endswith('Connection'):
+                child_hint = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+
+            multiplier = 1
+            if isinstance(field_type, GraphQLList):
+                multiplier = page_hint if page_hint is not None else settings.GRAPHQL_DEFAULT_LIST_SIZE
+            # Every field costs at least itself, so the running total only grows
+            multiplier = max(1, multiplier)
+
+            child_cost, child_depth = _measure(
+                context, selection.selection_set, named_type, variables, depth + 1,
+                child_hint if child_hint is not None else (None if multiplier > 1 else page_hint),
+                visited_fragments,
+            )
+            cost += multiplier * (1 + child_cost)
+            max_depth = max(max_depth, child_depth if selection.selection_set else depth)
+
+        elif isinstance(selection, InlineFragmentNode):
+            fragment_type = parent_type
+            if selection.type_condition is not None:
+                fragment_type = context.schema.get_type(selection.type_condition.name.value)
+            child_cost, child_depth = _measure(
+                context, selection.selection_set, fragment_type, variables, depth, page_hint, visited_fragments
+            )
+            cost += child_cost
+            max_depth = max(max_depth, child_depth)
+
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment_name = selection.name.value
+            fragment = context.get_fragment(fragment_name)
+            # Fragment cycles are reported by NoFragmentCyclesRule
+            if fragment is None or fragment_name in visited_fragments:
+                continue
+            fragment_type = context.schema.get_type(fragment.type_condition.name.value)
+            child_cost, child_depth = _measure(
+                context, fragment.selection_set, fragment_type, variables, depth, page_hint,
+                visited_fragments | {fragment_name},
+            )
+            cost += child_cost
+            max_depth = max(max_depth, child_depth)
+
+    return cost, max_depth
+
+def query_cost_rule(variables, result, max_cost=None, max_depth=None):
+    """
+    Build a validation rule that rejects operations whose static cost or depth
+    exceeds the configured budget, recording the measurement on `result`.
+    """
+    max_cost = max_cost if max_cost is not None else settings.GRAPHQL_MAX_QUERY_COST
+    max_depth = max_depth if max_depth is not None else settings.GRAPHQL_MAX_QUERY_DEPTH
+
+    class QueryCostRule(ValidationRule):
+        def enter_operation_definition(self, node, *args):
+            cost, depth = measure_operation(self.context, node, variables or {})
+            result.cost = max(result.cost, cost)
+            result.depth = max(result.depth, depth)
+            if depth > max_depth:
+                result.rejected = True
+                self.report_error(GraphQLError(
+                    f"Query depth {depth} exceeds the maximum allowed depth of {max_depth}", node
+                ))
+            if cost > max_cost:
+                result.rejected = True
+                self.report_error(GraphQLError(
+                    f"Query cost {cost} exceeds the maximum allowed cost of {max_cost}", node
+                ))
+            return self.SKIP
+
+    return QueryCostRule
@@ -0,0 +1,236 @@
+import inspect
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate
+from .persisted_queries import registry
+from .result_cache import get_cached_result, result_cache_key, set_cached_result
+from .routers import use_primary
+from .tracing import trace_operation
+from .validation import QueryCost, query_cost_rule
+
+logger = logging.getLogger('social_backend.graphql')
+
+class SocialGraphQLView(GraphQLView):
+    """
+    GraphQLView that resolves persisted query hashes, reuses parsed and validated
+    documents, and rejects over-budget operations before executing them.
+    """
+
+    cacheable = False
+
+    def dispatch(self, request, *args, **kwargs):
+        return self.patch_cacheable(super().dispatch(request, *args, **kwargs))
+
+    def patch_cacheable(self, response):
+        if self.cacheable and response.status_code == 200:
+            # Anonymous persisted reads over GET are safe for a reverse proxy to cache
+            patch_cache_control(response, public=True, max_age=settings.GRAPHQL_GET_CACHE_SECONDS)
+            patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        plan = self.prepare_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(plan, ExecutionPlan):
+            return plan
+        try:
+            return self.run_plan(request, plan)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def prepare_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Everything before execution: persisted query lookup, document cache, cost
+        check and result cache. Returns an ExecutionPlan, or the response itself
+        (a cached result, errors or None) when there is nothing to execute.
+        """
+        try:
+            sha256, query = registry.resolve(request, data, query)
+        except GraphQLError as error:
+            return ExecutionResult(errors=[error])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        document, errors = registry.get_document(schema, sha256, query)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        is_get = request.method.lower() == 'get'
+        if is_get and operation_ast is not None and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ['POST'],
+                    f"Can only perform a {operation_ast.operation.value} operation from a POST request.",
+                )
+            )
+
+        if operation_ast is not None and operation_ast.operation == OperationType.SUBSCRIPTION:
+            return ExecutionResult(errors=[GraphQLError(
+                "Subscriptions are served over WebSocket (graphql-transport-ws) at this URL."
+            )])
+
+        # Cost depends on the variables, so it is checked on every request
+        query_cost = QueryCost()
+        request.graphql_cost = query_cost
+        errors = validate(schema, document, [query_cost_rule(variables, query_cost)])
+        logger.info(
+            "graphql operation=%s hash=%s cost=%d depth=%d rejected=%s",
+            operation_name or '-',
+            sha256[:12],
+            query_cost.cost,
+            query_cost.depth,
+            query_cost.rejected,
+        )
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        self.cacheable = (
+            is_get
+            and operation_ast is not None
+            and not request.user.is_authenticated
+        )
+
+        cache_key = result_cache_key(request, operation_ast, sha256, operation_name, variables)
+        if cache_key is not None:
+            data = get_cached_result(cache_key)
+            if data is not None:
+                return ExecutionResult(data=data)
+
+        execute_options = {
+            'root_value': self.get_root_value(request),
+            'context_value': self.get_context(request),
+            'variable_values': variables,
+            'operation_name': operation_name,
+            'middleware': self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options['execution_context_class'] = self.execution_context_class
+        return ExecutionPlan(schema, document, operation_ast, cache_key, execute_options)
+
+    def json_encode(self, request, d, pretty=False):
+        extensions = request.__dict__.pop('graphql_extensions', None)
+        if extensions is not None and isinstance(d, dict):
+            d = dict(d, extensions=extensions)
+        return super().json_encode(request, d, pretty)
+
+    def run_plan(self, request, plan):
+        if plan.is_mutation and (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+        ):
+            with use_primary(writes=True), transaction.atomic(), trace_operation(request, plan.operation_name):
+                result = execute(plan.schema, plan.document, **plan.execute_options)
+                if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                    transaction.set_rollback(True)
+            return result
+
+        if plan.is_mutation:
+            # Reads made while mutating must see the primary's data
+            with use_primary(writes=True), trace_operation(request, plan.operation_name):
+                return execute(plan.schema, plan.document, **plan.execute_options)
+        with trace_operation(request, plan.operation_name):
+            result = execute(plan.schema, plan.document, **plan.execute_options)
+        if plan.cache_key is not None and not result.errors:
+            set_cached_result(plan.cache_key, result.data)
+        return result
+
+class ExecutionPlan:
+    def __init__(self, schema, document, operation_ast, cache_key, execute_options):
+        self.schema = schema
+        self.document = document
+        self.operation_ast = operation_ast
+        self.cache_key = cache_key
+        self.execute_options = execute_options
+
+    @property
+    def operation_name(self):
+        if self.execute_options['operation_name']:
+            return self.execute_options['operation_name']
+        return self.operation_ast.name.value if self.operation_ast is not None and self.operation_ast.name else None
+
+    @property
+    def is_mutation(self):
+        return self.operation_ast is not None and self.operation_ast.operation == OperationType.MUTATION
+
+class AsyncSocialGraphQLView(SocialGraphQLView):
+    """
+    SocialGraphQLView for ASGI. Queries execute on the event loop, so per-post
+    fields batch through the async ORM loaders. Mutations, GraphiQL and batched
+    requests run the sync view in a worker thread.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Resolve the lazy user now; touching it on the event loop would hit the sync ORM
+        request.user = await request.auser()
+        try:
+            if request.method.lower() not in ('get', 'post') or self.batch:
+                return await self._dispatch_sync(request, *args, **kwargs)
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await self._dispatch_sync(request, *args, **kwargs)
+
+            query, variables, operation_name, id = self.get_graphql_params(request, data)
+            plan = await sync_to_async(self.prepare_graphql_request)(request, data, query, variables, operation_name)
+            if isinstance(plan, ExecutionPlan):
+                result = await self.arun_plan(request, plan)
+            else:
+                result = plan
+            response = HttpResponse(
+                status=self.result_status(result), content=self.encode_result(request, result),
+                content_type='application/json',
+            )
+        except HttpError as e:
+            response = e.response
+            response['Content-Type'] = 'application/json'
+            response.content = self.json_encode(request, {'errors': [self.format_error(e)]})
+            return response
+        return self.patch_cacheable(response)
+
+    async def _dispatch_sync(self, request, *args, **kwargs):
+        return await sync_to_async(SocialGraphQLView.dispatch)(self, request, *args, **kwargs)
+
+    async def arun_plan(self, request, plan):
+        if plan.is_mutation:
+            return await sync_to_async(self.run_plan)(request, plan)
+        try:
+            request.graphql_async = True
+            with trace_operation(request, plan.operation_name):
+                result = execute(plan.schema, plan.document, **plan.execute_options)
+                if inspect.isawaitable(result):
+                    result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        if plan.cache_key is not None and not result.errors:
+            await sync_to_async(set_cached_result)(plan.cache_key, result.data)
+        return result
+
+    def result_status(self, result):
+        if result and result.errors and any(not getattr(e, 'path', None) for e in result.errors):
+            return 400
+        return 200
+
+    def encode_result(self, request, result):
+        if not result:
+            return None
+        response = {}
+        if result.errors:
+            response['errors'] = [self.format_error(e) for e in result.errors]
+        if self.result_status(result) == 200:
+            response['data'] = result.data
+        return self.json_encode(request, response)
@@ -2,4 +2,9 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_backend.settings')
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Only server processes run the periodic jobs, not tests or management commands
+from .background import start_background_jobs  # noqa: E402
+
+start_background_jobs()
\ No newline at end of file
@@ -31,19 +31,28 @@ export const GET_POSTS = gql`
 `;
 
 export const GET_POST_COMMENTS = gql`
-  query GetPostComments($postId: ID!) {
+  query GetPostComments($postId: ID!, $first: Int, $after: String) {
     post(id: $postId) {
       id
-      comments {
-        id
-        content
-        createdAt
-        author {
-          id
-          username
-          firstName
-          lastName
-          avatar
+      comments(first: $first, after: $after) {
+        totalCount
+        edges {
+          node {
+            id
+            content
+            createdAt
+            author {
+              id
+              username
+              firstName
+              lastName
+              avatar
+            }
+          }
+        }
+        pageInfo {
+          hasNextPage
+          endCursor
         }
       }
     }
@@ -70,4 +70,20 @@ export interface PostsResponse {
       endCursor: string;
     };
   };
-}
\ No newline at end of file
+}
+
+export interface PostCommentsResponse {
+  post: {
+    id: string;
+    comments: {
+      totalCount: number;
+      edges: {
+        node: Comment;
+      }[];
+      pageInfo: {
+        hasNextPage: boolean;
+        endCursor: string;
+      };
+    };
+  };
+}